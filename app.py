@@ -126,16 +126,9 @@ try:
     # --- Real Value Adjustment for Dashboard KPI ---
     show_real = inputs.get('show_real_values', False)
     if show_real:
-        market_total_profit = metrics.get('real_total_profit', total_profit)
-        # Check if key exists (backward compat for old MC maybe), fallback to on-the-fly
-        if market_total_profit == total_profit and total_profit != 0: 
-             # Key missing or identical (unlikely if rates > 0), calc fallback
-             inf_rate = inputs.get('general_inflation_rate', 2.0)
-             real_cfs = [yearly_cashflows_arr[i] / ((1 + inf_rate/100)**i) for i in range(len(yearly_cashflows_arr))]
-             market_total_profit = sum(real_cfs)
-        
-        total_profit = market_total_profit
-        monthly_cashflow = metrics.get('real_monthly_cashflow_y1', monthly_cashflow)
+        # Reálné hodnoty se počítají až zde (líně, ze sdíleného deflátoru)
+        total_profit = metrics['real_total_profit']
+        monthly_cashflow = metrics['real_monthly_cashflow_y1']
 
     # --- Dopočítáváme pouze věci specifické pro UI zobrazení (Derived Metrics) ---
     derived_metrics = {}
@@ -157,9 +150,8 @@ try:
     derived_metrics['ltv'] = ltv
 
     # 3. Odvozené časové řady pro grafy
-    # Equity = Hodnota - Dluh
-    equity_values = [val - dept for val, dept in zip(property_values, mortgage_balances)]
-    derived_metrics['equity_values'] = equity_values
+    # Equity = Hodnota - Dluh (líně spočtená řada výsledku)
+    derived_metrics['equity_values'] = metrics.equity_values
 
     # 4. Finální hodnoty pro reporty
     sale_price = property_values[-1]
@@ -257,15 +249,18 @@ with kpi4:
 st.divider()
 
 # --- TABS ---
-t_analysis, t_cashflow, t_strategy, t_compare, t_monte = st.tabs([
+# Počítá a vykresluje se jen zobrazená záložka: st.tabs posílá do prohlížeče
+# obsah všech záložek při každém rerunu, proto přepínač v session state.
+TAB_LABELS = [
     "📊 Analýza (Draft)", 
     "💰 Cashflow Detail", 
     "🔮 Strategie & Rozhodování", 
     "⚖️ Porovnání", 
     "🎲 Monte Carlo (Riziko)"
-])
+]
+active_tab = st.radio("Záložka", TAB_LABELS, horizontal=True, key="active_tab", label_visibility="collapsed")
 
-with t_analysis:
+if active_tab == TAB_LABELS[0]:
     # Hlavní přehled (Původní detailní metriky)
     st.subheader("Detailní Metriky Nemovitosti")
     col1, col2, col3, col4, col5 = st.columns(5)
@@ -294,16 +289,14 @@ with t_analysis:
 
     render_analysis_tab(inputs, metrics, derived_metrics)
     
-with t_cashflow:
+elif active_tab == TAB_LABELS[1]:
     render_cashflow_tab(inputs, metrics, derived_metrics)
 
-with t_strategy:
+elif active_tab == TAB_LABELS[2]:
     render_strategy_tab(inputs, metrics, derived_metrics)
     
-with t_compare:
+elif active_tab == TAB_LABELS[3]:
     render_comparison_tab(inputs, metrics, derived_metrics)
     
-with t_monte:
+elif active_tab == TAB_LABELS[4]:
     render_monte_carlo_tab(inputs, metrics, derived_metrics)
-
-
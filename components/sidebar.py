@@ -1,4 +1,5 @@
 import streamlit as st
+import plotly.graph_objects as go
 import calculations
 import scenario_manager
 import uuid
@@ -124,70 +125,72 @@ def render_sidebar():
             # Range slider pro optimalizaci
             opt_ltv_range = st.slider("Rozsah akceptovatelného LTV (%)", 0, 100, (20, 90), key="opt_ltv_range")
             
+            col_opt1, col_opt2 = st.columns(2)
+            with col_opt1:
+                opt_ltv_step = st.select_slider("Krok LTV (%)", options=[1, 2, 5, 10], value=5, key="opt_ltv_step")
+            with col_opt2:
+                opt_max_years = st.slider("Max. doba držení (roky)", 5, 40, 30, 1, key="opt_max_years")
+            
             if st.button("✨ Vypočítat a nastavit optimální strategii", type="primary"):
-                best_irr = -999.0
-                best_ltv = 0
-                best_years = 0
-                
-                progress_bar = st.progress(0)
-                # Rozsah z oboustranného slideru
+                st.session_state['opt_active'] = True
+
+            # Mřížka se po zapnutí počítá z aktuálních vstupů při každém renderu
+            # (memoizovaná, bez změny vstupů jde z cache), heatmapa ani optimum
+            # proto nikdy neukazují výsledek pro starší zadání
+            if st.session_state.get('opt_active'):
+                # Celá mřížka LTV x roky jedním vektorizovaným výpočtem
                 min_ltv_opt, max_ltv_opt = opt_ltv_range
-                ltv_range = range(min_ltv_opt, max_ltv_opt + 1, 5)
-                total_steps = len(ltv_range)
-                
-                for i, try_ltv in enumerate(ltv_range):
-                    progress_bar.progress((i + 1) / total_steps)
-                    
-                    for try_year in range(1, 31):
-                        try_down_payment = purchase_price * (1 - try_ltv / 100)
-                        time_test_config = {"enabled": time_test_enabled, "years": time_test_years}
-                        
-                        res = calculations.calculate_metrics(
-                            purchase_price=purchase_price,
-                            down_payment=try_down_payment,
-                            one_off_costs=one_off_costs,
-                            interest_rate=interest_rate,
-                            loan_term_years=loan_term_years,
-                            monthly_rent=monthly_rent,
-                            monthly_expenses=monthly_expenses,
-                            vacancy_months=vacancy_months,
-                            tax_rate=tax_rate, 
-                            appreciation_rate=appreciation_rate,
-                            rent_growth_rate=rent_growth_rate,
-                            holding_period=try_year,
-                            etf_comparison=False,
-                            etf_return=0,
-                            initial_fx_rate=25,
-                            fx_appreciation=0,
-                            time_test_vars=time_test_config,
-                            sale_fee_percent=sale_fee_percent
-                        )
-                        
-                        if res['irr'] > best_irr:
-                            best_irr = res['irr']
-                            best_ltv = try_ltv
-                            best_years = try_year
-                
-                progress_bar.empty()
-                st.session_state['opt_result'] = {
-                    'ltv': best_ltv,
-                    'years': best_years,
-                    'irr': best_irr
-                }
-                
-            # Zobrazení výsledku hledání
-            if 'opt_result' in st.session_state:
-                res = st.session_state['opt_result']
-                st.info(f"💡 Nalezené optimum: LTV **{res['ltv']}%** na **{res['years']} let** (IRR {res['irr']:.2f}%)")
-                
-                if st.button("⬇️ Aplikovat optimum"):
-                     st.session_state['target_ltv_input'] = res['ltv']
-                     st.session_state['holding_period_input'] = res['years']
-                     st.rerun()
+                grid = calculations.evaluate_ltv_holding_grid(
+                    purchase_price=purchase_price,
+                    one_off_costs=one_off_costs,
+                    interest_rate=interest_rate,
+                    loan_term_years=loan_term_years,
+                    monthly_rent=monthly_rent,
+                    monthly_expenses=monthly_expenses,
+                    vacancy_months=vacancy_months,
+                    tax_rate=tax_rate,
+                    appreciation_rate=appreciation_rate,
+                    rent_growth_rate=rent_growth_rate,
+                    time_test_vars={"enabled": time_test_enabled, "years": time_test_years},
+                    sale_fee_percent=sale_fee_percent,
+                    ltv_min=min_ltv_opt,
+                    ltv_max=max_ltv_opt,
+                    ltv_step=opt_ltv_step,
+                    max_holding_period=opt_max_years
+                )
+
+                # Heatmapa IRR (LTV x doba držení)
+                fig_grid = go.Figure(go.Heatmap(
+                    z=grid['irr'],
+                    x=grid['holding_periods'],
+                    y=grid['ltv'],
+                    colorscale="RdYlGn",
+                    colorbar=dict(title="IRR %"),
+                    hovertemplate="Roky: %{x}<br>LTV: %{y}%<br>IRR: %{z:.2f}%<extra></extra>"
+                ))
+                fig_grid.update_layout(
+                    xaxis_title="Doba držení (roky)",
+                    yaxis_title="LTV (%)",
+                    height=300,
+                    margin=dict(l=10, r=10, t=10, b=10)
+                )
+                st.plotly_chart(fig_grid, use_container_width=True)
+
+                # Zobrazení výsledku hledání
+                if grid['best'] is None:
+                    st.warning("Pro zvolený rozsah nelze spočítat IRR.")
+                else:
+                    best_ltv, best_years = int(round(grid['best']['ltv'])), grid['best']['years']
+                    st.info(f"💡 Nalezené optimum: LTV **{best_ltv}%** na **{best_years} let** (IRR {grid['best']['irr']:.2f}%)")
+
+                    if st.button("⬇️ Aplikovat optimum"):
+                         st.session_state['target_ltv_input'] = best_ltv
+                         st.session_state['holding_period_input'] = best_years
+                         st.rerun()
 
         st.markdown("---")
         # Finální vstupy strategie (uživatel je může doladit po optimalizaci)
-        holding_period = st.slider("Doba držení (roky)", 1, 30, step=1, key="holding_period_input")
+        holding_period = st.slider("Doba držení (roky)", 1, 40, step=1, key="holding_period_input")
         
         target_ltv = st.slider("LTV (%)", 0, 100, step=5, key="target_ltv_input")
         
@@ -292,4 +295,37 @@ def render_sidebar():
                      st.error(msg)
                  del st.session_state.import_status
 
+    # --- F. SDÍLENÁ CACHE VÝPOČTŮ ---
+    with st.sidebar.expander("🧮 Cache výpočtů (sdílená)", expanded=False):
+        _render_cache_stats()
+
     return final_inputs
+
+
+def _render_cache_stats():
+    """Statistiky sdílené cache výpočtů (všechny relace procesu) a tlačítko pro její vyprázdnění."""
+    rows = calculations.cache_stats()
+    total = rows[-1]
+    st.caption(
+        f"Zásahy {total['hits']:,} / výpadky {total['misses']:,} "
+        f"({total['hit_rate'] * 100:.0f} %), {total['size']:,} záznamů, "
+        f"{total['nbytes'] / 1024 ** 2:.1f} MB"
+    )
+    if len(rows) > 1:
+        st.dataframe(
+            [
+                {
+                    "Funkce": row['namespace'].rsplit(".", 1)[-1],
+                    "Zásahy": row['hits'],
+                    "Výpadky": row['misses'],
+                    "Záznamy": row['size'],
+                    "MB": round(row['nbytes'] / 1024 ** 2, 2),
+                    "Vyhozeno": row['evictions'] + row['expired']
+                }
+                for row in rows[:-1]
+            ],
+            hide_index=True
+        )
+    if st.button("🗑️ Vyprázdnit cache", key="clear_compute_cache"):
+        calculations.clear_cache()
+        st.rerun()
@@ -0,0 +1,506 @@
+import numpy as np
+from logic.risk import DEFAULT_CONFIDENCE, cashflow_drawdown, negative_equity, total_subsidies
+
+# --- STREAMING AGREGACE ---
+# Slučitelné (mergeable) souhrny, které umožňují zpracovat Monte Carlo po dávkách
+# s konstantní pamětí: průměr/rozptyl, kvantilový sketch, histogramy s pevnými koši
+# a percentilová pásma po letech. Dávky lze slučovat v libovolném procesu.
+
+# Pevné koše histogramu IRR (%); hodnoty mimo rozsah se počítají do under/overflow
+DEFAULT_IRR_EDGES = np.linspace(-50.0, 50.0, 201)
+# Percentily pro pásma po letech (fan chart)
+DEFAULT_BAND_PERCENTILES = (5, 25, 50, 75, 95)
+
+
+class OnlineMoments:
+    """Počet, průměr a rozptyl proudu hodnot (Welford / Chan merge)."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[np.isfinite(values)]
+        if values.size:
+            other = OnlineMoments()
+            other.count = values.size
+            other.mean = float(values.mean())
+            other.m2 = float(((values - other.mean) ** 2).sum())
+            self.merge(other)
+        return self
+
+    def merge(self, other):
+        if other.count == 0:
+            return self
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta ** 2 * self.count * other.count / total
+        self.count = total
+        return self
+
+    @property
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else np.nan
+
+    @property
+    def std(self):
+        return float(np.sqrt(self.variance))
+
+    @property
+    def standard_error(self):
+        """Směrodatná chyba průměru."""
+        return self.std / np.sqrt(self.count) if self.count > 1 else np.nan
+
+
+class ControlVariate:
+    """
+    Odhad průměru s kontrolní proměnnou C, jejíž střední hodnota je známá.
+
+    Slučitelné momenty dvojic (y, c): průměry, rozptyly a kovariance.
+    Upravený průměr y - beta * (mean(c) - E[C]) s beta = cov(y, c) / var(c)
+    má rozptyl menší o faktor (1 - rho^2).
+    """
+
+    def __init__(self, expected):
+        self.expected = float(expected)
+        self.count = 0
+        self.mean_y = 0.0
+        self.mean_c = 0.0
+        self.m2_y = 0.0
+        self.m2_c = 0.0
+        self.c_yc = 0.0
+
+    def update(self, y, c):
+        y = np.asarray(y, dtype=float).ravel()
+        c = np.asarray(c, dtype=float).ravel()
+        valid = np.isfinite(y) & np.isfinite(c)
+        y, c = y[valid], c[valid]
+        if y.size:
+            other = ControlVariate(self.expected)
+            other.count = y.size
+            other.mean_y = float(y.mean())
+            other.mean_c = float(c.mean())
+            dy, dc = y - other.mean_y, c - other.mean_c
+            other.m2_y = float((dy ** 2).sum())
+            other.m2_c = float((dc ** 2).sum())
+            other.c_yc = float((dy * dc).sum())
+            self.merge(other)
+        return self
+
+    def merge(self, other):
+        if other.count == 0:
+            return self
+        total = self.count + other.count
+        weight = self.count * other.count / total
+        delta_y = other.mean_y - self.mean_y
+        delta_c = other.mean_c - self.mean_c
+        self.mean_y += delta_y * other.count / total
+        self.mean_c += delta_c * other.count / total
+        self.m2_y += other.m2_y + delta_y ** 2 * weight
+        self.m2_c += other.m2_c + delta_c ** 2 * weight
+        self.c_yc += other.c_yc + delta_y * delta_c * weight
+        self.count = total
+        return self
+
+    @property
+    def beta(self):
+        return self.c_yc / self.m2_c if self.m2_c > 0 else 0.0
+
+    @property
+    def correlation(self):
+        if self.m2_y <= 0 or self.m2_c <= 0:
+            return 0.0
+        return self.c_yc / np.sqrt(self.m2_y * self.m2_c)
+
+    @property
+    def mean(self):
+        """Průměr upravený kontrolní proměnnou."""
+        if self.count == 0:
+            return np.nan
+        return self.mean_y - self.beta * (self.mean_c - self.expected)
+
+    @property
+    def standard_error(self):
+        if self.count < 3:
+            return np.nan
+        residual = self.m2_y * (1 - self.correlation ** 2)
+        return float(np.sqrt(residual / (self.count - 2) / self.count))
+
+
+class QuantileSketch:
+    """
+    Slučitelný kvantilový sketch typu t-digest (merging digest, škálová funkce k1).
+
+    Centroidy se slučují vektorizovaně: po seřazení se každému přiřadí koš podle
+    k(q) = compression / (2 pi) * asin(2q - 1), takže okraje rozdělení (chvosty)
+    mají jemné rozlišení a střed hrubší. Paměť ~ compression / 2 centroidů.
+    """
+
+    def __init__(self, compression=500):
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.min = np.inf
+        self.max = -np.inf
+
+    @property
+    def count(self):
+        return float(self.weights.sum())
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[np.isfinite(values)]
+        if values.size:
+            self.min = min(self.min, float(values.min()))
+            self.max = max(self.max, float(values.max()))
+            self._absorb(values, np.ones_like(values))
+        return self
+
+    def merge(self, other):
+        if other.weights.size:
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+            self._absorb(other.means, other.weights)
+        return self
+
+    def _absorb(self, means, weights):
+        means = np.concatenate([self.means, means])
+        weights = np.concatenate([self.weights, weights])
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+
+        cum = np.cumsum(weights)
+        q_mid = (cum - weights / 2) / cum[-1]
+        k = self.compression / (2 * np.pi) * np.arcsin(2 * q_mid - 1)
+        bucket = np.floor(k - k.min()).astype(np.int64)
+        _, idx = np.unique(bucket, return_inverse=True)
+
+        self.weights = np.bincount(idx, weights=weights)
+        self.means = np.bincount(idx, weights=weights * means) / self.weights
+
+    def quantile(self, q):
+        """Kvantil(y) q v intervalu [0, 1]; prázdný sketch vrací NaN."""
+        q = np.asarray(q, dtype=float)
+        if not self.weights.size:
+            return np.full(q.shape, np.nan) if q.ndim else np.nan
+        cum = np.cumsum(self.weights)
+        total = cum[-1]
+        centers = (cum - self.weights / 2) / total
+        xp = np.concatenate([[0.0], centers, [1.0]])
+        fp = np.concatenate([[self.min], self.means, [self.max]])
+        return np.interp(q, xp, fp)
+
+    def cdf(self, x):
+        """Odhad podílu hodnot <= x."""
+        if not self.weights.size:
+            return np.nan
+        cum = np.cumsum(self.weights)
+        total = cum[-1]
+        centers = (cum - self.weights / 2) / total
+        xp = np.concatenate([[self.min], self.means, [self.max]])
+        fp = np.concatenate([[0.0], centers, [1.0]])
+        return np.interp(x, xp, fp)
+
+
+class FixedHistogram:
+    """Histogram s pevnými koši (slučitelný prostým sčítáním)."""
+
+    def __init__(self, edges=DEFAULT_IRR_EDGES):
+        self.edges = np.asarray(edges, dtype=float)
+        self.counts = np.zeros(self.edges.size - 1, dtype=np.int64)
+        self.underflow = 0
+        self.overflow = 0
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[np.isfinite(values)]
+        self.counts += np.histogram(values, bins=self.edges)[0]
+        self.underflow += int((values < self.edges[0]).sum())
+        self.overflow += int((values > self.edges[-1]).sum())
+        return self
+
+    def merge(self, other):
+        self.counts += other.counts
+        self.underflow += other.underflow
+        self.overflow += other.overflow
+        return self
+
+    @property
+    def centers(self):
+        return (self.edges[:-1] + self.edges[1:]) / 2
+
+
+class PercentileBands:
+    """
+    Percentilová pásma po letech z řad (N, years) s konstantní pamětí (fan chart).
+
+    Dávka se jedním seřazením podél osy cest (np.sort(axis=0)) zredukuje na mřížku
+    levels kvantilů pro všechny roky najednou (lineární interpolace jako
+    np.percentile, každý bod nese váhu n / levels). Sloučené
+    mřížky se po překročení 2 * levels bodů znovu zhustí váženou interpolací,
+    také pro všechny roky jedním np.interp.
+    """
+
+    def __init__(self, years, levels=200):
+        self.years = int(years)
+        self.levels = levels
+        self.grid = (np.arange(levels) + 0.5) / levels
+        self.values = np.empty((0, self.years))
+        self.weights = np.empty(0)
+        self.min = np.full(self.years, np.inf)
+        self.max = np.full(self.years, -np.inf)
+
+    @property
+    def count(self):
+        return float(self.weights.sum())
+
+    def update(self, paths):
+        paths = np.asarray(paths, dtype=float)
+        if paths.shape[0]:
+            self.min = np.minimum(self.min, paths.min(axis=0))
+            self.max = np.maximum(self.max, paths.max(axis=0))
+            ordered = np.sort(paths, axis=0)
+            position = self.grid * (paths.shape[0] - 1)
+            low = np.floor(position).astype(np.int64)
+            high = np.minimum(low + 1, paths.shape[0] - 1)
+            fraction = (position - low)[:, None]
+            values = ordered[low] * (1 - fraction) + ordered[high] * fraction
+            self._absorb(values, np.full(self.levels, paths.shape[0] / self.levels))
+        return self
+
+    def merge(self, other):
+        if other.weights.size:
+            self.min = np.minimum(self.min, other.min)
+            self.max = np.maximum(self.max, other.max)
+            self._absorb(other.values, other.weights)
+        return self
+
+    def _absorb(self, values, weights):
+        self.values = np.concatenate([self.values, values])
+        self.weights = np.concatenate([self.weights, weights])
+        if self.weights.size > 2 * self.levels:
+            total = self.count
+            self.values = self._quantiles(self.grid)
+            self.weights = np.full(self.levels, total / self.levels)
+
+    def _quantiles(self, q):
+        """Vážené kvantily q (K,) pro všechny roky najednou -> pole (K, years)."""
+        order = np.argsort(self.values, axis=0, kind="stable")
+        values = np.take_along_axis(self.values, order, axis=0)
+        weights = self.weights[order]
+        cum = np.cumsum(weights, axis=0)
+        centers = (cum - weights / 2) / cum[-1]
+        # Rok y se posune na interval [2y, 2y + 1] -> jedno np.interp pro všechny roky
+        offset = 2.0 * np.arange(self.years)
+        xp = np.vstack([np.zeros(self.years), centers, np.ones(self.years)]) + offset
+        fp = np.vstack([self.min, values, self.max])
+        x = np.asarray(q, dtype=float)[:, None] + offset
+        out = np.interp(x.ravel(order="F"), xp.ravel(order="F"), fp.ravel(order="F"))
+        return out.reshape(x.shape, order="F")
+
+    def bands(self, percentiles=DEFAULT_BAND_PERCENTILES):
+        """Slovník {percentil: pole (years,)}."""
+        if not self.weights.size:
+            return {p: np.full(self.years, np.nan) for p in percentiles}
+        values = self._quantiles(np.asarray(percentiles, dtype=float) / 100)
+        return {p: values[i] for i, p in enumerate(percentiles)}
+
+
+class MonteCarloAggregator:
+    """
+    Souhrn Monte Carlo běhu s konstantní pamětí.
+
+    update() přijímá výsledek jedné dávky cest (slovník z simulate_paths),
+    merge() slučuje souhrny dávek (i z jiných procesů).
+
+    control_expected ({'irr': ..., 'etf_irr': ...}) zapne odhad průměru IRR
+    s kontrolní proměnnou; cesty pak musí obsahovat 'irr_control' ('etf_irr_control').
+    """
+
+    def __init__(self, holding_years, etf_comparison, irr_edges=DEFAULT_IRR_EDGES, control_expected=None):
+        self.holding_years = int(holding_years)
+        self.etf_comparison = etf_comparison
+        self.n_paths = 0
+        self.n_invalid_irr = 0
+        self.loss_count = 0
+        self.irr = OnlineMoments()
+        self.etf_irr = OnlineMoments()
+        self.total_profit = OnlineMoments()
+        self.irr_sketch = QuantileSketch()
+        self.etf_irr_sketch = QuantileSketch()
+        self.profit_sketch = QuantileSketch()
+        self.irr_hist = FixedHistogram(irr_edges)
+        self.etf_irr_hist = FixedHistogram(irr_edges)
+        self.equity_bands = PercentileBands(self.holding_years)
+        self.cashflow_bands = PercentileBands(self.holding_years)
+        self.etf_bands = PercentileBands(self.holding_years if etf_comparison else 0)
+        # Rizikové metriky (logic.risk) po cestách -> sketche a počty
+        self.negative_equity_count = 0
+        self.drawdown_sketch = QuantileSketch()
+        self.subsidy_sketch = QuantileSketch()
+        control_expected = control_expected or {}
+        self.irr_control = None
+        self.etf_irr_control = None
+        if "irr" in control_expected:
+            self.irr_control = ControlVariate(control_expected["irr"])
+        if etf_comparison and "etf_irr" in control_expected:
+            self.etf_irr_control = ControlVariate(control_expected["etf_irr"])
+
+    def update(self, paths):
+        irr = paths['irr']
+        self.n_paths += irr.size
+        self.n_invalid_irr += int((~paths['irr_valid']).sum())
+        self.loss_count += int((paths['total_profit'] < 0).sum())
+
+        self.irr.update(irr)
+        self.total_profit.update(paths['total_profit'])
+        self.irr_sketch.update(irr)
+        self.profit_sketch.update(paths['total_profit'])
+        self.irr_hist.update(irr)
+        if self.irr_control is not None:
+            self.irr_control.update(irr, paths['irr_control'])
+
+        if self.etf_comparison:
+            self.etf_irr.update(paths['etf_irr'])
+            self.etf_irr_sketch.update(paths['etf_irr'])
+            self.etf_irr_hist.update(paths['etf_irr'])
+            if self.etf_irr_control is not None:
+                self.etf_irr_control.update(paths['etf_irr'], paths['etf_irr_control'])
+
+        # Pásma po letech: uložené běhy nesou už odvozené řady, simulace surové
+        series = paths['series']
+        if 'equity' in series:
+            equity = series['equity']
+        else:
+            equity = series['property_values'] - series['mortgage_balances']
+        if 'cumulative_cashflow' in series:
+            cumulative_cashflow = series['cumulative_cashflow']
+        else:
+            cumulative_cashflow = np.cumsum(series['operating_cashflows'], axis=1)
+        self.equity_bands.update(equity)
+        self.cashflow_bands.update(cumulative_cashflow)
+        if self.etf_comparison:
+            self.etf_bands.update(series['etf_values'])
+
+        self.negative_equity_count += int(negative_equity(equity).sum())
+        self.drawdown_sketch.update(cashflow_drawdown(cumulative_cashflow))
+        self.subsidy_sketch.update(total_subsidies(cumulative_cashflow))
+        return self
+
+    def merge(self, other):
+        self.n_paths += other.n_paths
+        self.n_invalid_irr += other.n_invalid_irr
+        self.loss_count += other.loss_count
+        self.negative_equity_count += other.negative_equity_count
+        for name in ("drawdown_sketch", "subsidy_sketch", "irr", "etf_irr", "total_profit", "irr_sketch", "etf_irr_sketch",
+                     "profit_sketch", "irr_hist", "etf_irr_hist", "equity_bands", "cashflow_bands", "etf_bands"):
+            getattr(self, name).merge(getattr(other, name))
+        for name in ("irr_control", "etf_irr_control"):
+            if getattr(self, name) is not None:
+                getattr(self, name).merge(getattr(other, name))
+        return self
+
+    @property
+    def mean_irr(self):
+        """Průměrné IRR; s kontrolní proměnnou její upravený odhad."""
+        if self.irr_control is not None:
+            return self.irr_control.mean
+        return self.irr.mean
+
+    @property
+    def mean_etf_irr(self):
+        if not self.etf_comparison:
+            return np.nan
+        if self.etf_irr_control is not None:
+            return self.etf_irr_control.mean
+        return self.etf_irr.mean
+
+    def fan_bands(self, percentiles=DEFAULT_BAND_PERCENTILES):
+        """
+        Pásma po letech pro fan charty: vlastní kapitál (čisté jmění nemovitosti),
+        kumulované provozní cashflow a (při srovnání s ETF) hodnota ETF portfolia.
+        """
+        fans = {
+            "equity": self.equity_bands.bands(percentiles),
+            "cumulative_cashflow": self.cashflow_bands.bands(percentiles)
+        }
+        if self.etf_comparison:
+            fans["etf_values"] = self.etf_bands.bands(percentiles)
+        return fans
+
+    def risk_summary(self, confidence=DEFAULT_CONFIDENCE, liquidity_budget=None):
+        """
+        Rizikové metriky ze sketchů (stejné klíče jako logic.risk.risk_metrics).
+        CVaR je průměr kvantilové funkce zisku přes nejhorších (1 - confidence) scénářů.
+        """
+        tail = (np.arange(200) + 0.5) / 200 * (1 - confidence)
+        subsidies_over = np.nan
+        if liquidity_budget is not None and self.n_paths:
+            subsidies_over = float((1 - self.subsidy_sketch.cdf(liquidity_budget)) * 100)
+        return {
+            "confidence": confidence,
+            "var": float(-self.profit_sketch.quantile(1 - confidence)),
+            "cvar": float(-np.mean(self.profit_sketch.quantile(tail))),
+            "drawdown": float(self.drawdown_sketch.quantile(confidence)),
+            "max_drawdown": float(self.drawdown_sketch.max) if self.n_paths else np.nan,
+            "prob_negative_equity": self.negative_equity_count / self.n_paths * 100 if self.n_paths else np.nan,
+            "prob_subsidies_over_budget": subsidies_over,
+            "liquidity_budget": liquidity_budget
+        }
+
+    @property
+    def prob_loss(self):
+        return self.loss_count / self.n_paths if self.n_paths else np.nan
+
+    def box_stats(self, sketch):
+        """Kvartily a Tukeyho vousy (1.5 IQR) pro go.Box z kvantilového sketche."""
+        q1, median, q3 = sketch.quantile([0.25, 0.5, 0.75])
+        iqr = q3 - q1
+        return {
+            "q1": q1,
+            "median": median,
+            "q3": q3,
+            "lowerfence": max(sketch.min, q1 - 1.5 * iqr),
+            "upperfence": min(sketch.max, q3 + 1.5 * iqr)
+        }
+
+    def standard_errors(self):
+        """
+        Směrodatné chyby hlavních metrik (IRR v p.b., pravděpodobnost ztráty v p.b.).
+
+        Medián: sqrt(p(1-p)/n) / f(medián), hustota f odhadnutá ze sketche.
+        Pravděpodobnost ztráty: binomická chyba s korekcí (k+2)/(n+4),
+        aby 0 ztrát v malém vzorku neznamenalo nulovou nejistotu.
+        Průměr s kontrolní proměnnou: reziduální chyba sqrt(var (1 - rho^2) / n).
+        U antitetických a Sobolových cest předpoklad nezávislosti chybu
+        nadhodnocuje, odhad je tedy konzervativní.
+        """
+        n = self.irr.count
+        if n < 2:
+            return {"mean_irr": np.inf, "median_irr": np.inf, "prob_loss": np.inf}
+        q45, q55 = self.irr_sketch.quantile([0.45, 0.55])
+        inverse_density = (q55 - q45) / 0.10
+        p = (self.loss_count + 2) / (self.n_paths + 4)
+        return {
+            "mean_irr": self.irr_control.standard_error if self.irr_control is not None else self.irr.standard_error,
+            "median_irr": float(np.sqrt(0.25 / n) * inverse_density),
+            "prob_loss": float(np.sqrt(p * (1 - p) / self.n_paths) * 100)
+        }
+
+    def summary(self):
+        """Hlavní metriky pro zobrazení (IRR v %, pravděpodobnost v %)."""
+        return {
+            "n_paths": self.n_paths,
+            "mean_irr": self.mean_irr,
+            "mean_irr_raw": self.irr.mean,
+            "median_irr": float(self.irr_sketch.quantile(0.5)),
+            "std_irr": self.irr.std,
+            "prob_loss": self.prob_loss * 100,
+            "mean_total_profit": self.total_profit.mean,
+            "mean_etf_irr": self.mean_etf_irr,
+            "median_etf_irr": float(self.etf_irr_sketch.quantile(0.5)) if self.etf_comparison else np.nan,
+            "invalid_irr": self.n_invalid_irr
+        }
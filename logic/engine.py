@@ -0,0 +1,315 @@
+import numpy as np
+import numpy_financial as npf
+from logic.finance import build_amortization_schedule, build_variable_rate_schedule, deflator, irr_batch
+
+# --- BATCH ENGINE ---
+# Vektorizovaná verze calculate_metrics. Místo jednoho scénáře počítá N scénářů
+# najednou nad poli tvaru (N, years). Smyčka přes roky je nahrazena kumulativními
+# součiny/součty, takže cena za scénář je zlomek skalární verze.
+
+
+def _batch_size(*values):
+    """Zjistí počet scénářů N z vstupů (skaláry = 1, pole = první rozměr)."""
+    n = 1
+    for value in values:
+        arr = np.asarray(value)
+        if arr.ndim >= 1 and arr.shape[0] != 1:
+            if n != 1 and arr.shape[0] != n:
+                raise ValueError(f"Nekonzistentní počet scénářů: {n} vs {arr.shape[0]}")
+            n = arr.shape[0]
+    return n
+
+
+def _as_column(value, n):
+    """Skalár nebo (N,) -> (N, 1) float pole."""
+    arr = np.asarray(value, dtype=float)
+    if arr.ndim == 0:
+        return np.full((n, 1), float(arr))
+    return np.broadcast_to(arr.reshape(-1, 1), (n, 1)).astype(float)
+
+
+def _as_paths(value, n, years):
+    """
+    Skalár, (N,) nebo (N, k) -> (N, years).
+    Kratší řady se doplní poslední hodnotou (stejně jako get_rate ve skalární verzi).
+    Společnou roční řadu pro všechny scénáře lze předat jako (1, k).
+    """
+    arr = np.asarray(value, dtype=float)
+    if arr.ndim == 0:
+        return np.full((n, years), float(arr))
+    if arr.ndim == 1:
+        return np.broadcast_to(arr.reshape(-1, 1), (n, years)).astype(float)
+    if arr.shape[1] < years:
+        pad = np.repeat(arr[:, -1:], years - arr.shape[1], axis=1)
+        arr = np.concatenate([arr, pad], axis=1)
+    return np.broadcast_to(arr[:, :years], (n, years)).astype(float)
+
+
+def _guess_rate(guess_percent):
+    """Startovní IRR v % -> desetinná sazba pro irr_batch."""
+    if guess_percent is None:
+        return None
+    return np.asarray(guess_percent, dtype=float) / 100
+
+
+def calculate_metrics_batch(
+    purchase_price, down_payment, one_off_costs,
+    interest_rate, loan_term_years,
+    monthly_rent, monthly_expenses, vacancy_months, tax_rate,
+    appreciation_rate, rent_growth_rate, holding_period,
+    etf_comparison, etf_return, initial_fx_rate, fx_appreciation,
+    time_test_vars=None, sale_fee_percent=0.0, general_inflation_rate=None,
+    irr_guess=None, etf_irr_guess=None, fixation_years=1,
+    rented_months=None, extra_expenses=None, real_values=True
+):
+    """
+    Dávkový výpočet metrik pro N scénářů najednou.
+
+    Každý vstup může být skalár, pole (N,) (konstanta pro scénář) nebo u ročních
+    sazeb (appreciation_rate, rent_growth_rate, etf_return, fx_appreciation,
+    interest_rate) pole (N, years). U cesty interest_rate se splátka přepočte
+    při každé refixaci (každých fixation_years let) podle sazby k datu refixace
+    (build_variable_rate_schedule).
+    holding_period, etf_comparison a time_test_vars jsou společné pro celou dávku.
+
+    Stochastický provoz (logic.operations): rented_months (N, years) nahradí
+    12 - vacancy_months v jednotlivých letech, extra_expenses (N, years) jsou
+    mimořádné náklady (opravy) v cenách roku 0, indexované jako ostatní náklady.
+
+    Vrací stejné klíče jako calculate_metrics, ale jako NumPy pole:
+    skalární metriky mají tvar (N,), řady v 'series' tvar (N, years)
+    ('cashflows' a 'etf_cashflows' obsahují i rok 0). S real_values=False
+    se reálné (real_*) metriky a řady vynechají (Monte Carlo je nepotřebuje).
+
+    IRR se počítá dávkově (irr_batch); irr_guess/etf_irr_guess slouží jako
+    startovní bod (typicky deterministické IRR v %). Scénáře bez kořene mají
+    v 'irr'/'etf_irr' NaN a False v 'irr_valid'/'etf_irr_valid'.
+    """
+    if time_test_vars is None:
+        time_test_vars = {"enabled": True, "years": 10}
+
+    if general_inflation_rate is None:
+        # Stejné pravidlo jako ve skalární verzi: pro roční řady bezpečný default 2.0
+        if np.ndim(rent_growth_rate) >= 2:
+            general_inflation_rate = 2.0
+        else:
+            general_inflation_rate = rent_growth_rate
+
+    years = int(holding_period)
+    n = _batch_size(
+        purchase_price, down_payment, one_off_costs, interest_rate, loan_term_years,
+        monthly_rent, monthly_expenses, vacancy_months, tax_rate,
+        appreciation_rate, rent_growth_rate, etf_return,
+        initial_fx_rate, fx_appreciation, sale_fee_percent, general_inflation_rate
+    )
+
+    price = _as_column(purchase_price, n)
+    down = _as_column(down_payment, n)
+    one_off = _as_column(one_off_costs, n)
+    term = _as_column(loan_term_years, n)
+    rent = _as_column(monthly_rent, n)
+    expenses = _as_column(monthly_expenses, n)
+    vacancy = _as_column(vacancy_months, n)
+    tax = _as_column(tax_rate, n) / 100
+    sale_fee = _as_column(sale_fee_percent, n) / 100
+    fx0 = _as_column(initial_fx_rate, n)
+
+    app_paths = _as_paths(appreciation_rate, n, years)
+    rent_paths = _as_paths(rent_growth_rate, n, years)
+
+    year_idx = np.arange(1, years + 1)
+
+    # 1. Financování (splátkový kalendář pro celou dávku najednou)
+    mortgage_amount = np.maximum(0, price - down)
+    if np.ndim(interest_rate) >= 2:
+        rate_paths = _as_paths(interest_rate, n, years)
+        schedule = build_variable_rate_schedule(mortgage_amount[:, 0], rate_paths, term[:, 0], years, fixation_years)
+        annual_mortgage_payment = schedule['monthly_payment'] * 12
+    else:
+        rate = _as_column(interest_rate, n)
+        schedule = build_amortization_schedule(mortgage_amount[:, 0], rate[:, 0], term[:, 0], years)
+        annual_mortgage_payment = schedule['monthly_payment'][:, None] * 12
+    balances = schedule['balances']
+
+    # 2. Provoz
+    annual_gross_rent = rent * (12 - vacancy)
+    annual_expenses_total = expenses * 12
+    annual_cashflow_year1 = annual_gross_rent - annual_mortgage_payment[:, :1] - annual_expenses_total
+    initial_investment = down + one_off
+
+    property_values = price * np.cumprod(1 + app_paths / 100, axis=1)
+    rent_index = np.cumprod(1 + rent_paths / 100, axis=1)
+    if rented_months is None:
+        gross_rents = annual_gross_rent * rent_index
+    else:
+        gross_rents = rent * _as_paths(rented_months, n, years) * rent_index
+    expense_path = annual_expenses_total * rent_index
+    if extra_expenses is not None:
+        expense_path = expense_path + _as_paths(extra_expenses, n, years) * rent_index
+
+    # 3. Daň z příjmu (daňový štít ze skutečně zaplacených úroků)
+    taxable_income = gross_rents - expense_path - schedule['interest']
+    tax_paid = np.maximum(0, taxable_income * tax)
+
+    operating_cashflows = gross_rents - annual_mortgage_payment - expense_path - tax_paid
+    cashflows = np.concatenate([-initial_investment, operating_cashflows], axis=1)
+
+    # 4. ETF
+    if etf_comparison:
+        etf_paths = _as_paths(etf_return, n, years)
+        fx_path = fx0 * np.cumprod(1 + _as_paths(fx_appreciation, n, years) / 100, axis=1)
+        contributions = np.where(operating_cashflows < 0, -operating_cashflows, 0.0)
+        growth = np.cumprod(1 + etf_paths / 100, axis=1)
+        # e_t = G_t * (e_0 + sum_{s<=t} c_s / fx_s / G_s)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            discounted = np.cumsum(contributions / fx_path / growth, axis=1)
+        etf_balance_eur = growth * (initial_investment / fx0 + discounted)
+        etf_values = etf_balance_eur * fx_path
+        etf_cashflows = np.concatenate([-initial_investment, -contributions], axis=1)
+    else:
+        etf_values = np.zeros((n, 0))
+        etf_cashflows = -initial_investment.copy()
+
+    # 5. Prodej a daň z kapitálového zisku
+    sale_price = property_values[:, -1:]
+    sale_costs = sale_price * sale_fee
+    taxable_gain = sale_price - price - one_off - sale_costs
+    is_exempt = bool(time_test_vars['enabled']) and years > time_test_vars['years']
+    if is_exempt:
+        capital_gains_tax = np.zeros_like(taxable_gain)
+    else:
+        capital_gains_tax = np.where(taxable_gain > 0, taxable_gain * tax, 0.0)
+
+    net_proceeds = sale_price - balances[:, -1:] - sale_costs - capital_gains_tax
+    cashflows[:, -1:] += net_proceeds
+    total_profit = cashflows.sum(axis=1)
+    irr = irr_batch(cashflows, guess=_guess_rate(irr_guess)) * 100
+
+    etf_irr = np.zeros(n)
+    if etf_comparison:
+        etf_cashflows[:, -1:] += etf_values[:, -1:]
+        etf_irr = irr_batch(etf_cashflows, guess=_guess_rate(etf_irr_guess)) * 100
+
+    result = {
+        "irr": irr,
+        "total_profit": total_profit,
+        "etf_irr": etf_irr,
+        "irr_valid": ~np.isnan(irr),
+        "etf_irr_valid": ~np.isnan(etf_irr),
+        "monthly_cashflow_y1": annual_cashflow_year1[:, 0] / 12,
+        "tax_paid_y1": tax_paid[:, 0],
+        "capital_gains_tax": capital_gains_tax[:, 0],
+        "initial_investment": initial_investment[:, 0],
+        "initial_mortgage": mortgage_amount[:, 0],
+        "series": {
+            "property_values": property_values,
+            "mortgage_balances": balances,
+            "operating_cashflows": operating_cashflows,
+            "cashflows": cashflows,
+            "etf_values": etf_values,
+            "etf_cashflows": etf_cashflows
+        }
+    }
+    if not real_values:
+        return result
+
+    # 6. Reálné hodnoty (společná inflace -> sdílená tabulka deflátoru)
+    inflation = _as_column(general_inflation_rate, n)
+    if np.ndim(general_inflation_rate) == 0:
+        deflator_row = deflator(general_inflation_rate, years)[None, 1:]
+    else:
+        deflator_row = (1 + inflation / 100) ** year_idx
+    real_cashflows = np.concatenate([cashflows[:, :1], cashflows[:, 1:] / deflator_row], axis=1)
+    result.update({
+        "real_total_profit": real_cashflows.sum(axis=1),
+        "real_monthly_cashflow_y1": (annual_cashflow_year1[:, 0] / 12) / (1 + inflation[:, 0] / 100)
+    })
+    result["series"].update({
+        "real_cashflows": real_cashflows,
+        "real_property_values": property_values / deflator_row,
+        "real_mortgage_balances": balances / deflator_row,
+        "real_operating_cashflows": operating_cashflows / deflator_row,
+        "real_etf_values": etf_values / deflator_row if etf_comparison else np.zeros((n, years))
+    })
+    return result
+
+
+def calculate_holding_period_curve(
+    purchase_price, down_payment, one_off_costs,
+    interest_rate, loan_term_years,
+    monthly_rent, monthly_expenses, vacancy_months, tax_rate,
+    appreciation_rate, rent_growth_rate, max_holding_period,
+    time_test_vars=None, sale_fee_percent=0.0
+):
+    """
+    IRR, čistý výnos z prodeje a celkový zisk pro každý rok exitu 1..max_holding_period.
+
+    Provoz do roku H je stejný pro všechny roky exitu, liší se jen prodej v posledním
+    roce. Proto se horizont nasimuluje jednou a pro každý rok H se k prefixu cashflow
+    přičte vektorizovaně spočtený prodej (poplatek, daň z kapitálového zisku dle
+    časového testu). Vstupy jako u calculate_metrics_batch (skaláry nebo pole (N,)).
+
+    Vrací pole tvaru (N, max_holding_period), sloupec j odpovídá držení j+1 let.
+    """
+    if time_test_vars is None:
+        time_test_vars = {"enabled": True, "years": 10}
+
+    years = int(max_holding_period)
+    base = calculate_metrics_batch(
+        purchase_price=purchase_price,
+        down_payment=down_payment,
+        one_off_costs=one_off_costs,
+        interest_rate=interest_rate,
+        loan_term_years=loan_term_years,
+        monthly_rent=monthly_rent,
+        monthly_expenses=monthly_expenses,
+        vacancy_months=vacancy_months,
+        tax_rate=tax_rate,
+        appreciation_rate=appreciation_rate,
+        rent_growth_rate=rent_growth_rate,
+        holding_period=years,
+        etf_comparison=False,
+        etf_return=0,
+        initial_fx_rate=25,
+        fx_appreciation=0,
+        time_test_vars=time_test_vars,
+        sale_fee_percent=sale_fee_percent,
+        real_values=False
+    )
+    series = base['series']
+    n = series['property_values'].shape[0]
+    holding_periods = np.arange(1, years + 1)
+
+    price = _as_column(purchase_price, n)
+    one_off = _as_column(one_off_costs, n)
+    tax = _as_column(tax_rate, n) / 100
+    sale_fee = _as_column(sale_fee_percent, n) / 100
+
+    # Prodej v každém možném roce exitu
+    sale_price = series['property_values']
+    sale_costs = sale_price * sale_fee
+    taxable_gain = sale_price - price - one_off - sale_costs
+    exempt = np.zeros(years, dtype=bool)
+    if time_test_vars['enabled']:
+        exempt = holding_periods > time_test_vars['years']
+    capital_gains_tax = np.where((taxable_gain > 0) & ~exempt, taxable_gain * tax, 0.0)
+    net_proceeds = sale_price - series['mortgage_balances'] - sale_costs - capital_gains_tax
+
+    # Prefixová cashflow: řádek pro exit v roce H má roky 0..H, dále nuly
+    # (nulová cashflow na konci nemění NPV, a tedy ani IRR)
+    operating = np.concatenate([base['series']['cashflows'][:, :1], series['operating_cashflows']], axis=1)
+    prefix_mask = np.arange(years + 1)[None, :] <= holding_periods[:, None]
+    exit_cashflows = np.where(prefix_mask[None, :, :], operating[:, None, :], 0.0)
+    exit_cashflows[:, holding_periods - 1, holding_periods] += net_proceeds
+
+    irr = irr_batch(exit_cashflows.reshape(n * years, years + 1)).reshape(n, years) * 100
+    total_profit = np.cumsum(operating, axis=1)[:, 1:] + net_proceeds
+
+    return {
+        "holding_periods": holding_periods,
+        "irr": irr,
+        "irr_valid": ~np.isnan(irr),
+        "net_proceeds": net_proceeds,
+        "total_profit": total_profit,
+        "capital_gains_tax": capital_gains_tax
+    }
@@ -1,16 +1,35 @@
+from functools import lru_cache
 import numpy_financial as npf
+import numpy as np
 
 def calculate_mortgage_payment(loan_amount, annual_rate, years):
-    """Vypočítá měsíční splátku hypotéky."""
-    if loan_amount <= 0:
+    """Vypočítá měsíční splátku hypotéky (vstupy mohou být i pole (N,) pro dávku úvěrů)."""
+    if np.ndim(loan_amount) == 0 and loan_amount <= 0:
         return 0, 0
     
     monthly_rate = (annual_rate / 100) / 12
     num_payments = years * 12
     
     monthly_payment = npf.pmt(monthly_rate, num_payments, -loan_amount)
+    if np.ndim(loan_amount):
+        has_loan = np.asarray(loan_amount) > 0
+        return np.where(has_loan, monthly_payment, 0.0), np.where(has_loan, monthly_rate, 0.0)
     return monthly_payment, monthly_rate
 
+@lru_cache(maxsize=256)
+def _deflator_table(inflation_rate, horizon_years):
+    table = (1 + inflation_rate / 100) ** np.arange(horizon_years + 1)
+    table.flags.writeable = False
+    return table
+
+def deflator(inflation_rate, horizon_years):
+    """
+    Cenový index (1 + inflace)^t pro roky t = 0..horizon_years. Reálná hodnota
+    roku t = nominální / deflator[t]. Tabulka se počítá jednou pro každou dvojici
+    (inflace, horizont) a sdílí se (pole jen pro čtení).
+    """
+    return _deflator_table(float(inflation_rate), int(horizon_years))
+
 def update_remaining_balance(current_balance, monthly_rate, monthly_payment):
     """Vypočítá zůstatek hypotéky po roce splácení (zjednodušená FV metoda po měsících)."""
     if current_balance <= 0:
@@ -18,3 +37,256 @@ def update_remaining_balance(current_balance, monthly_rate, monthly_payment):
     # 12 měsíců splácení
     balance = npf.fv(monthly_rate, 12, monthly_payment, -current_balance)
     return max(0, balance)
+
+def build_amortization_schedule(loan_amount, annual_rate, years, horizon_years, monthly=False):
+    """
+    Splátkový kalendář anuitní hypotéky v uzavřeném tvaru (bez smyčky po měsících).
+
+    Vstupy mohou být skaláry nebo pole (N,) pro dávku úvěrů. Roční řady mají
+    tvar (horizon_years,) resp. (N, horizon_years):
+      - balances: zůstatek na konci roku
+      - interest: skutečně zaplacené úroky v roce (součet měsíčních úroků)
+      - principal: splacená jistina v roce
+      - payments: zaplacené splátky v roce (po doplacení úvěru 0)
+    S monthly=True vrací i měsíční řady (poslední osa jsou měsíce):
+      - monthly_balances: zůstatky po měsících 0..12*H
+      - monthly_interest: úrok v měsících 1..12*H (zůstatek na začátku měsíce * r)
+      - monthly_principal: splacená jistina v měsících 1..12*H (rozdíl zůstatků)
+    """
+    loan = np.asarray(loan_amount, dtype=float)[..., None]
+    rate = np.asarray(annual_rate, dtype=float)[..., None]
+    term_months = np.asarray(years, dtype=float)[..., None] * 12
+    loan, rate, term_months = np.broadcast_arrays(loan, rate, term_months)
+
+    has_loan = loan > 0
+    monthly_rate = np.where(has_loan, rate / 100 / 12, 0.0)
+    monthly_payment = np.where(has_loan, npf.pmt(monthly_rate, term_months, -loan), 0.0)
+
+    def balance_after(months):
+        # B_m = B_0 (1+r)^m - P ((1+r)^m - 1) / r, pro r = 0: B_0 - P m
+        growth = (1 + monthly_rate) ** months
+        with np.errstate(divide="ignore", invalid="ignore"):
+            annuity = np.where(monthly_rate > 0, (growth - 1) / monthly_rate, months)
+        balance = loan * growth - monthly_payment * annuity
+        return np.where(has_loan & (months < term_months), np.maximum(0, balance), 0.0)
+
+    year_ends = np.arange(1, int(horizon_years) + 1) * 12
+    balances = balance_after(year_ends)
+    start_balances = np.concatenate([loan, balances[..., :-1]], axis=-1)
+
+    # Počet splátek v roce (poslední rok splácení může být neúplný)
+    active_months = np.clip(term_months - (year_ends - 12), 0, 12)
+    payments = monthly_payment * active_months
+    principal = start_balances - balances
+    interest = np.maximum(0, payments - principal)
+
+    schedule = {
+        "monthly_payment": monthly_payment[..., 0],
+        "monthly_rate": monthly_rate[..., 0],
+        "balances": balances,
+        "interest": interest,
+        "principal": principal,
+        "payments": payments
+    }
+    if monthly:
+        monthly_balances = balance_after(np.arange(0, int(horizon_years) * 12 + 1))
+        schedule["monthly_balances"] = monthly_balances
+        schedule["monthly_interest"] = monthly_balances[..., :-1] * monthly_rate
+        schedule["monthly_principal"] = monthly_balances[..., :-1] - monthly_balances[..., 1:]
+    return schedule
+
+def build_variable_rate_schedule(loan_amount, rate_paths, years, horizon_years, fixation_years=1):
+    """
+    Splátkový kalendář s refixací sazby podle cesty (N, horizon_years) v % p.a.
+
+    Na začátku každého fixačního období (roky 0, k, 2k, ... pro fixation_years=k)
+    se splátka přepočte přes calculate_mortgage_payment ze zbývající jistiny,
+    zbývající splatnosti a sazby platné k datu refixace; po celé fixační období
+    pak platí tato sazba i splátka (v rámci roku uzavřený tvar jako
+    v build_amortization_schedule). Záporné sazby se zaokrouhlí na nulu.
+    Vrací stejné klíče jako build_amortization_schedule, 'monthly_payment'
+    a 'monthly_rate' mají ale tvar (N, horizon_years) (hodnoty platné v daném roce).
+    """
+    horizon = int(horizon_years)
+    fixation = max(1, int(fixation_years))
+    rates = np.maximum(np.asarray(rate_paths, dtype=float), 0.0)
+    n = rates.shape[0]
+    loan = np.broadcast_to(np.asarray(loan_amount, dtype=float), (n,)).astype(float)
+    balance = loan
+    term_months = np.broadcast_to(np.asarray(years, dtype=float), (n,)) * 12
+
+    # Sazba platná v roce = sazba k poslednímu datu refixace
+    reset_years = np.arange(horizon) - np.arange(horizon) % fixation
+    applied_rates = rates[:, reset_years]
+
+    monthly_payment = np.zeros((n, horizon))
+    balances = np.zeros((n, horizon))
+    payments = np.zeros((n, horizon))
+    payment = np.zeros(n)
+    for year in range(horizon):
+        remaining = term_months - 12 * year
+        active = (remaining > 0) & (balance > 0)
+        monthly_rate = applied_rates[:, year] / 100 / 12
+        if year % fixation == 0:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                new_payment, _ = calculate_mortgage_payment(balance, applied_rates[:, year], np.maximum(remaining, 1) / 12)
+            payment = np.where(active, new_payment, payment)
+
+        months = np.clip(remaining, 0, 12)
+        growth = (1 + monthly_rate) ** months
+        with np.errstate(divide="ignore", invalid="ignore"):
+            annuity = np.where(monthly_rate > 0, (growth - 1) / monthly_rate, months)
+        end_balance = np.where(active & (months < remaining), np.maximum(0, balance * growth - payment * annuity), 0.0)
+
+        monthly_payment[:, year] = payment
+        payments[:, year] = np.where(active, payment * months, 0.0)
+        balances[:, year] = end_balance
+        balance = end_balance
+
+    start_balances = np.concatenate([loan[:, None], balances[:, :-1]], axis=1)
+    principal = start_balances - balances
+    interest = np.maximum(0, payments - principal)
+    return {
+        "monthly_payment": monthly_payment,
+        "monthly_rate": applied_rates / 100 / 12,
+        "balances": balances,
+        "interest": interest,
+        "principal": principal,
+        "payments": payments
+    }
+
+# Sazby, na kterých se hledá změna znaménka NPV, pokud Halleyho iterace selže
+_IRR_BRACKET_GRID = np.array([
+    -0.99, -0.9, -0.75, -0.5, -0.3, -0.2, -0.1, -0.05, 0.0,
+    0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0, 5.0, 10.0
+])
+
+def _npv_rows(cashflows, rates):
+    """NPV každého řádku (N, T+1) při sazbách (N,) nebo (N, K)."""
+    t = np.arange(cashflows.shape[1])
+    if rates.ndim == 1:
+        return (cashflows * (1 + rates[:, None]) ** -t).sum(axis=1)
+    disc = (1 + rates[:, :, None]) ** -t
+    return (cashflows[:, None, :] * disc).sum(axis=2)
+
+def _sign_changes(cf):
+    """Počet změn znaménka v každém řádku (nuly se přeskakují)."""
+    signs = np.sign(cf)
+    # Nulu nahradí poslední nenulové znaménko před ní
+    last_nonzero = np.where(signs != 0, np.arange(cf.shape[1]), 0)
+    np.maximum.accumulate(last_nonzero, axis=1, out=last_nonzero)
+    filled = np.take_along_axis(signs, last_nonzero, axis=1)
+    return (filled[:, 1:] * filled[:, :-1] < 0).sum(axis=1)
+
+def _irr_polynomial_rows(cf):
+    """
+    IRR pravidlem npf.irr: reálné kladné kořeny polynomu sum_t cf[t] x^t
+    v x = 1 / (1 + r) (vlastní čísla doprovodné matice jako np.roots), z nich
+    sazba s nejmenší |r|; bez takového kořene NaN. Řádky se stejným rozsahem
+    nenulových cashflow se řeší jedním dávkovým voláním np.linalg.eigvals.
+    """
+    rates = np.full(cf.shape[0], np.nan)
+    nonzero = cf != 0
+    first = np.argmax(nonzero, axis=1)
+    last = cf.shape[1] - 1 - np.argmax(nonzero[:, ::-1], axis=1)
+    # Nuly na začátku dávají kořeny x = 0 (npf.irr je vyřadí), nuly na konci snižují stupeň
+    for lo, hi in set(zip(first.tolist(), last.tolist())):
+        degree = hi - lo
+        if degree == 0:
+            continue
+        rows = np.flatnonzero((first == lo) & (last == hi))
+        coeffs = cf[rows, lo:hi + 1][:, ::-1]
+        companion = np.zeros((rows.size, degree, degree))
+        companion[:, 0, :] = -coeffs[:, 1:] / coeffs[:, :1]
+        companion[:, np.arange(1, degree), np.arange(degree - 1)] = 1
+        roots = np.linalg.eigvals(companion)
+        valid = (roots.imag == 0) & (roots.real > 0)
+        with np.errstate(divide="ignore"):
+            candidates = np.where(valid, 1 / np.where(valid, roots.real, 1) - 1, np.inf)
+        chosen = candidates[np.arange(rows.size), np.argmin(np.abs(candidates), axis=1)]
+        rates[rows] = np.where(np.isfinite(chosen), chosen, np.nan)
+    return rates
+
+def irr_batch(cashflows, guess=None, tol=1e-10, max_iter=50, bisect_iter=100):
+    """
+    Vektorizované IRR pro matici cashflow (N, T+1) (rok 0 v prvním sloupci).
+
+    Řádek s jedinou změnou znaménka má jediný kořen s r > -100 % (Descartes):
+    1. Halleyho iterace ze startovní sazby `guess` (např. deterministické IRR).
+    2. Řádky, které nezkonvergovaly, se řeší bisekcí na intervalu se změnou
+       znaménka NPV nejblíže nule (sazby -99 % až 1000 %).
+    Řádky s více změnami znaménka mohou mít víc kořenů; vybírá se stejně jako
+    npf.irr kořen s nejmenší |r| (z kořenů polynomu, viz _irr_polynomial_rows).
+
+    Vrací pole sazeb (N,) jako desetinné číslo (0.05 = 5 %).
+    Řádky bez kořene (např. všechna cashflow stejného znaménka) mají NaN.
+    """
+    cf = np.atleast_2d(np.asarray(cashflows, dtype=float))
+    n = cf.shape[0]
+    t = np.arange(cf.shape[1])
+
+    rates = np.full(n, np.nan)
+    has_root = (cf > 0).any(axis=1) & (cf < 0).any(axis=1)
+    multi_root = has_root & (_sign_changes(cf) > 1)
+    if multi_root.any():
+        rates[multi_root] = _irr_polynomial_rows(cf[multi_root])
+
+    r = np.broadcast_to(np.asarray(0.05 if guess is None else guess, dtype=float), (n,)).copy()
+    r = np.where(np.isfinite(r) & (r > -0.99), r, 0.05)
+    active = has_root & ~multi_root
+
+    # 1. Halley
+    with np.errstate(over="ignore", invalid="ignore", divide="ignore"):
+        for _ in range(max_iter):
+            if not active.any():
+                break
+            idx = np.flatnonzero(active)
+            c = cf[idx]
+            v = 1 / (1 + r[idx])
+            disc = v[:, None] ** t
+            f = (c * disc).sum(axis=1)
+            df = -(t * c * disc).sum(axis=1) * v
+            d2f = (t * (t + 1) * c * disc).sum(axis=1) * v * v
+
+            newton = f / df
+            step = newton / (1 - newton * d2f / (2 * df))
+            step = np.where(np.isfinite(step), step, newton)
+            r_new = r[idx] - step
+            # Sazba musí zůstat nad -100 %
+            r_new = np.where(r_new <= -1, (r[idx] - 1) / 2, r_new)
+
+            bad = ~np.isfinite(r_new)
+            conv = ~bad & (np.abs(step) < tol * (1 + np.abs(r_new)))
+
+            r[idx] = np.where(bad, r[idx], r_new)
+            rates[idx[conv]] = r_new[conv]
+            active[idx[conv | bad]] = False
+
+    # 2. Bisekce pro řádky, kde Halley selhal
+    fallback = has_root & ~multi_root & np.isnan(rates)
+    if fallback.any():
+        idx = np.flatnonzero(fallback)
+        c = cf[idx]
+        grid = np.broadcast_to(_IRR_BRACKET_GRID, (idx.size, _IRR_BRACKET_GRID.size))
+        with np.errstate(over="ignore", invalid="ignore"):
+            npv = _npv_rows(c, grid)
+        sign_change = np.sign(npv[:, :-1]) * np.sign(npv[:, 1:]) <= 0
+        lo_grid, hi_grid = _IRR_BRACKET_GRID[:-1], _IRR_BRACKET_GRID[1:]
+        distance = np.where((lo_grid <= 0) & (hi_grid >= 0), 0.0, np.minimum(np.abs(lo_grid), np.abs(hi_grid)))
+        distance = np.where(sign_change, distance, np.inf)
+        bracket = np.argmin(distance, axis=1)
+        found = np.isfinite(distance[np.arange(idx.size), bracket])
+
+        lo = lo_grid[bracket]
+        hi = hi_grid[bracket]
+        f_lo = npv[np.arange(idx.size), bracket]
+        for _ in range(bisect_iter):
+            mid = (lo + hi) / 2
+            f_mid = _npv_rows(c, mid)
+            left = np.sign(f_mid) == np.sign(f_lo)
+            lo = np.where(left, mid, lo)
+            f_lo = np.where(left, f_mid, f_lo)
+            hi = np.where(left, hi, mid)
+        rates[idx[found]] = ((lo + hi) / 2)[found]
+
+    return rates
@@ -0,0 +1,124 @@
+import hashlib
+import os
+from functools import lru_cache
+import numpy as np
+
+# --- HISTORICKÝ BLOKOVÝ BOOTSTRAP ---
+# Scénáře z historických ročních výnosů (např. index cen nemovitostí, MSCI World,
+# kurz CZK/EUR). Data se čtou z CSV/NPY přes np.memmap (CSV se jednou převede na
+# .npy do vlastní cache, nikdy vedle zdrojového souboru), takže start nic nestojí
+# a čtou se jen použité řádky. Cesty zadané v UI musí ležet v HISTORY_DIR.
+# Převzorkovávají se souvislé bloky let se společnými indexy pro všechny sloupce,
+# čímž se zachová shlukování špatných let i vzájemná závislost trhů.
+
+# Výchozí délka bloku v letech
+DEFAULT_BLOCK_SIZE = 5
+# Adresář pro nahraná historická data (CSV/NPY pro blokový bootstrap)
+HISTORY_DIR = "data"
+# Adresář pro CSV převedená na .npy
+CONVERTED_DIR = os.path.join(".cache", "history")
+
+
+def resolve_history_path(path, root=HISTORY_DIR):
+    """
+    Absolutní cesta k souboru s historickými daty zadaná uživatelem.
+
+    Cesta se vyřeší včetně symbolických odkazů a '..'; mimo adresář root
+    vyhodí ValueError (UI nesmí otevřít libovolný soubor na serveru).
+    """
+    root = os.path.realpath(root)
+    resolved = os.path.realpath(path)
+    if resolved == root or os.path.commonpath([root, resolved]) != root:
+        raise ValueError(f"Soubor s historickými daty musí být v adresáři {root}.")
+    return resolved
+
+
+def _converted_path(csv_path):
+    """Cesta k .npy převodu CSV v CONVERTED_DIR (jméno podle hashe absolutní cesty zdroje)."""
+    digest = hashlib.sha256(csv_path.encode("utf-8")).hexdigest()[:16]
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(CONVERTED_DIR, f"{name}-{digest}.npy")
+
+
+def _csv_to_npy(csv_path, npy_path):
+    """Převede CSV s hlavičkou na strukturované .npy (sloupce = pojmenovaná pole)."""
+    data = np.genfromtxt(csv_path, delimiter=",", names=True, dtype=float, encoding="utf-8")
+    if data.dtype.names is None or data.size == 0:
+        raise ValueError(f"Soubor {csv_path} neobsahuje hlavičku nebo data.")
+    np.save(npy_path, np.atleast_1d(data))
+
+
+@lru_cache(maxsize=16)
+def _open_history(path, modified):
+    if path.lower().endswith(".csv"):
+        npy_path = _converted_path(path)
+        if not os.path.exists(npy_path) or os.path.getmtime(npy_path) < modified:
+            os.makedirs(os.path.dirname(npy_path), exist_ok=True)
+            _csv_to_npy(path, npy_path)
+        path = npy_path
+    return np.load(path, mmap_mode="r")
+
+
+def load_history(path):
+    """
+    Historická data jako strukturovaný np.memmap (jedno pole na sloupec, řádek = rok).
+
+    CSV: první řádek hlavička (např. year,property,msci_world,czk_eur), hodnoty
+    ročních výnosů v % p.a. NPY: strukturované pole se stejným významem.
+    Otevřené soubory se drží v cache podle cesty a času poslední změny.
+    """
+    path = os.path.abspath(path)
+    if not os.path.exists(path):
+        raise ValueError(f"Soubor s historickými daty neexistuje: {path}")
+    history = _open_history(path, os.path.getmtime(path))
+    if history.dtype.names is None:
+        raise ValueError("Historická data musí mít pojmenované sloupce.")
+    return history
+
+
+def history_columns(path):
+    """Názvy sloupců historického souboru."""
+    return list(load_history(path).dtype.names)
+
+
+def history_means(path, columns):
+    """Průměrné roční výnosy vybraných sloupců (= střední hodnota kruhového bootstrapu)."""
+    history = load_history(path)
+    return np.array([float(np.mean(history[column])) for column in columns])
+
+
+def block_bootstrap_indices(rng, n_paths, holding_years, n_history, block_size=DEFAULT_BLOCK_SIZE):
+    """
+    Indexy historických let (N, years) pro kruhový blokový bootstrap.
+
+    Každá cesta je složená z bloků block_size po sobě jdoucích let s náhodným
+    začátkem; blok přes konec historie pokračuje od začátku (kruhově), takže
+    každý rok historie má stejnou pravděpodobnost a střední hodnota scénářů
+    je přesně průměr historie.
+    """
+    if n_history < 1:
+        raise ValueError("Historická data jsou prázdná.")
+    block_size = int(min(max(1, block_size), n_history))
+    n_blocks = -(-int(holding_years) // block_size)
+    starts = rng.integers(0, n_history, size=(n_paths, n_blocks))
+    idx = (starts[:, :, None] + np.arange(block_size)) % n_history
+    return idx.reshape(n_paths, n_blocks * block_size)[:, :holding_years]
+
+
+def bootstrap_paths(rng, n_paths, holding_years, path, columns, block_size=DEFAULT_BLOCK_SIZE):
+    """
+    Roční výnosy vybraných sloupců jako tenzor (N, years, len(columns)) v % p.a.
+
+    Všechny sloupce používají stejné indexy let (stejný historický rok napříč trhy).
+    """
+    history = load_history(path)
+    missing = [column for column in columns if column not in history.dtype.names]
+    if missing:
+        raise ValueError(f"Historická data neobsahují sloupce: {', '.join(missing)}")
+    idx = block_bootstrap_indices(rng, n_paths, holding_years, history.shape[0], block_size)
+    out = np.empty((n_paths, int(holding_years), len(columns)))
+    for i, column in enumerate(columns):
+        out[:, :, i] = np.asarray(history[column])[idx]
+    if not np.all(np.isfinite(out)):
+        raise ValueError("Historická data obsahují chybějící hodnoty.")
+    return out
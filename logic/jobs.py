@@ -0,0 +1,134 @@
+import copy
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# --- ÚLOHY NA POZADÍ ---
+# Dlouhé výpočty (Monte Carlo) běží ve vlákně mimo skript Streamlitu, takže
+# stránka zůstává ovladatelná. Výpočet hlásí po dávkách průběh přes callback
+# progress(aggregator, fraction); úloha si drží kopii posledního souhrnu
+# (částečné výsledky) a při zrušení vyhodí z callbacku JobCancelled.
+
+# Stavy úlohy
+QUEUED, RUNNING, DONE, CANCELLED, FAILED = "queued", "running", "done", "cancelled", "failed"
+FINISHED_STATES = (DONE, CANCELLED, FAILED)
+
+# Kolik úloh může počítat současně (ostatní čekají ve frontě)
+DEFAULT_MAX_JOBS = 2
+# Kolik dokončených úloh se drží pro zobrazení výsledku
+DEFAULT_KEEP_FINISHED = 50
+
+
+class JobCancelled(Exception):
+    """Vyhozena z progress callbacku zrušené úlohy (kooperativní zrušení)."""
+
+
+class Job:
+    """
+    Jedna úloha na pozadí: stav, průběh 0..1, částečný a konečný výsledek.
+
+    Výpočet dostane jako parametr progress callback; ten uloží kopii souhrnu
+    (partial) a u zrušené úlohy vyhodí JobCancelled, takže se výpočet ukončí
+    na hranici nejbližší dávky.
+    """
+
+    def __init__(self, job_id, label=""):
+        self.id = job_id
+        self.label = label
+        self.status = QUEUED
+        self.progress = 0.0
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+        self._partial = None
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+        self._future = None
+
+    @property
+    def done(self):
+        return self.status in FINISHED_STATES
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def cancel(self):
+        """Požádá o zrušení; čekající úloha se vůbec nespustí."""
+        self._cancel.set()
+        if self._future is not None and self._future.cancel():
+            self._finish(CANCELLED)
+
+    def partial(self):
+        """Poslední hlášený souhrn (kopie z konce dávky), nebo None."""
+        with self._lock:
+            return self._partial
+
+    def report(self, aggregator, fraction):
+        """Progress callback výpočtu (volá se z vlákna úlohy po každé dávce)."""
+        snapshot = copy.deepcopy(aggregator)
+        with self._lock:
+            self._partial = snapshot
+            self.progress = float(fraction)
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def _finish(self, status, result=None, error=None):
+        self.result = result
+        self.error = error
+        self.finished = time.time()
+        self.status = status
+
+    def _run(self, fn, args, kwargs):
+        if self._cancel.is_set():
+            self._finish(CANCELLED)
+            return
+        self.status = RUNNING
+        try:
+            result = fn(*args, progress=self.report, **kwargs)
+        except JobCancelled:
+            self._finish(CANCELLED)
+        except Exception as e:  # chyba výpočtu se zobrazí uživateli, vlákno žije dál
+            self._finish(FAILED, error=e)
+        else:
+            self.progress = 1.0
+            self._finish(DONE, result=result)
+
+
+class JobManager:
+    """
+    Fronta úloh společná pro celý proces (všechny relace Streamlitu).
+
+    submit(fn, *args, **kwargs) spustí fn(*args, progress=..., **kwargs) ve vlákně
+    a vrátí Job; relace si drží jen job.id a úlohu si vyzvedne přes get().
+    """
+
+    def __init__(self, max_jobs=DEFAULT_MAX_JOBS, keep_finished=DEFAULT_KEEP_FINISHED):
+        self.keep_finished = keep_finished
+        self._executor = ThreadPoolExecutor(max_workers=max_jobs, thread_name_prefix="mc-job")
+        self._jobs = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, label="", **kwargs):
+        with self._lock:
+            job = Job(f"job-{next(self._ids)}", label)
+            self._jobs[job.id] = job
+            self._prune()
+        job._future = self._executor.submit(job._run, fn, args, kwargs)
+        return job
+
+    def get(self, job_id):
+        """Úloha podle id, nebo None (neznámá nebo už zapomenutá)."""
+        return self._jobs.get(job_id)
+
+    def jobs(self):
+        """Všechny držené úlohy, nejnovější první."""
+        return sorted(self._jobs.values(), key=lambda job: job.created, reverse=True)
+
+    def _prune(self):
+        finished = [job for job in self.jobs() if job.done]
+        for job in finished[self.keep_finished:]:
+            del self._jobs[job.id]
@@ -0,0 +1,273 @@
+import functools
+import hashlib
+import inspect
+import mmap
+import sys
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+# --- SDÍLENÁ CACHE VÝPOČTŮ ---
+# Výsledky deterministických výpočtů (calculate_metrics, marginal ROE, mřížka
+# optimalizace, souhrny Monte Carlo...) se drží v jedné cache na úrovni procesu,
+# takže je sdílí všechny relace Streamlitu (modul se importuje jednou na proces).
+# Cache má paměťový rozpočet (odhad velikosti každého záznamu), TTL a LRU
+# vyhazování; počítadla se vedou zvlášť pro každý jmenný prostor (funkci).
+# Klíč je kanonická podoba vstupů: čísla jako float (5 == 5.0, np.float64 == float),
+# pole přes hash obsahu, slovníky (např. time_test_vars) seřazené podle klíčů.
+
+# Výchozí limit záznamů jedné funkce
+DEFAULT_MAXSIZE = 256
+# Limity sdílené cache
+DEFAULT_MAX_ENTRIES = 4096
+DEFAULT_MAX_BYTES = 512 * 1024 ** 2
+DEFAULT_TTL_SECONDS = 6 * 3600
+
+_COUNTERS = ("hits", "misses", "evictions", "expired")
+
+
+def canonical_key(value):
+    """Hashovatelná kanonická podoba vstupu (rekurzivně pro slovníky, sekvence a pole)."""
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (bool, np.bool_)):
+        # True == 1.0 by v klíči splynulo s číslem
+        return ("bool", bool(value))
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        number = float(value)
+        # -0.0 a 0.0 jsou stejný vstup
+        return number + 0.0
+    if isinstance(value, np.ndarray):
+        data = np.ascontiguousarray(value)
+        digest = hashlib.blake2b(data.tobytes(), digest_size=16).hexdigest()
+        return ("ndarray", data.dtype.str, data.shape, digest)
+    if isinstance(value, dict):
+        return ("dict", tuple(sorted((str(k), canonical_key(v)) for k, v in value.items())))
+    if isinstance(value, (list, tuple)):
+        return ("seq", tuple(canonical_key(v) for v in value))
+    if hasattr(value, "canonical_key"):
+        # Objekty s vlastním klíčem (např. logic.result.SimulationResult)
+        return value.canonical_key()
+    raise TypeError(f"Nepodporovaný typ vstupu pro cache: {type(value).__name__}")
+
+
+def copy_result(value):
+    """
+    Kopie kontejnerů výsledku (slovníky, seznamy, pole, tabulky), aby úprava
+    výsledku volajícím nezměnila hodnotu v cache. Čísla se nekopírují.
+    """
+    if isinstance(value, dict):
+        return {k: copy_result(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [copy_result(v) if isinstance(v, (dict, list, np.ndarray, pd.DataFrame)) else v for v in value]
+    if isinstance(value, (np.ndarray, pd.DataFrame, pd.Series)):
+        return value.copy()
+    return value
+
+
+def estimate_size(value, _seen=None):
+    """
+    Přibližná velikost objektu v bajtech pro paměťový rozpočet cache.
+
+    Pole a tabulky podle svých dat, kontejnery a objekty (__dict__, __slots__)
+    rekurzivně; sdílené podobjekty se počítají jednou. Pohled na pole drží
+    v paměti celého vlastníka dat (např. reshape dočasného pole), počítá se
+    proto vlastník, jednou pro všechny jeho pohledy; nepočítají se jen data
+    namapovaná ze souboru (np.memmap).
+    """
+    seen = set() if _seen is None else _seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    if isinstance(value, np.ndarray):
+        header = sys.getsizeof(np.empty(0))
+        owner = value
+        while isinstance(owner, np.ndarray) and owner.base is not None:
+            owner = owner.base
+        if isinstance(value, np.memmap) or isinstance(owner, (np.memmap, mmap.mmap)):
+            return header
+        if owner is value:
+            return value.nbytes + header
+        if id(owner) in seen:
+            return header
+        seen.add(id(owner))
+        return header + (owner.nbytes if isinstance(owner, np.ndarray) else value.nbytes)
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return int(np.sum(value.memory_usage(deep=True)))
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        return size + sum(estimate_size(k, seen) + estimate_size(v, seen) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return size + sum(estimate_size(v, seen) for v in value)
+    if hasattr(value, "__dict__"):
+        size += estimate_size(vars(value), seen)
+    for slot in getattr(type(value), "__slots__", ()):
+        if hasattr(value, slot):
+            size += estimate_size(getattr(value, slot), seen)
+    return size
+
+
+class LRUCache:
+    """
+    LRU cache s limitem počtu záznamů, paměťovým rozpočtem a TTL; bezpečná pro
+    více vláken (relací).
+
+    Záznamy patří do jmenných prostorů (namespace, typicky jméno funkce), které
+    mohou mít vlastní limit počtu záznamů; počítadla zásahů, výpadků, vyhození
+    a expirací se vedou pro každý prostor zvlášť. Záznam větší než celý rozpočet
+    se neuloží.
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, max_bytes=None, ttl=None, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._clock = clock
+        # (namespace, key) -> (hodnota, velikost v bajtech, čas uložení)
+        self._data = OrderedDict()
+        self._nbytes = 0
+        self._limits = {}
+        self._sizes = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    @property
+    def nbytes(self):
+        return self._nbytes
+
+    def _count(self, namespace, name):
+        self._counters.setdefault(namespace, dict.fromkeys(_COUNTERS, 0))[name] += 1
+
+    def _remove(self, entry_key, reason=None):
+        _, nbytes, _ = self._data.pop(entry_key)
+        self._nbytes -= nbytes
+        self._sizes[entry_key[0]] -= 1
+        if reason is not None:
+            self._count(entry_key[0], reason)
+
+    def _evict(self, namespace):
+        """Vyhazuje nejdéle nepoužité záznamy nad limitem prostoru a nad limity celé cache."""
+        limit = self._limits.get(namespace)
+        if limit is not None and self._sizes[namespace] > limit:
+            oldest = [k for k in self._data if k[0] == namespace][:self._sizes[namespace] - limit]
+            for entry_key in oldest:
+                self._remove(entry_key, "evictions")
+        while self._data and (
+            (self.maxsize is not None and len(self._data) > self.maxsize)
+            or (self.max_bytes is not None and self._nbytes > self.max_bytes)
+        ):
+            self._remove(next(iter(self._data)), "evictions")
+
+    def get(self, key, default=None, namespace=""):
+        entry_key = (namespace, key)
+        with self._lock:
+            entry = self._data.get(entry_key)
+            if entry is not None and self.ttl is not None and self._clock() - entry[2] > self.ttl:
+                self._remove(entry_key, "expired")
+                entry = None
+            if entry is None:
+                self._count(namespace, "misses")
+                return default
+            self._data.move_to_end(entry_key)
+            self._count(namespace, "hits")
+            return entry[0]
+
+    def put(self, key, value, namespace="", limit=None):
+        """Uloží hodnotu; limit omezí počet záznamů jmenného prostoru."""
+        nbytes = estimate_size(value)
+        entry_key = (namespace, key)
+        with self._lock:
+            if limit is not None:
+                self._limits[namespace] = limit
+            if entry_key in self._data:
+                self._remove(entry_key)
+            if self.max_bytes is not None and nbytes > self.max_bytes:
+                return
+            self._data[entry_key] = (value, nbytes, self._clock())
+            self._nbytes += nbytes
+            self._sizes[namespace] = self._sizes.get(namespace, 0) + 1
+            self._evict(namespace)
+
+    def clear(self, namespace=None):
+        """Smaže záznamy i počítadla (jen jednoho prostoru, je-li zadán)."""
+        with self._lock:
+            for entry_key in [k for k in self._data if namespace is None or k[0] == namespace]:
+                self._remove(entry_key)
+            if namespace is None:
+                self._counters.clear()
+            else:
+                self._counters.pop(namespace, None)
+
+    def stats(self, namespace=None):
+        """Počítadla a obsazenost celé cache, nebo jednoho jmenného prostoru."""
+        with self._lock:
+            if namespace is None:
+                counters = {name: sum(c[name] for c in self._counters.values()) for name in _COUNTERS}
+                size, nbytes, maxsize = len(self._data), self._nbytes, self.maxsize
+            else:
+                counters = dict(self._counters.get(namespace, dict.fromkeys(_COUNTERS, 0)))
+                entries = [v for k, v in self._data.items() if k[0] == namespace]
+                size, nbytes = len(entries), sum(e[1] for e in entries)
+                maxsize = self._limits.get(namespace, self.maxsize)
+        total = counters["hits"] + counters["misses"]
+        return dict(
+            counters,
+            hit_rate=counters["hits"] / total if total else 0.0,
+            size=size,
+            maxsize=maxsize,
+            nbytes=nbytes
+        )
+
+    def namespaces(self):
+        with self._lock:
+            return sorted(set(self._counters) | {ns for ns, size in self._sizes.items() if size})
+
+
+# Cache sdílená všemi relacemi procesu
+SHARED_CACHE = LRUCache(maxsize=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES, ttl=DEFAULT_TTL_SECONDS)
+
+
+def cache_stats(cache=SHARED_CACHE):
+    """Statistiky cache pro výpis: řádek pro každý jmenný prostor a souhrnný řádek 'celkem'."""
+    rows = [dict(cache.stats(ns), namespace=ns) for ns in cache.namespaces()]
+    rows.append(dict(cache.stats(), namespace="celkem"))
+    return rows
+
+
+def memoize(maxsize=DEFAULT_MAXSIZE, cache=None, namespace=None, copy=copy_result):
+    """
+    Dekorátor: výsledek funkce podle kanonického klíče vstupů ve sdílené cache.
+
+    Poziční i pojmenované argumenty se nejdřív namapují na parametry funkce
+    (včetně výchozích hodnot), takže f(1, b=2) a f(a=1.0, b=2) sdílí záznam.
+    maxsize omezuje počet záznamů funkce, celkovou paměť a TTL hlídá cache
+    (výchozí SHARED_CACHE). Vrací se kopie (copy) uloženého výsledku. Funkce
+    dostane atributy cache, cache_info() a cache_clear().
+    """
+    def decorator(fn):
+        signature = inspect.signature(fn)
+        target = SHARED_CACHE if cache is None else cache
+        name = namespace or f"{fn.__module__}.{fn.__qualname__}"
+        missing = object()
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = canonical_key(bound.arguments)
+            result = target.get(key, missing, namespace=name)
+            if result is missing:
+                result = fn(*args, **kwargs)
+                target.put(key, result, namespace=name, limit=maxsize)
+            return copy(result) if copy is not None else result
+
+        wrapper.cache = target
+        wrapper.cache_info = functools.partial(target.stats, name)
+        wrapper.cache_clear = functools.partial(target.clear, name)
+        return wrapper
+    return decorator
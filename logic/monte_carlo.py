@@ -1,5 +1,430 @@
+import copy
+import multiprocessing
+import os
+import time
 import numpy as np
-import calculations
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+from logic.engine import calculate_metrics_batch
+from logic.aggregation import MonteCarloAggregator
+from logic.history import DEFAULT_BLOCK_SIZE, bootstrap_paths, history_means
+from logic.memo import SHARED_CACHE
+from logic.operations import simulate_operations
+from logic.result_store import run_key
+from logic.risk import DEFAULT_CONFIDENCE, risk_metrics
+from logic.scenarios import (
+    FACTORS, SAMPLING_METHODS, correlation_matrix, expected_short_rates, generate_factor_paths,
+    per_factor, short_rate_paths
+)
+
+# Velikost dávky cest. Dělení na dávky nezávisí na počtu workerů, takže výsledek
+# pro daný seed je stejný při sériovém i paralelním běhu.
+DEFAULT_CHUNK_SIZE = 20_000
+
+# Metriky jedné cesty, které Monte Carlo vrací (pole tvaru (N,))
+PATH_METRICS = ("irr", "etf_irr", "total_profit", "irr_valid", "etf_irr_valid")
+# Roční řady, které Monte Carlo vrací (pole tvaru (N, years), cashflows (N, years + 1))
+PATH_SERIES = ("property_values", "mortgage_balances", "cashflows", "operating_cashflows", "etf_values")
+# Roční řady ukládané do úložiště výsledků
+STORED_SERIES = ("equity", "cashflows", "cumulative_cashflow", "etf_values")
+# Verze formátu uložených běhů (součást klíče -> starší běhy se nepoužijí)
+STORE_FORMAT = 2
+# Jmenné prostory souhrnů uložených běhů ve sdílené cache výpočtů
+AGGREGATOR_NAMESPACE = "monte_carlo.stored_aggregator"
+RISK_NAMESPACE = "monte_carlo.stored_risk_metrics"
+
+
+def simulate_paths(
+    app_scenarios, rent_scenarios, etf_scenarios,
+    purchase_price, down_payment, one_off_costs,
+    interest_rate, loan_term_years,
+    monthly_rent, monthly_expenses, vacancy_months, tax_rate,
+    holding_period, etf_comparison,
+    initial_fx_rate, fx_appreciation,
+    time_test_vars, sale_fee_percent=0.0,
+    irr_guess=None, etf_irr_guess=None, fixation_years=1,
+    rented_months=None, extra_expenses=None
+):
+    """
+    Jádro Monte Carlo: vyhodnotí všechny cesty (řádky matic scénářů) najednou.
+
+    app_scenarios, rent_scenarios, etf_scenarios mají tvar (N, years) v % p.a.,
+    stejně tak mohou být zadány interest_rate a fx_appreciation; rented_months
+    a extra_expenses (N, years) pocházejí z modelu provozu (logic.operations).
+    Vrací kompaktní slovník polí (PATH_METRICS a 'series' s PATH_SERIES).
+    """
+    batch = calculate_metrics_batch(
+        purchase_price=purchase_price,
+        down_payment=down_payment,
+        one_off_costs=one_off_costs,
+        interest_rate=interest_rate,
+        loan_term_years=loan_term_years,
+        monthly_rent=monthly_rent,
+        monthly_expenses=monthly_expenses,
+        vacancy_months=vacancy_months,
+        tax_rate=tax_rate,
+        appreciation_rate=app_scenarios,
+        rent_growth_rate=rent_scenarios,
+        holding_period=holding_period,
+        etf_comparison=etf_comparison,
+        etf_return=etf_scenarios if etf_comparison else 0,
+        initial_fx_rate=initial_fx_rate,
+        fx_appreciation=fx_appreciation,
+        time_test_vars=time_test_vars,
+        sale_fee_percent=sale_fee_percent,
+        irr_guess=irr_guess,
+        etf_irr_guess=etf_irr_guess,
+        fixation_years=fixation_years,
+        rented_months=rented_months,
+        extra_expenses=extra_expenses,
+        real_values=False
+    )
+    result = {key: batch[key] for key in PATH_METRICS}
+    result["series"] = {key: batch['series'][key] for key in PATH_SERIES}
+    return result
+
+
+def chunk_generators(seed_seq):
+    """
+    Generátory jedné dávky: normální šoky, mixovací faktor t, bootstrap
+    a tři proudy modelu provozu (nájemníci, počty oprav, ceny oprav).
+
+    Každý spotřebitel má vlastní proud, takže délka jednoho nemění čísla ostatních
+    a prvních n cest dávky je stejných pro libovolnou velikost dávky >= n.
+    """
+    return tuple(
+        np.random.default_rng(np.random.SeedSequence(
+            seed_seq.entropy, spawn_key=seed_seq.spawn_key + (i,), pool_size=seed_seq.pool_size
+        ))
+        for i in range(6)
+    )
+
+
+def draw_scenarios(generators, n_paths, holding_years, scenario_params):
+    """
+    Roční sazby aktivních faktorů (scenario_params['factors']) jako tenzor (N, years, F).
+    generators jsou proudy z chunk_generators.
+    """
+    p = scenario_params
+    normal_rng, tail_rng, bootstrap_rng = generators[:3]
+    paths = generate_factor_paths(
+        normal_rng, n_paths, holding_years, p['means'], p['stds'],
+        correlation=p['correlation'], tail_df=p['tail_df'],
+        persistence=p['persistence'], sampling=p['sampling'], tail_rng=tail_rng
+    )
+    rate_model = p.get('rate_model')
+    if rate_model is not None:
+        # Faktor 'rate' nese normované šoky, sazby z nich dělá model krátkodobé sazby
+        idx = p['factors'].index("rate")
+        paths[:, :, idx] = short_rate_paths(paths[:, :, idx], **rate_model)
+    bootstrap = p.get('bootstrap')
+    if bootstrap is not None:
+        # Historické faktory nahradí parametrické (společné indexy let pro všechny)
+        paths[:, :, bootstrap['factor_idx']] = bootstrap_paths(
+            bootstrap_rng, n_paths, holding_years, bootstrap['path'], bootstrap['columns'], bootstrap['block_size']
+        )
+    if "rate" in p['factors']:
+        # Sazba sjednaná při koupi platí do první refixace ve všech cestách
+        paths[:, 0, p['factors'].index("rate")] = p['initial_rate']
+    return paths
+
+
+def expected_factor_paths(scenario_params, holding_years):
+    """Střední hodnoty faktorů po letech (years, F) - bod linearizace kontrolní proměnné."""
+    p = scenario_params
+    means = np.repeat(np.asarray(p['means'], dtype=float)[None, :], holding_years, axis=0)
+    rate_model = p.get('rate_model')
+    if rate_model is not None:
+        means[:, p['factors'].index("rate")] = expected_short_rates(
+            rate_model['r0'], rate_model['long_term_mean'], rate_model['mean_reversion'], holding_years
+        )
+    bootstrap = p.get('bootstrap')
+    if bootstrap is not None:
+        means[:, bootstrap['factor_idx']] = history_means(bootstrap['path'], bootstrap['columns'])
+    if "rate" in p['factors']:
+        means[0, p['factors'].index("rate")] = p['initial_rate']
+    return means
+
+
+def simulate_factor_paths(factor_paths, factors, base_params, guesses=(None, None), operations=None):
+    """
+    Vyhodnotí tenzor sazeb (N, years, F) s faktory pojmenovanými podle FACTORS.
+    Faktory 'fx' a 'rate' nahradí deterministický kurz a úrokovou sazbu,
+    operations (výstup logic.operations.simulate_operations) pevnou neobsazenost.
+    """
+    by_name = {name: factor_paths[:, :, i] for i, name in enumerate(factors)}
+    params = dict(base_params)
+    if "fx" in by_name:
+        params['fx_appreciation'] = by_name["fx"]
+    if "rate" in by_name:
+        params['interest_rate'] = by_name["rate"]
+    return simulate_paths(
+        app_scenarios=by_name["appreciation"],
+        rent_scenarios=by_name["rent"],
+        etf_scenarios=by_name.get("etf"),
+        irr_guess=guesses[0],
+        etf_irr_guess=guesses[1],
+        **(operations or {}),
+        **params
+    )
+
+
+def _irr_sensitivities(base_params, scenario_params, guesses, bump=0.1):
+    """
+    Kontrolní proměnná: linearizace deterministického IRR kolem středních sazeb.
+
+    Gradient IRR (a ETF IRR) podle sazby každého faktoru v každém roce se spočte
+    centrálními diferencemi v jedné dávce kolem středních hodnot m. Pro cestu X
+    platí C = IRR(m) + grad . (X - m) a protože E[X] = m, je E[C] = IRR(m) přesně
+    (u CIR jen přibližně kvůli useknutí sazby v nule).
+    """
+    years = base_params['holding_period']
+    factors = scenario_params['factors']
+    n_factors = len(factors)
+
+    base = expected_factor_paths(scenario_params, years)
+    eye = np.eye(years * n_factors).reshape(-1, years, n_factors)
+    bumped = np.concatenate([base + bump * eye, base - bump * eye, base[None]])
+    k = years * n_factors
+
+    res = simulate_factor_paths(bumped, factors, base_params, guesses)
+    control = {
+        "means": base,
+        "irr": res['irr'][-1],
+        "irr_gradient": ((res['irr'][:k] - res['irr'][k:2 * k]) / (2 * bump)).reshape(years, n_factors)
+    }
+    if base_params['etf_comparison']:
+        control["etf_irr"] = res['etf_irr'][-1]
+        control["etf_irr_gradient"] = ((res['etf_irr'][:k] - res['etf_irr'][k:2 * k]) / (2 * bump)).reshape(years, n_factors)
+    return control
+
+
+def _simulate_chunk(task):
+    """
+    Jedna dávka cest s vlastním generátorem (spouští se i v jiném procesu).
+
+    Volitelný sedmý prvek úlohy je offset: vylosuje se offset + n cest dávky, ale
+    počítá se jen posledních n (doplnění dávky, jejíž začátek už je spočtený).
+    """
+    seed_seq, n_paths, base_params, scenario_params, guesses, control = task[:6]
+    offset = task[6] if len(task) > 6 else 0
+    years = base_params['holding_period']
+    generators = chunk_generators(seed_seq)
+    factor_paths = draw_scenarios(generators, offset + n_paths, years, scenario_params)
+    operations = None
+    if scenario_params.get('operations') is not None:
+        rent_growth = factor_paths[:, :, scenario_params['factors'].index("rent")]
+        operations = simulate_operations(
+            generators[3:], offset + n_paths, years, base_params['vacancy_months'],
+            scenario_params['operations'], rent_growth
+        )
+        operations = {key: value[offset:] for key, value in operations.items()}
+    factor_paths = factor_paths[offset:]
+    paths = simulate_factor_paths(factor_paths, scenario_params['factors'], base_params, guesses, operations)
+    if control is not None:
+        shocks = factor_paths - control['means']
+        paths['irr_control'] = control['irr'] + np.einsum('nyf,yf->n', shocks, control['irr_gradient'])
+        if 'etf_irr' in control:
+            paths['etf_irr_control'] = control['etf_irr'] + np.einsum('nyf,yf->n', shocks, control['etf_irr_gradient'])
+    return paths
+
+
+def _new_aggregator(base_params, control):
+    expected = None
+    if control is not None:
+        expected = {key: control[key] for key in ("irr", "etf_irr") if key in control}
+    return MonteCarloAggregator(base_params['holding_period'], base_params['etf_comparison'], control_expected=expected)
+
+
+def _aggregate_chunk(task):
+    """Dávka cest zredukovaná na slučitelný souhrn (cesty se hned zahodí)."""
+    base_params, control = task[2], task[5]
+    return _new_aggregator(base_params, control).update(_simulate_chunk(task))
+
+
+def merge_path_results(results):
+    """Spojí výsledky dávek (ve stejném pořadí) do jednoho slovníku polí."""
+    keys = [key for key in results[0] if key != "series"]
+    merged = {key: np.concatenate([r[key] for r in results]) for key in keys}
+    merged["series"] = {
+        key: np.concatenate([r['series'][key] for r in results]) for key in PATH_SERIES
+    }
+    return merged
+
+
+def chunk_tasks(n_simulations, seed, chunk_size, base_params, scenario_params, guesses, control=None, start=0):
+    """
+    Rozdělí simulaci na dávky; každá dostane nezávislý proud ze SeedSequence.spawn.
+
+    Se start > 0 vrátí jen úlohy pro cesty start..n_simulations - 1. Cesta i leží
+    vždy v dávce i // chunk_size na pozici i % chunk_size, takže N cest je přesně
+    prvních N cest libovolného většího běhu se stejným seedem (navýšení počtu
+    simulací dopočítá jen nové cesty).
+    """
+    n_chunks = -(-n_simulations // chunk_size)
+    seed_seq = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    children = seed_seq.spawn(n_chunks)
+    tasks = []
+    for index in range(start // chunk_size, n_chunks):
+        offset = max(start - index * chunk_size, 0)
+        size = min(chunk_size, n_simulations - index * chunk_size) - offset
+        tasks.append((children[index], size, base_params, scenario_params, guesses, control, offset))
+    return tasks
+
+
+def _map_tasks(worker, tasks, n_workers=1):
+    """
+    Líně vrací výsledky úloh v pořadí (při n_workers > 1 z ProcessPoolExecutor).
+    Při předčasném ukončení (zrušení úlohy, výjimka) se nezahájené dávky zahodí.
+
+    Procesy se spouští metodou spawn: výpočet běží ve vlákně JobManageru uvnitř
+    vícevláknového serveru Streamlitu a fork takového procesu může uváznout na
+    zámku drženém jiným vláknem. Úloha (worker a jeho argumenty) se proto musí
+    dát importovat a picklovat.
+    """
+    if n_workers > 1 and len(tasks) > 1:
+        executor = ProcessPoolExecutor(max_workers=n_workers, mp_context=multiprocessing.get_context("spawn"))
+        try:
+            yield from executor.map(worker, tasks)
+        finally:
+            executor.shutdown(cancel_futures=True)
+    else:
+        # map je líné -> v paměti je vždy jen jedna dávka cest
+        yield from map(worker, tasks)
+
+
+def _prepare_run(
+    purchase_price, down_payment, one_off_costs,
+    interest_rate, loan_term_years,
+    monthly_rent, monthly_expenses, vacancy_months, tax_rate,
+    holding_period, initial_fx_rate, fx_appreciation,
+    appreciation_rate_mean, rent_growth_rate_mean,
+    etf_comparison, etf_return_mean,
+    appreciation_rate_std, rent_growth_rate_std, etf_return_std,
+    time_test_enabled=True, time_test_years=10, sale_fee_percent=0.0,
+    sampling="pseudo", control_variate=False,
+    fx_appreciation_std=0.0, interest_rate_std=0.0,
+    correlation=None, tail_df=None, persistence=None,
+    rate_model=None, rate_long_term_mean=None, rate_mean_reversion=0.2, fixation_years=1,
+    history=None, operations=None
+):
+    """
+    Společná příprava běhu: parametry jádra, parametry scénářů, warm start IRR
+    a (volitelně) kontrolní proměnná.
+
+    Náhodné jsou vždy růst cen a nájmů, výnos ETF při srovnání s ETF, kurz jen
+    při srovnání s ETF a nenulové volatilitě, sazba hypotéky při nenulové volatilitě.
+    """
+    if sampling not in SAMPLING_METHODS:
+        raise ValueError(f"Neznámý způsob vzorkování: {sampling}")
+
+    holding_years = int(holding_period)
+
+    time_test_vars = {"enabled": time_test_enabled, "years": time_test_years}
+    base_params = dict(
+        purchase_price=purchase_price,
+        down_payment=down_payment,
+        one_off_costs=one_off_costs,
+        interest_rate=interest_rate,
+        loan_term_years=loan_term_years,
+        monthly_rent=monthly_rent,
+        monthly_expenses=monthly_expenses,
+        vacancy_months=vacancy_months,
+        tax_rate=tax_rate,
+        holding_period=holding_years,
+        etf_comparison=etf_comparison,
+        initial_fx_rate=initial_fx_rate,
+        fx_appreciation=fx_appreciation,
+        time_test_vars=time_test_vars,
+        sale_fee_percent=sale_fee_percent,
+        fixation_years=fixation_years
+    )
+
+    history_columns = (history or {}).get('columns', {})
+    factors = ["appreciation", "rent"]
+    if etf_comparison:
+        factors.append("etf")
+        if fx_appreciation_std > 0 or "fx" in history_columns:
+            factors.append("fx")
+    if interest_rate_std > 0 or ("rate" in history_columns and rate_model is None):
+        factors.append("rate")
+    means = {
+        "appreciation": appreciation_rate_mean, "rent": rent_growth_rate_mean,
+        "etf": etf_return_mean, "fx": fx_appreciation, "rate": interest_rate
+    }
+    stds = {
+        "appreciation": appreciation_rate_std, "rent": rent_growth_rate_std,
+        "etf": etf_return_std, "fx": fx_appreciation_std, "rate": interest_rate_std
+    }
+
+    # Korelace se zadává pro všechny FACTORS (matice nebo páry), použijí se jen aktivní faktory
+    active_correlation = None
+    if correlation is not None:
+        if isinstance(correlation, dict):
+            correlation = correlation_matrix(correlation)
+        idx = [FACTORS.index(name) for name in factors]
+        active_correlation = np.asarray(correlation, dtype=float)[np.ix_(idx, idx)]
+
+    scenario_params = dict(
+        factors=tuple(factors),
+        means=per_factor(means, factors, 0.0),
+        stds=per_factor(stds, factors, 0.0),
+        correlation=active_correlation,
+        tail_df=tail_df,
+        persistence=per_factor(persistence, factors, 0.0),
+        sampling=sampling,
+        rate_model=None,
+        initial_rate=interest_rate
+    )
+    if rate_model is not None and "rate" in factors:
+        idx = factors.index("rate")
+        scenario_params['means'][idx] = 0.0
+        scenario_params['stds'][idx] = 1.0
+        scenario_params['rate_model'] = dict(
+            r0=interest_rate,
+            long_term_mean=interest_rate if rate_long_term_mean is None else rate_long_term_mean,
+            mean_reversion=rate_mean_reversion,
+            volatility=interest_rate_std,
+            model=rate_model
+        )
+
+    scenario_params['operations'] = None
+    if operations is not None:
+        if not 0 < operations.get('turnover_rate', 0) <= 100:
+            raise ValueError("Míra střídání nájemníků musí být v intervalu (0, 100] %.")
+        scenario_params['operations'] = dict(operations)
+
+    scenario_params['bootstrap'] = None
+    if history is not None:
+        # Sazba z modelu krátkodobé sazby má přednost před historickou řadou
+        mapped = [name for name in factors if name in history_columns
+                  and not (name == "rate" and scenario_params['rate_model'] is not None)]
+        if mapped:
+            scenario_params['bootstrap'] = dict(
+                path=history['path'],
+                columns=[history_columns[name] for name in mapped],
+                factor_idx=[factors.index(name) for name in mapped],
+                block_size=history.get('block_size', DEFAULT_BLOCK_SIZE)
+            )
+            # Ověření souboru a sloupců ještě před spuštěním dávek
+            history_means(history['path'], scenario_params['bootstrap']['columns'])
+
+    # Deterministický scénář (střední hodnoty) jako warm start pro IRR všech cest
+    deterministic = simulate_paths(
+        app_scenarios=appreciation_rate_mean,
+        rent_scenarios=np.full((1, holding_years), rent_growth_rate_mean),
+        etf_scenarios=etf_return_mean,
+        **base_params
+    )
+
+    guesses = (deterministic['irr'][0], deterministic['etf_irr'][0])
+
+    control = None
+    if control_variate:
+        control = _irr_sensitivities(base_params, scenario_params, guesses)
+
+    return base_params, scenario_params, guesses, control
+
 
 def run_monte_carlo(
     n_simulations,
@@ -15,49 +440,261 @@ def run_monte_carlo(
     # Volatility params (Std Dev)
     appreciation_rate_std, rent_growth_rate_std, etf_return_std,
     # Tax params
-    time_test_enabled=True, time_test_years=10, sale_fee_percent=0.0
+    time_test_enabled=True, time_test_years=10, sale_fee_percent=0.0,
+    # Execution params
+    seed=None, n_workers=1, chunk_size=DEFAULT_CHUNK_SIZE, streaming=False,
+    # Variance reduction
+    sampling="pseudo", control_variate=False,
+    # Additional risk factors and their dependence
+    fx_appreciation_std=0.0, interest_rate_std=0.0,
+    correlation=None, tail_df=None, persistence=None,
+    # Mortgage rate model
+    rate_model=None, rate_long_term_mean=None, rate_mean_reversion=0.2, fixation_years=1,
+    # Historical scenarios
+    history=None,
+    # Stochastic operations (vacancy, repairs)
+    operations=None
 ):
-    results = []
-    holding_years = int(holding_period)
-    
-    # Pre-generate random scenarios for performance
-    # Shape: (n_simulations, holding_years)
-    app_scenarios = np.random.normal(appreciation_rate_mean, appreciation_rate_std, size=(n_simulations, holding_years))
-    rent_scenarios = np.random.normal(rent_growth_rate_mean, rent_growth_rate_std, size=(n_simulations, holding_years))
-    
-    etf_scenarios = None
-    if etf_comparison:
-        etf_scenarios = np.random.normal(etf_return_mean, etf_return_std, size=(n_simulations, holding_years))
-    
-    time_test_vars = {"enabled": time_test_enabled, "years": time_test_years}
+    """
+    Monte Carlo simulace nad vektorizovaným jádrem (bez smyčky přes cesty).
+
+    Cesty se počítají po dávkách (chunk_size), každá dávka má vlastní generátor
+    odvozený přes np.random.SeedSequence(seed).spawn. Při n_workers > 1 běží dávky
+    v ProcessPoolExecutor. Pro stejný seed a chunk_size je výsledek stejný
+    bez ohledu na počet workerů.
+
+    Vrací slovník polí: 'irr', 'etf_irr', 'total_profit', 'irr_valid',
+    'etf_irr_valid' tvaru (N,) a 'series' s ročními řadami tvaru (N, years).
+    Cesty bez IRR mají NaN (viz irr_valid).
+
+    Se streaming=True se každá dávka hned zredukuje na MonteCarloAggregator
+    (průměry, kvantilové sketche, histogramy, pásma po letech) a vrací se jen
+    sloučený souhrn, takže paměť nezávisí na počtu simulací.
+
+    Redukce rozptylu: sampling="antithetic" (zrcadlové cesty) nebo "sobol"
+    (scrambled Sobol QMC); control_variate=True přidá ke každé cestě kontrolní
+    proměnnou 'irr_control' (linearizace deterministického IRR se známou
+    střední hodnotou), kterou souhrn použije pro přesnější průměr IRR.
+
+    Faktory (růst cen, nájmů, výnos ETF, změna kurzu, sazba hypotéky) generuje
+    logic.scenarios.generate_factor_paths: correlation je matice (5, 5) v pořadí
+    FACTORS nebo páry {("appreciation", "rate"): -0.3}, tail_df zapne Studentovo t,
+    persistence je AR(1) koeficient (skalár nebo {faktor: phi}).
+
+    Náhodná sazba hypotéky (interest_rate_std > 0) se uplatní při každé refixaci
+    (každých fixation_years let se splátka přepočte); do první refixace platí
+    ve všech cestách sjednaná interest_rate. S rate_model="vasicek"/"cir"
+    se sazba vyvíjí jako krátkodobá sazba s návratem k rate_long_term_mean
+    (výchozí = interest_rate) rychlostí rate_mean_reversion a volatilitou
+    interest_rate_std; jinak jsou roční sazby nezávislé kolem interest_rate.
+
+    history = {"path": "data/history.csv", "columns": {"appreciation": "property",
+    "etf": "msci_world", "fx": "czk_eur"}, "block_size": 5} nahradí zadané faktory
+    kruhovým blokovým bootstrapem historických ročních výnosů (logic.history);
+    ostatní faktory zůstávají parametrické.
+
+    operations = {"turnover_rate": 30, "lease_indexation": 2.0, "repair_rate": 0.5,
+    "repair_cost": 25_000, "repair_cost_sigma": 1.0} nahradí pevnou neobsazenost
+    měsíčním modelem provozu (logic.operations): střídání nájemníků s průměrnou
+    neobsazeností vacancy_months, přecenění nájmu při novém nájemníkovi
+    a Poissonovy opravy s lognormální cenou.
+    """
+    base_params, scenario_params, guesses, control = _prepare_run(
+        purchase_price, down_payment, one_off_costs,
+        interest_rate, loan_term_years,
+        monthly_rent, monthly_expenses, vacancy_months, tax_rate,
+        holding_period, initial_fx_rate, fx_appreciation,
+        appreciation_rate_mean, rent_growth_rate_mean,
+        etf_comparison, etf_return_mean,
+        appreciation_rate_std, rent_growth_rate_std, etf_return_std,
+        time_test_enabled, time_test_years, sale_fee_percent,
+        sampling, control_variate,
+        fx_appreciation_std, interest_rate_std,
+        correlation, tail_df, persistence,
+        rate_model, rate_long_term_mean, rate_mean_reversion, fixation_years,
+        history, operations
+    )
+    tasks = chunk_tasks(n_simulations, seed, chunk_size, base_params, scenario_params, guesses, control)
+
+    results = _map_tasks(_aggregate_chunk if streaming else _simulate_chunk, tasks, n_workers)
+
+    if streaming:
+        aggregator = _new_aggregator(base_params, control)
+        for part in results:
+            aggregator.merge(part)
+        return aggregator
 
-    for i in range(n_simulations):
-        # Extract specific scenario rates
-        app_rates = app_scenarios[i]
-        rent_rates = rent_scenarios[i]
-        etf_rates = etf_scenarios[i] if etf_comparison else 0
-        
-        # Facade call back to main calculator
-        res = calculations.calculate_metrics(
-            purchase_price=purchase_price,
-            down_payment=down_payment,
-            one_off_costs=one_off_costs,
-            interest_rate=interest_rate,
-            loan_term_years=loan_term_years,
-            monthly_rent=monthly_rent,
-            monthly_expenses=monthly_expenses,
-            vacancy_months=vacancy_months,
-            tax_rate=tax_rate,
-            appreciation_rate=app_rates,   # Passing array
-            rent_growth_rate=rent_rates,   # Passing array
-            holding_period=holding_period,
-            etf_comparison=etf_comparison,
-            etf_return=etf_rates,          # Passing array
-            initial_fx_rate=initial_fx_rate,
-            fx_appreciation=fx_appreciation,
-            time_test_vars=time_test_vars,
-            sale_fee_percent=sale_fee_percent
+    return merge_path_results(list(results))
+
+
+def run_monte_carlo_until_converged(
+    tolerance_irr=0.1, tolerance_prob_loss=0.5, confidence=0.95,
+    min_paths=2_000, max_paths=500_000, max_seconds=10.0,
+    batch_size=5_000, seed=None, progress=None,
+    **mc_params
+):
+    """
+    Monte Carlo po dávkách, dokud polovina intervalu spolehlivosti průměrného IRR,
+    mediánu IRR (obojí v p.b.) a pravděpodobnosti ztráty (v p.b.) neklesne pod
+    zadanou toleranci, nebo dokud se nevyčerpá rozpočet (max_paths, max_seconds).
+
+    mc_params jsou stejné parametry jako u run_monte_carlo (bez n_simulations).
+    progress(aggregator, fraction) se volá po každé dávce (fraction = vyčerpaná
+    část rozpočtu); výjimkou z něj lze výpočet zrušit (logic.jobs).
+    Vrací (MonteCarloAggregator, report) - report obsahuje důvod ukončení,
+    počet cest, čas a dosažené směrodatné chyby i poloviny intervalů.
+    """
+    base_params, scenario_params, guesses, control = _prepare_run(**mc_params)
+    seed_seq = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    aggregator = _new_aggregator(base_params, control)
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    tolerances = {"mean_irr": tolerance_irr, "median_irr": tolerance_irr, "prob_loss": tolerance_prob_loss}
+
+    started = time.perf_counter()
+    while True:
+        # Dávky se odvozují postupně ze SeedSequence -> stejný seed = stejné dávky
+        size = min(batch_size, max_paths - aggregator.n_paths)
+        task = (seed_seq.spawn(1)[0], size, base_params, scenario_params, guesses, control)
+        aggregator.merge(_aggregate_chunk(task))
+
+        errors = aggregator.standard_errors()
+        half_widths = {key: z * value for key, value in errors.items()}
+        elapsed = time.perf_counter() - started
+        if progress is not None:
+            progress(aggregator, min(1.0, max(aggregator.n_paths / max_paths, elapsed / max_seconds)))
+
+        if aggregator.n_paths >= min_paths and all(half_widths[k] <= tol for k, tol in tolerances.items()):
+            reason = "converged"
+            break
+        if aggregator.n_paths >= max_paths:
+            reason = "max_paths"
+            break
+        if elapsed >= max_seconds:
+            reason = "max_seconds"
+            break
+
+    report = {
+        "converged": reason == "converged",
+        "reason": reason,
+        "n_paths": aggregator.n_paths,
+        "elapsed_seconds": elapsed,
+        "confidence": confidence,
+        "standard_errors": errors,
+        "half_widths": half_widths
+    }
+    return aggregator, report
+
+
+def _stored_arrays(paths):
+    """Pole jedné dávky pro úložiště: metriky cest a roční řady STORED_SERIES."""
+    arrays = {key: value for key, value in paths.items() if key != "series"}
+    series = paths['series']
+    arrays['equity'] = series['property_values'] - series['mortgage_balances']
+    arrays['cashflows'] = series['cashflows']
+    arrays['cumulative_cashflow'] = np.cumsum(series['operating_cashflows'], axis=1)
+    if series['etf_values'].shape[1]:
+        arrays['etf_values'] = series['etf_values']
+    return arrays
+
+
+def _stored_cache_key(run):
+    # Cesty jsou v rámci klíče stabilní, prvních n_paths cest je tedy vždy stejných
+    return (run.key, run.n_paths)
+
+
+def stored_aggregator(run, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    MonteCarloAggregator uloženého běhu. Čerstvě spočtený běh ho má z výpočtu,
+    načtený běh ho jednou sestaví z namapovaných polí po dávkách. Souhrn se drží
+    ve sdílené cache výpočtů (logic.memo), takže ho sdílí všechny relace.
+    """
+    aggregator = SHARED_CACHE.get(_stored_cache_key(run), namespace=AGGREGATOR_NAMESPACE)
+    if aggregator is None:
+        m = run.manifest
+        aggregator = MonteCarloAggregator(m['holding_years'], m['etf_comparison'], control_expected=m['control_expected'])
+        metrics = [name for name in run.names if name not in STORED_SERIES]
+        for start in range(0, run.n_paths, chunk_size):
+            part = {name: np.asarray(run[name][start:start + chunk_size]) for name in metrics}
+            part['series'] = {
+                name: np.asarray(run[name][start:start + chunk_size]) for name in STORED_SERIES if name in run
+            }
+            aggregator.update(part)
+        SHARED_CACHE.put(_stored_cache_key(run), aggregator, namespace=AGGREGATOR_NAMESPACE)
+    return aggregator
+
+
+def stored_risk_metrics(run, confidence=DEFAULT_CONFIDENCE, liquidity_budget=None):
+    """Přesné rizikové metriky (logic.risk) z uložených cest; výsledek se drží ve sdílené cache."""
+    key = _stored_cache_key(run) + (confidence, liquidity_budget)
+    metrics = SHARED_CACHE.get(key, namespace=RISK_NAMESPACE)
+    if metrics is None:
+        metrics = risk_metrics(
+            run['total_profit'], run['equity'], run['cumulative_cashflow'], confidence, liquidity_budget
         )
-        results.append(res)
-        
-    return results
+        SHARED_CACHE.put(key, metrics, namespace=RISK_NAMESPACE)
+    return dict(metrics)
+
+
+def run_monte_carlo_stored(
+    store, n_simulations, seed=None, n_workers=1, chunk_size=DEFAULT_CHUNK_SIZE, progress=None, **mc_params
+):
+    """
+    Monte Carlo s uložením cest do úložiště (logic.result_store.ResultStore).
+
+    Klíčem je hash všech vstupů včetně seedu a velikosti dávky (u historických dat
+    i času změny souboru), ne však počtu simulací. Cesty jsou v rámci seedu stabilní
+    (viz chunk_tasks), takže uložený běh s alespoň n_simulations cestami se jen
+    namapuje z disku (případně jeho prvních n_simulations cest) a kratší běh se
+    navýší: spočtou se jen chybějící cesty, připíší se za uložené a jejich souhrn
+    se sloučí s uloženým. Stav generátoru tak tvoří seed v manifestu a počet
+    uložených cest. Bez seedu se použije nová entropie (uložená v manifestu) -
+    pro navýšení téhož běhu je potřeba předat ji jako seed (run.manifest['params']['seed']).
+
+    progress(aggregator, fraction) se volá po každé zapsané dávce; výjimka z něj
+    výpočet přeruší, rozepsané soubory se smažou a uložený kratší běh se nemění.
+
+    Vrací StoredRun (pole IRR, ETF IRR, zisku, equity, cashflow... jako np.memmap);
+    souhrn pro grafy dává stored_aggregator(run).
+    """
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
+    key_params = dict(mc_params, seed=seed, chunk_size=chunk_size, store_format=STORE_FORMAT)
+    history = mc_params.get('history')
+    if history is not None:
+        key_params['history_modified'] = os.path.getmtime(history['path'])
+    key = run_key(key_params)
+
+    previous = store.load(key)
+    if previous is not None and previous.n_paths >= n_simulations:
+        return previous.prefix(n_simulations)
+
+    done = 0 if previous is None else previous.n_paths
+    base_params, scenario_params, guesses, control = _prepare_run(**mc_params)
+    tasks = chunk_tasks(n_simulations, seed, chunk_size, base_params, scenario_params, guesses, control, start=done)
+    if previous is None:
+        aggregator = _new_aggregator(base_params, control)
+    else:
+        # Souhrn uložených cest se jen doplní o nové (původní běh zůstává nedotčený)
+        aggregator = copy.deepcopy(stored_aggregator(previous, chunk_size))
+    writer = store.writer(key, n_simulations, key_params, previous=previous)
+
+    try:
+        for paths in _map_tasks(_simulate_chunk, tasks, n_workers):
+            aggregator.update(paths)
+            writer.write(_stored_arrays(paths))
+            if progress is not None:
+                progress(aggregator, aggregator.n_paths / n_simulations)
+
+        run = writer.close(extra={
+            "holding_years": base_params['holding_period'],
+            "etf_comparison": base_params['etf_comparison'],
+            "control_expected": None if control is None else {
+                k: float(control[k]) for k in ("irr", "etf_irr") if k in control
+            }
+        })
+    except BaseException:
+        # Zrušený (JobCancelled) nebo spadlý běh nenechá na disku memmapy bez manifestu
+        writer.abort()
+        raise
+    SHARED_CACHE.put(_stored_cache_key(run), aggregator, namespace=AGGREGATOR_NAMESPACE)
+    return run
@@ -0,0 +1,133 @@
+import numpy as np
+
+# --- PROVOZNÍ RIZIKA ---
+# Stochastický model provozu nemovitosti po měsících pro N cest najednou:
+# střídání nájemníků jako střídání nájmů (celé měsíce) a výpadků (exponenciální
+# délka kalibrovaná na průměrnou neobsazenost), opravy jako Poissonovy
+# příchody s lognormální cenou a přecenění nájmu na tržní úroveň při změně
+# nájemníka. Měsíční pole (N, years, 12) se sečtou na roční vstupy dávkového
+# jádra (pronajaté měsíce a mimořádné náklady).
+
+
+def simulate_occupancy(rng, n_paths, holding_years, vacancy_months, turnover_rate, rent_growth=None, lease_indexation=None):
+    """
+    Pronajaté měsíce po letech (N, years) jako střídání nájmů a výpadků.
+
+    turnover_rate: roční pravděpodobnost, že nájemník odejde (v %); nájem trvá
+        celý počet měsíců (geometricky, měsíční pravděpodobnost odchodu leave).
+        Výpadek po odchodu je exponenciální se střední délkou kalibrovanou tak,
+        aby stacionární neobsazenost byla přesně vacancy_months za rok pro
+        jakoukoli kombinaci vstupů (i krátké výpadky při vysoké fluktuaci,
+        vacancy_months = 0 znamená výměnu nájemníka bez výpadku). Start je ze
+        stacionárního rozdělení, průměr každého roku je tedy 12 - vacancy_months.
+    lease_indexation: roční valorizace nájmu stávajícího nájemníka (v %); tržní
+        nájem roste podle rent_growth (N, years) a při změně nájemníka se nájem
+        přecení na tržní. None = nájem vždy sleduje trh (bez přecenění).
+
+    Výsledek je v "tržních" měsících: měsíc s nájmem 5 % pod trhem se počítá
+    jako 0.95, takže hrubý nájem = tržní měsíční nájem * pronajaté měsíce.
+    Náhodná čísla se losují jedním voláním po řádcích (cestách), takže cesta
+    nezávisí na velikosti dávky.
+    """
+    if not 0 < turnover_rate <= 100:
+        raise ValueError("Míra střídání nájemníků musí být v intervalu (0, 100] %.")
+    years = int(holding_years)
+    months = years * 12
+    leave = 1 - (1 - turnover_rate / 100) ** (1 / 12)
+    # Podíl volného času v = výpadek / (výpadek + nájem), nájem trvá v průměru 1 / leave měsíců
+    vacancy_share = min(max(float(vacancy_months) / 12, 0.0), 1 - 1e-9)
+    spell_mean = vacancy_share / (1 - vacancy_share) / leave
+    log_stay = np.log1p(-leave) if leave < 1 else -np.inf
+
+    # Nájem trvá aspoň měsíc, na horizont tedy stačí months + 1 cyklů výpadek + nájem
+    cycles = months + 1
+    u = rng.random((n_paths, 3 + 2 * cycles), dtype=np.float32)
+
+    def exponential(column, rows):
+        return -spell_mean * np.log1p(-u[rows, column].astype(float))
+
+    def geometric(column, rows):
+        # Počet měsíců do odchodu (>= 1); při leave = 1 odchází každý měsíc
+        return 1 + np.floor(np.log1p(-u[rows, column].astype(float)) / log_stay)
+
+    # Start: volno (s pravděpodobností podílu neobsazenosti), jinak zbytek
+    # běžícího nájmu (celé měsíce geometricky + zlomek měsíce rovnoměrně)
+    rows_all = np.arange(n_paths)
+    residual = geometric(2, rows_all) - u[:, 1]
+    t = np.where(u[:, 0] < vacancy_share, 0.0, residual)
+
+    # Volný čas po měsících: částečné měsíce přímo, celé měsíce přes rozdílové pole
+    partial = np.zeros((n_paths, months + 1))
+    full = np.zeros((n_paths, months + 1), dtype=np.int32)
+    lease_start_year = np.zeros((n_paths, months + 1), dtype=np.int16) if lease_indexation is not None else None
+    for cycle in range(cycles):
+        rows = rows_all[t < months]
+        if not len(rows):
+            break
+        start = t[rows]
+        spell = exponential(3 + 2 * cycle, rows)
+        end = np.minimum(start + spell, months)
+        first, last = np.floor(start).astype(int), np.floor(end).astype(int)
+        partial[rows, first] += np.minimum(end, first + 1) - start
+        spans = last > first
+        partial[rows[spans], last[spans]] += end[spans] - last[spans]
+        full[rows[spans], first[spans] + 1] += 1
+        full[rows[spans], last[spans]] -= 1
+        if lease_start_year is not None:
+            # Nový nájemník od konce výpadku platí tržní nájem
+            lease_start_year[rows, last] = last // 12
+        t[rows] = start + spell + geometric(4 + 2 * cycle, rows)
+
+    vacant = np.cumsum(full, axis=1)[:, :months] + partial[:, :months]
+    monthly = np.clip(1 - vacant, 0.0, 1.0)
+    if lease_indexation is not None:
+        # Poměr nájmu nájemníka k tržnímu: valorizace vs. růst trhu za roky od začátku nájmu
+        drift = np.log((1 + lease_indexation / 100) / (1 + np.asarray(rent_growth, dtype=float) / 100))
+        cum_drift = np.concatenate([np.zeros((n_paths, 1)), np.cumsum(drift[:, :years - 1], axis=1)], axis=1)
+        start_year = np.maximum.accumulate(lease_start_year[:, :months], axis=1)
+        month_year = np.broadcast_to(np.arange(months) // 12, (n_paths, months))
+        monthly *= np.exp(
+            np.take_along_axis(cum_drift, month_year, axis=1) - np.take_along_axis(cum_drift, start_year, axis=1)
+        )
+    return monthly.reshape(n_paths, years, 12).sum(axis=2)
+
+
+def simulate_repairs(count_rng, cost_rng, n_paths, holding_years, repair_rate, repair_cost, repair_cost_sigma=1.0):
+    """
+    Náklady na opravy po letech (N, years) v cenách roku 0.
+
+    Počet oprav v měsíci ~ Poisson(repair_rate / 12), cena jedné opravy je
+    lognormální se střední hodnotou repair_cost a směrodatnou odchylkou logaritmu
+    repair_cost_sigma. Ceny se losují jedním voláním pro všechny opravy dávky
+    a sečtou do měsíců přes np.bincount.
+    """
+    counts = count_rng.poisson(repair_rate / 12, size=(n_paths, int(holding_years), 12))
+    mu = np.log(max(repair_cost, 1e-9)) - repair_cost_sigma ** 2 / 2
+    costs = cost_rng.lognormal(mu, repair_cost_sigma, size=int(counts.sum()))
+    month_of_repair = np.repeat(np.arange(counts.size), counts.ravel())
+    monthly = np.bincount(month_of_repair, weights=costs, minlength=counts.size).reshape(counts.shape)
+    return monthly.sum(axis=2)
+
+
+def simulate_operations(generators, n_paths, holding_years, vacancy_months, operations, rent_growth=None):
+    """
+    Roční vstupy jádra z modelu provozu: {'rented_months', 'extra_expenses'} (N, years).
+
+    generators: tři proudy (střídání nájemníků, počty oprav, ceny oprav).
+    operations: {'turnover_rate': % p.a., 'lease_indexation': % p.a. nebo None,
+    'repair_rate': oprav za rok, 'repair_cost': Kč, 'repair_cost_sigma': ...}.
+    """
+    turnover_rng, count_rng, cost_rng = generators
+    out = {
+        "rented_months": simulate_occupancy(
+            turnover_rng, n_paths, holding_years, vacancy_months, operations['turnover_rate'],
+            rent_growth, operations.get('lease_indexation')
+        ),
+        "extra_expenses": np.zeros((n_paths, int(holding_years)))
+    }
+    if operations.get('repair_rate', 0) > 0:
+        out["extra_expenses"] = simulate_repairs(
+            count_rng, cost_rng, n_paths, holding_years, operations['repair_rate'],
+            operations['repair_cost'], operations.get('repair_cost_sigma', 1.0)
+        )
+    return out
@@ -0,0 +1,62 @@
+import numpy as np
+from logic.engine import calculate_holding_period_curve
+
+# --- GRID SEARCH: LTV x DOBA DRŽENÍ ---
+# Celá mřížka se počítá jedním dávkovým voláním: každý krok LTV je jeden scénář
+# v dávce, roky exitu dává calculate_holding_period_curve z jediné simulace.
+
+
+def evaluate_ltv_holding_grid(
+    purchase_price, one_off_costs,
+    interest_rate, loan_term_years,
+    monthly_rent, monthly_expenses, vacancy_months, tax_rate,
+    appreciation_rate, rent_growth_rate,
+    time_test_vars=None, sale_fee_percent=0.0,
+    ltv_min=0, ltv_max=100, ltv_step=5, max_holding_period=30
+):
+    """
+    Vyhodnotí IRR pro všechny kombinace LTV (ltv_min..ltv_max po ltv_step)
+    a doby držení (1..max_holding_period).
+
+    Vrací plné matice tvaru (len(ltv), max_holding_period) pro heatmapu
+    a nalezené optimum ('best'). Kombinace bez IRR mají NaN a do optima se nepočítají.
+    """
+    ltv = np.arange(ltv_min, ltv_max + ltv_step / 2, ltv_step, dtype=float)
+    ltv = ltv[ltv <= ltv_max]
+    down_payment = purchase_price * (1 - ltv / 100)
+
+    curve = calculate_holding_period_curve(
+        purchase_price=purchase_price,
+        down_payment=down_payment,
+        one_off_costs=one_off_costs,
+        interest_rate=interest_rate,
+        loan_term_years=loan_term_years,
+        monthly_rent=monthly_rent,
+        monthly_expenses=monthly_expenses,
+        vacancy_months=vacancy_months,
+        tax_rate=tax_rate,
+        appreciation_rate=appreciation_rate,
+        rent_growth_rate=rent_growth_rate,
+        max_holding_period=max_holding_period,
+        time_test_vars=time_test_vars,
+        sale_fee_percent=sale_fee_percent
+    )
+    irr = curve['irr']
+
+    best = None
+    if np.isfinite(irr).any():
+        ltv_idx, year_idx = np.unravel_index(np.nanargmax(irr), irr.shape)
+        best = {
+            "ltv": float(ltv[ltv_idx]),
+            "years": int(curve['holding_periods'][year_idx]),
+            "irr": float(irr[ltv_idx, year_idx])
+        }
+
+    return {
+        "ltv": ltv,
+        "holding_periods": curve['holding_periods'],
+        "irr": irr,
+        "total_profit": curve['total_profit'],
+        "net_proceeds": curve['net_proceeds'],
+        "best": best
+    }
@@ -0,0 +1,223 @@
+import numpy as np
+from logic.finance import calculate_mortgage_payment, build_amortization_schedule, irr_batch
+from logic.memo import SHARED_CACHE, canonical_key
+
+# --- STUPŇOVITÝ VÝPOČET (calculate_metrics) ---
+# Deterministický model jednoho scénáře je rozdělený na stupně (financování,
+# provoz, daně, ETF, exit). Každý stupeň deklaruje vstupní parametry
+# a stupně, na kterých závisí; jeho výstup se drží ve sdílené cache pod klíčem
+# ze všech parametrů, které do něj vstupují (i přes závislosti). Při rerunu se
+# tak přepočítají jen stupně, jejichž vstupy se změnily: změna kurzu EUR sáhne
+# jen na ETF, změna poplatku z prodeje jen na exit. Reálné (inflací očištěné)
+# hodnoty počítá až výsledek při prvním přístupu (logic/result.py), deflace
+# proto není stupeň.
+# Výstupy stupňů se sdílí mezi výpočty, nesmí se proto měnit na místě.
+#
+# calculate_metrics (calculations.py) se navíc memoizuje jako celek a obě úrovně
+# mají jinou roli. Celý výsledek obslouží přesné opakování (rerun beze změny,
+# jiná relace) jedním vyhledáním, stupně se pak vůbec neprochází. Když se změní
+# jeden vstup, celý výsledek v cache není a cache stupňů ušetří přepočet
+# nedotčených stupňů. Scénář tak má záznam v obou úrovních; výstupy stupňů jsou
+# jen krátké řady délky holding_period a jejich počet omezuje STAGE_CACHE_SIZE.
+
+# Limit záznamů jednoho stupně ve sdílené cache
+STAGE_CACHE_SIZE = 256
+
+
+class Stage:
+    """Stupeň výpočtu: fn(params, upstream) -> dict, kde upstream jsou výstupy závislostí."""
+
+    def __init__(self, name, params, deps, fn):
+        self.name = name
+        self.params = tuple(params)
+        self.deps = tuple(deps)
+        self.fn = fn
+        # Všechny parametry, které do stupně vstupují (přímo i přes závislosti)
+        closure = set(self.params)
+        for dep in self.deps:
+            closure |= set(STAGES[dep].inputs)
+        self.inputs = tuple(sorted(closure))
+
+    @property
+    def namespace(self):
+        return f"pipeline.{self.name}"
+
+
+# Registr stupňů v topologickém pořadí (závislost se registruje dřív)
+STAGES = {}
+
+
+def stage(name, params, deps=()):
+    """Dekorátor: zaregistruje funkci jako stupeň výpočtu."""
+    def decorator(fn):
+        for dep in deps:
+            if dep not in STAGES:
+                raise ValueError(f"Neznámá závislost stupně {name}: {dep}")
+        STAGES[name] = Stage(name, params, deps, fn)
+        return fn
+    return decorator
+
+
+def run_stages(params, targets=None, cache=SHARED_CACHE):
+    """
+    Výstupy stupňů {jméno: dict} pro parametry params.
+
+    targets omezí výpočet na vybrané stupně (a jejich závislosti). Stupeň se
+    vezme z cache, pokud se žádný z jeho vstupů nezměnil, jinak se přepočítá.
+    """
+    needed = set(STAGES if targets is None else targets)
+    for name in reversed(list(STAGES)):
+        if name in needed:
+            needed.update(STAGES[name].deps)
+
+    outputs = {}
+    for name, current in STAGES.items():
+        if name not in needed:
+            continue
+        key = canonical_key({p: params[p] for p in current.inputs})
+        result = cache.get(key, namespace=current.namespace)
+        if result is None:
+            result = current.fn(params, {dep: outputs[dep] for dep in current.deps})
+            cache.put(key, result, namespace=current.namespace, limit=STAGE_CACHE_SIZE)
+        outputs[name] = result
+    return outputs
+
+
+def _rate(rate_input, year_index):
+    """Sazba pro daný rok: skalár, nebo řada po letech (poslední hodnota platí dál)."""
+    if isinstance(rate_input, (list, np.ndarray)):
+        if year_index < len(rate_input):
+            return rate_input[year_index]
+        return rate_input[-1]
+    return rate_input
+
+
+def _irr_percent(cashflows):
+    # Scénář bez kořene -> 0 kvůli zobrazení v UI
+    irr = irr_batch([cashflows])[0] * 100
+    return 0 if np.isnan(irr) else irr
+
+
+@stage("financing", ["purchase_price", "down_payment", "one_off_costs", "interest_rate", "loan_term_years", "holding_period"])
+def financing_stage(p, upstream):
+    """Hypotéka: splátka, zůstatky a úroky po letech, počáteční vklad."""
+    mortgage_amount = max(0, p['purchase_price'] - p['down_payment'])
+    monthly_mortgage_payment, _ = calculate_mortgage_payment(mortgage_amount, p['interest_rate'], p['loan_term_years'])
+    # Splátkový kalendář (zůstatky a úroky po letech) předpočítaný najednou
+    schedule = build_amortization_schedule(mortgage_amount, p['interest_rate'], p['loan_term_years'], p['holding_period'])
+    return {
+        "mortgage_amount": mortgage_amount,
+        "annual_mortgage_payment": monthly_mortgage_payment * 12,
+        "initial_investment": p['down_payment'] + p['one_off_costs'],
+        "interest": list(schedule['interest']),
+        "mortgage_balances": list(schedule['balances'])
+    }
+
+
+@stage("operations", ["monthly_rent", "monthly_expenses", "vacancy_months", "rent_growth_rate", "holding_period"])
+def operations_stage(p, upstream):
+    """Nájem a provozní náklady po letech (oboje roste tempem růstu nájmů)."""
+    annual_gross_rent = p['monthly_rent'] * (12 - p['vacancy_months'])
+    annual_expenses = p['monthly_expenses'] * 12
+    gross_rents, expenses = [], []
+    curr_rent, curr_expenses = annual_gross_rent, annual_expenses
+    for year_idx in range(p['holding_period']):
+        rate_rent = _rate(p['rent_growth_rate'], year_idx)
+        curr_rent *= (1 + rate_rent / 100)
+        curr_expenses *= (1 + rate_rent / 100)
+        gross_rents.append(curr_rent)
+        expenses.append(curr_expenses)
+    return {
+        "annual_gross_rent_y1": annual_gross_rent,
+        "annual_expenses_y1": annual_expenses,
+        "gross_rents": gross_rents,
+        "expenses": expenses
+    }
+
+
+@stage("tax", ["tax_rate"], deps=["financing", "operations"])
+def tax_stage(p, upstream):
+    """Daň z příjmu z pronájmu a čisté provozní cashflow po letech."""
+    fin, ops = upstream['financing'], upstream['operations']
+    payment = fin['annual_mortgage_payment']
+    taxes, operating_cashflows = [], []
+    for gross, expenses, interest in zip(ops['gross_rents'], ops['expenses'], fin['interest']):
+        # Základ daně = Příjem - Výdaje - Úroky (zjednodušeně, bez odpisů nemovitosti, což je konzervativní)
+        tax_paid = max(0, (gross - expenses - interest) * (p['tax_rate'] / 100))
+        taxes.append(tax_paid)
+        operating_cashflows.append(gross - payment - expenses - tax_paid)
+    return {
+        # Cashflow 1. roku pro zobrazení (bez růstu a daně)
+        "annual_cashflow_y1": ops['annual_gross_rent_y1'] - payment - ops['annual_expenses_y1'],
+        "tax_y1": taxes[0] if taxes else 0,
+        "operating_cashflows": operating_cashflows
+    }
+
+
+@stage("etf", ["etf_comparison", "etf_return", "initial_fx_rate", "fx_appreciation"], deps=["financing", "tax"])
+def etf_stage(p, upstream):
+    """
+    Alternativa v ETF: počáteční vklad v EUR a dotace nemovitosti (záporná
+    cashflow) investované do ETF ve stejném roce.
+    """
+    initial_investment = upstream['financing']['initial_investment']
+    etf_cashflows = [-initial_investment]
+    if not p['etf_comparison']:
+        return {"etf_values": [], "etf_cashflows": etf_cashflows, "etf_irr": 0}
+
+    initial_fx_rate, fx_appreciation = p['initial_fx_rate'], p['fx_appreciation']
+    etf_balance_eur = initial_investment / initial_fx_rate
+    etf_values = []
+    for year_idx, cashflow in enumerate(upstream['tax']['operating_cashflows']):
+        year = year_idx + 1
+        etf_balance_eur *= (1 + _rate(p['etf_return'], year_idx) / 100)
+        current_fx_rate = initial_fx_rate * ((1 + fx_appreciation / 100) ** year)
+        year_contribution_czk = 0
+        if cashflow < 0:
+            # Dotace do nemovitosti => stejná částka do ETF
+            year_contribution_czk = abs(cashflow)
+            etf_balance_eur += year_contribution_czk / current_fx_rate
+        etf_values.append(etf_balance_eur * current_fx_rate)
+        etf_cashflows.append(-year_contribution_czk)
+
+    etf_cashflows[-1] += etf_values[-1]
+    return {"etf_values": etf_values, "etf_cashflows": etf_cashflows, "etf_irr": _irr_percent(etf_cashflows)}
+
+
+@stage(
+    "exit",
+    ["purchase_price", "one_off_costs", "appreciation_rate", "sale_fee_percent", "tax_rate", "time_test_vars", "holding_period"],
+    deps=["financing", "tax"]
+)
+def exit_stage(p, upstream):
+    """Vývoj ceny nemovitosti, prodej na konci držení (poplatky, daň ze zisku) a IRR."""
+    fin = upstream['financing']
+    property_values = []
+    current_property_value = p['purchase_price']
+    for year_idx in range(p['holding_period']):
+        current_property_value *= (1 + _rate(p['appreciation_rate'], year_idx) / 100)
+        property_values.append(current_property_value)
+
+    sale_price = property_values[-1]
+    # Transakční náklady prodeje (např. provize makléře)
+    sale_costs = sale_price * (p['sale_fee_percent'] / 100.0)
+
+    # Daň ze zisku: základ = Prodejní cena - Kupní cena - Jednorázové náklady - Náklady prodeje
+    taxable_gain = sale_price - p['purchase_price'] - p['one_off_costs'] - sale_costs
+    capital_gains_tax = 0
+    if taxable_gain > 0:
+        time_test = p['time_test_vars']
+        is_exempt = time_test['enabled'] and p['holding_period'] > time_test['years']
+        if not is_exempt:
+            capital_gains_tax = taxable_gain * (p['tax_rate'] / 100)
+
+    net_proceeds = sale_price - fin['mortgage_balances'][-1] - sale_costs - capital_gains_tax
+    cashflows = [-fin['initial_investment']] + upstream['tax']['operating_cashflows']
+    cashflows[-1] += net_proceeds
+    return {
+        "property_values": property_values,
+        "capital_gains_tax": capital_gains_tax,
+        "cashflows": cashflows,
+        "total_profit": sum(cashflows),
+        "irr": _irr_percent(cashflows)
+    }
@@ -0,0 +1,202 @@
+from collections.abc import Mapping
+import numpy as np
+import pandas as pd
+from logic.finance import deflator as deflator_table
+
+# --- VÝSLEDEK SKALÁRNÍHO VÝPOČTU ---
+# Kompaktní výsledek calculate_metrics: skaláry a roční řady v souvislých
+# float64 polích (jen pro čtení) ve __slots__, bez slovníku na instanci.
+# Odvozené řady (vlastní kapitál, reálné hodnoty) se počítají až při prvním
+# přístupu a drží se v objektu; reálné hodnoty dělí sdíleným deflátorem
+# (logic.finance.deflator), nominální výpočet tak za ně nic neplatí.
+# Kvůli zpětné kompatibilitě se výsledek chová jako původní slovník:
+# result['irr'], result['series']['cashflows'], .get(...).
+
+# Skalární metriky výsledku
+SCALARS = (
+    "irr", "total_profit", "etf_irr", "monthly_cashflow_y1", "tax_paid_y1",
+    "capital_gains_tax", "initial_investment", "initial_mortgage"
+)
+# Skaláry v reálných cenách (počítají se líně)
+REAL_SCALARS = ("real_total_profit", "real_monthly_cashflow_y1")
+# Nominální řady: po letech 1..H, cashflows a etf_cashflows včetně roku 0
+SERIES = ("property_values", "mortgage_balances", "operating_cashflows", "cashflows", "etf_values", "etf_cashflows")
+# Řady v reálných cenách (počítají se líně)
+REAL_SERIES = (
+    "real_cashflows", "real_property_values", "real_mortgage_balances", "real_operating_cashflows", "real_etf_values"
+)
+
+
+def _frozen(values):
+    """Souvislé float64 pole jen pro čtení (výsledek se sdílí přes cache)."""
+    arr = np.ascontiguousarray(values, dtype=np.float64)
+    arr.flags.writeable = False
+    return arr
+
+
+class SimulationResult(Mapping):
+    """
+    Výsledek jednoho deterministického scénáře.
+
+    Atributy: skaláry (SCALARS) jako float, řady (SERIES) jako float64 pole
+    jen pro čtení a inflation_rate pro reálné hodnoty. Líné vlastnosti
+    equity_values a real_* (REAL_SERIES, REAL_SCALARS) se spočtou jednou.
+    """
+
+    __slots__ = SCALARS + SERIES + ("inflation_rate", "_derived")
+
+    def __init__(self, scalars, series, inflation_rate):
+        for name in SCALARS:
+            object.__setattr__(self, name, float(scalars[name]))
+        for name in SERIES:
+            object.__setattr__(self, name, _frozen(series[name]))
+        object.__setattr__(self, "inflation_rate", float(inflation_rate))
+        object.__setattr__(self, "_derived", {})
+
+    def __setattr__(self, name, value):
+        raise AttributeError("SimulationResult je jen pro čtení")
+
+    def __reduce__(self):
+        # pickle i copy/deepcopy vytvoří výsledek znovu přes __init__ (pole opět jen
+        # pro čtení); líně spočtené řady se nepřenáší, dopočítají se při přístupu
+        return type(self), (
+            {name: getattr(self, name) for name in SCALARS},
+            {name: getattr(self, name) for name in SERIES},
+            self.inflation_rate
+        )
+
+    @property
+    def holding_period(self):
+        return len(self.property_values)
+
+    def _cached(self, name, compute):
+        if name not in self._derived:
+            self._derived[name] = compute()
+        return self._derived[name]
+
+    # --- Odvozené řady ---
+
+    @property
+    def equity_values(self):
+        """Vlastní kapitál po letech: hodnota nemovitosti - zůstatek hypotéky."""
+        return self._cached("equity_values", lambda: _frozen(self.property_values - self.mortgage_balances))
+
+    @property
+    def deflator(self):
+        """Cenový index (1 + inflace)^rok pro roky 1..H (pohled do sdílené tabulky logic.finance.deflator)."""
+        return deflator_table(self.inflation_rate, self.holding_period)[1:]
+
+    def _real(self, name, values):
+        return self._cached(name, lambda: _frozen(values() / self.deflator))
+
+    @property
+    def real_equity_values(self):
+        return self._real("real_equity_values", lambda: self.equity_values)
+
+    @property
+    def real_property_values(self):
+        return self._real("real_property_values", lambda: self.property_values)
+
+    @property
+    def real_mortgage_balances(self):
+        return self._real("real_mortgage_balances", lambda: self.mortgage_balances)
+
+    @property
+    def real_operating_cashflows(self):
+        return self._real("real_operating_cashflows", lambda: self.operating_cashflows)
+
+    @property
+    def real_etf_values(self):
+        # Bez ETF srovnání nuly (stejně jako dávkové jádro)
+        if not len(self.etf_values):
+            return self._cached("real_etf_values", lambda: _frozen(np.zeros(self.holding_period)))
+        return self._real("real_etf_values", lambda: self.etf_values)
+
+    @property
+    def real_cashflows(self):
+        # Investice v roce 0: nominální = reálná
+        return self._cached("real_cashflows", lambda: _frozen(
+            np.concatenate([self.cashflows[:1], self.cashflows[1:] / self.deflator])
+        ))
+
+    @property
+    def real_total_profit(self):
+        return self._cached("real_total_profit", lambda: float(self.real_cashflows.sum()))
+
+    @property
+    def real_monthly_cashflow_y1(self):
+        return self.monthly_cashflow_y1 / (1 + self.inflation_rate / 100)
+
+    # --- Převody ---
+
+    def to_dataframe(self, real=False):
+        """
+        Roční řady (roky 1..H) jako DataFrame bez kopírování dat: každý sloupec
+        je pohled na pole výsledku. Cashflow s rokem 0 jsou v result['series'].
+        """
+        columns = {
+            "property_values": self.property_values,
+            "mortgage_balances": self.mortgage_balances,
+            "equity_values": self.equity_values,
+            "operating_cashflows": self.operating_cashflows
+        }
+        if len(self.etf_values):
+            columns["etf_values"] = self.etf_values
+        if real:
+            columns.update({
+                name: getattr(self, name) for name in REAL_SERIES if name != "real_cashflows"
+            })
+        index = pd.RangeIndex(1, self.holding_period + 1, name="Year")
+        return pd.DataFrame(columns, index=index, copy=False)
+
+    def to_arrow(self, real=False):
+        """Roční řady jako pyarrow.Table (float64 sloupce bez kopie)."""
+        import pyarrow as pa
+        frame = self.to_dataframe(real)
+        arrays = [pa.array(frame.index.to_numpy())] + [pa.array(frame[c].to_numpy()) for c in frame.columns]
+        return pa.Table.from_arrays(arrays, names=["Year"] + list(frame.columns))
+
+    def canonical_key(self):
+        """Klíč pro sdílenou cache výpočtů (logic.memo) ze skalárů a nominálních řad."""
+        from logic.memo import canonical_key
+        return self._cached("canonical_key", lambda: ("SimulationResult", canonical_key(
+            {name: getattr(self, name) for name in SCALARS + SERIES + ("inflation_rate",)}
+        )))
+
+    # --- Rozhraní slovníku (zpětná kompatibilita) ---
+
+    def __getitem__(self, key):
+        if key == "series":
+            return SeriesView(self)
+        if key in SCALARS or key in REAL_SCALARS:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(SCALARS + REAL_SCALARS + ("series",))
+
+    def __len__(self):
+        return len(SCALARS) + len(REAL_SCALARS) + 1
+
+    def __repr__(self):
+        return f"SimulationResult(irr={self.irr:.2f}, total_profit={self.total_profit:,.0f}, years={self.holding_period})"
+
+
+class SeriesView(Mapping):
+    """Řady výsledku jako slovník (result['series']); reálné řady se spočtou až při čtení."""
+
+    __slots__ = ("_result",)
+
+    def __init__(self, result):
+        self._result = result
+
+    def __getitem__(self, key):
+        if key in SERIES or key in REAL_SERIES:
+            return getattr(self._result, key)
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(SERIES + REAL_SERIES)
+
+    def __len__(self):
+        return len(SERIES) + len(REAL_SERIES)
@@ -0,0 +1,293 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+
+# --- ÚLOŽIŠTĚ VÝSLEDKŮ MONTE CARLO ---
+# Výsledky na úrovni cest se ukládají do .npy souborů (zápis po dávkách přes
+# np.lib.format.open_memmap) s malým JSON manifestem. Klíčem je hash vstupů,
+# takže stejné zadání se při dalším otevření jen namapuje do paměti (np.memmap)
+# místo nového výpočtu. Manifest se zapisuje až nakonec - běh bez manifestu
+# je nedokončený: přerušený nebo zrušený zápis se hned smaže (abort) a adresáře
+# bez manifestu, které po sobě nechal např. pád procesu, uklidí prune() po
+# ochranné lhůtě. Každý zápis jde do vlastního
+# dočasného adresáře (<klíč>.<náhodné>.partial) a hotový běh se do adresáře klíče
+# přesune až nakonec, takže dva souběžné výpočty téhož klíče (dvě relace, dvě
+# úlohy) si nepřepisují soubory. Běh lze navýšit o další cesty: původní cesty
+# se zkopírují na začátek nového zápisu a původní běh se nahradí až po dokončení.
+
+DEFAULT_STORE_DIR = os.path.join(".cache", "mc_results")
+MANIFEST_NAME = "manifest.json"
+# Kolik posledních běhů se v úložišti drží (starší se mažou)
+DEFAULT_MAX_RUNS = 20
+# Přípona dočasných adresářů rozepsaných běhů
+PARTIAL_SUFFIX = ".partial"
+# Kolikrát se zkusí hotový běh přesunout na místo, když ho souběžně mění jiný zápis
+PUBLISH_ATTEMPTS = 5
+# Za jak dlouho po poslední změně se adresář bez manifestu považuje za opuštěný
+DEFAULT_ORPHAN_GRACE_SECONDS = 3600
+
+
+def _canonical(value):
+    """Převede vstupy na JSON-serializovatelnou podobu s deterministickým pořadím."""
+    if isinstance(value, dict):
+        items = {("|".join(map(str, k)) if isinstance(k, tuple) else str(k)): _canonical(v) for k, v in value.items()}
+        return {k: items[k] for k in sorted(items)}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return _canonical(value.tolist())
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def run_key(params):
+    """Hash vstupů běhu (sha256 kanonického JSON, prvních 20 znaků)."""
+    payload = json.dumps(_canonical(params), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:20]
+
+
+class StoredRun:
+    """
+    Uložený běh: manifest a pole namapovaná z disku (čtou se až při přístupu).
+
+    run[name] vrací np.memmap jen pro čtení; percentiles() počítá přesné
+    percentily přímo z uložených cest (např. po letech pro equity).
+    prefix(n) je pohled na prvních n cest (menší počet simulací téhož běhu).
+    """
+
+    def __init__(self, directory, manifest, from_cache=False, limit=None):
+        self.directory = directory
+        self.manifest = manifest
+        self.from_cache = from_cache
+        self.limit = limit
+        # Odvozené objekty (např. souhrn pro grafy) počítané z polí jen jednou
+        self.derived = {}
+        self._arrays = {}
+
+    @property
+    def key(self):
+        return self.manifest['key']
+
+    @property
+    def n_paths(self):
+        return self.manifest['n_paths'] if self.limit is None else self.limit
+
+    @property
+    def names(self):
+        return list(self.manifest['arrays'])
+
+    def __getitem__(self, name):
+        if name not in self._arrays:
+            if name not in self.manifest['arrays']:
+                raise KeyError(name)
+            array = np.load(os.path.join(self.directory, f"{name}.npy"), mmap_mode="r")
+            self._arrays[name] = array if self.limit is None else array[:self.limit]
+        return self._arrays[name]
+
+    def __contains__(self, name):
+        return name in self.manifest['arrays']
+
+    def prefix(self, n_paths):
+        """Pohled na prvních n_paths cest (sdílí soubory, odvozené souhrny má vlastní)."""
+        if n_paths >= self.manifest['n_paths']:
+            return self
+        views = self.derived.setdefault("prefixes", {})
+        if n_paths not in views:
+            views[n_paths] = StoredRun(self.directory, self.manifest, self.from_cache, limit=int(n_paths))
+        views[n_paths].from_cache = self.from_cache
+        return views[n_paths]
+
+    def percentiles(self, name, percentiles, axis=0):
+        """Přesné percentily uloženého pole (NaN se ignorují)."""
+        return np.nanpercentile(self[name], percentiles, axis=axis)
+
+
+class _RunWriter:
+    """
+    Zápis běhu po dávkách do předem alokovaných .npy souborů.
+
+    Vše se píše do vlastního dočasného adresáře (jedinečného pro každý zápis),
+    který close() přesune do adresáře klíče; souběžný zápis stejného klíče tak
+    nikdy nesmaže cizí soubory a původní běh zůstává čitelný až do výměny.
+    S previous (StoredRun se stejným klíčem) se jeho cesty zkopírují na začátek
+    a zápis pokračuje za nimi.
+    """
+
+    def __init__(self, store, key, n_paths, params, previous=None):
+        self.store = store
+        self.key = key
+        self.n_paths = int(n_paths)
+        self.params = params
+        self.target = store.directory_for(key)
+        self.offset = 0
+        self.arrays = {}
+        self.previous_paths = 0
+        self.started = time.perf_counter()
+        os.makedirs(store.root, exist_ok=True)
+        self.directory = tempfile.mkdtemp(prefix=f"{key}.", suffix=PARTIAL_SUFFIX, dir=store.root)
+        if previous is not None:
+            try:
+                self._copy_previous(previous)
+            except BaseException:
+                self.abort()
+                raise
+
+    def _copy_previous(self, previous, chunk_size=100_000):
+        if previous.n_paths > self.n_paths:
+            raise ValueError("Navýšený běh musí mít alespoň tolik cest jako původní.")
+        for start in range(0, previous.n_paths, chunk_size):
+            self.offset = start
+            self.write({name: previous[name][start:start + chunk_size] for name in previous.names})
+        self.offset = self.previous_paths = previous.n_paths
+
+    def write(self, chunk):
+        """Zapíše dávku {název: pole (n, ...)}; soubory se založí podle první dávky."""
+        size = len(next(iter(chunk.values())))
+        for name, values in chunk.items():
+            values = np.asarray(values)
+            if name not in self.arrays:
+                self.arrays[name] = np.lib.format.open_memmap(
+                    os.path.join(self.directory, f"{name}.npy"), mode="w+",
+                    dtype=values.dtype, shape=(self.n_paths,) + values.shape[1:]
+                )
+            self.arrays[name][self.offset:self.offset + size] = values
+        self.offset += size
+
+    def close(self, extra=None):
+        if self.offset != self.n_paths:
+            raise ValueError(f"Zapsáno {self.offset} cest z {self.n_paths}.")
+        for array in self.arrays.values():
+            array.flush()
+        manifest = {
+            "key": self.key,
+            "created": time.time(),
+            "elapsed_seconds": time.perf_counter() - self.started,
+            "n_paths": self.n_paths,
+            "extended_from": self.previous_paths,
+            "arrays": {name: {"shape": list(a.shape), "dtype": str(a.dtype)} for name, a in self.arrays.items()},
+            "params": _canonical(self.params),
+            **(extra or {})
+        }
+        self.arrays = {}
+        tmp_path = os.path.join(self.directory, MANIFEST_NAME + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, os.path.join(self.directory, MANIFEST_NAME))
+        self.store._loaded.pop(self.key, None)
+        self._publish()
+        run = StoredRun(self.directory, manifest)
+        self.store._loaded[self.key] = run
+        self.store.prune()
+        return run
+
+    def abort(self):
+        """Zahodí nedokončený zápis (zrušený nebo spadlý výpočet) i s jeho adresářem."""
+        self.arrays = {}
+        if self.directory != self.target:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _publish(self):
+        """
+        Přesune hotový běh do adresáře klíče. Existující běh (původní kratší, nebo
+        souběžně dopočítaný stejný) se nejdřív odsune stranou a pak smaže; když
+        mezitím adresář obsadí jiný zápis, zkusí se to znovu.
+        """
+        for _ in range(PUBLISH_ATTEMPTS):
+            try:
+                os.rename(self.directory, self.target)
+                self.directory = self.target
+                return
+            except OSError:
+                if not os.path.exists(self.target):
+                    continue
+            stale = self.directory + ".old"
+            try:
+                os.rename(self.target, stale)
+            except FileNotFoundError:
+                continue
+            shutil.rmtree(stale, ignore_errors=True)
+        raise OSError(f"Běh {self.key} se nepodařilo přesunout do úložiště.")
+
+
+class ResultStore:
+    """Adresář s uloženými běhy (jeden podadresář na klíč)."""
+
+    def __init__(self, root=DEFAULT_STORE_DIR, max_runs=DEFAULT_MAX_RUNS, orphan_grace=DEFAULT_ORPHAN_GRACE_SECONDS):
+        self.root = root
+        self.max_runs = max_runs
+        self.orphan_grace = orphan_grace
+        # Načtené běhy v paměti (memmapy a odvozené souhrny se sestaví jen jednou)
+        self._loaded = {}
+
+    def directory_for(self, key):
+        return os.path.join(self.root, key)
+
+    def _manifest_path(self, key):
+        return os.path.join(self.directory_for(key), MANIFEST_NAME)
+
+    def exists(self, key):
+        return os.path.exists(self._manifest_path(key))
+
+    def load(self, key, n_paths=None):
+        """Dokončený běh podle klíče (s n_paths jen prvních n_paths cest), nebo None."""
+        if not self.exists(key):
+            self._loaded.pop(key, None)
+            return None
+        if key not in self._loaded:
+            with open(self._manifest_path(key), encoding="utf-8") as f:
+                manifest = json.load(f)
+            self._loaded[key] = StoredRun(self.directory_for(key), manifest)
+        run = self._loaded[key]
+        run.from_cache = True
+        return run if n_paths is None else run.prefix(n_paths)
+
+    def writer(self, key, n_paths, params, previous=None):
+        return _RunWriter(self, key, n_paths, params, previous)
+
+    def list_runs(self):
+        """Manifesty dokončených běhů, nejnovější první."""
+        if not os.path.isdir(self.root):
+            return []
+        manifests = []
+        for key in os.listdir(self.root):
+            # Dočasné adresáře rozepsaných běhů mají v názvu tečku
+            if "." not in key and self.exists(key):
+                with open(self._manifest_path(key), encoding="utf-8") as f:
+                    manifests.append(json.load(f))
+        return sorted(manifests, key=lambda m: m['created'], reverse=True)
+
+    def delete(self, key):
+        self._loaded.pop(key, None)
+        shutil.rmtree(self.directory_for(key), ignore_errors=True)
+
+    def prune(self):
+        """
+        Smaže nejstarší běhy nad limit max_runs a opuštěné adresáře bez manifestu
+        (rozepsané déle než orphan_grace od poslední změny).
+        """
+        for manifest in self.list_runs()[self.max_runs:]:
+            self.delete(manifest['key'])
+        if not os.path.isdir(self.root):
+            return
+        now = time.time()
+        for name in os.listdir(self.root):
+            directory = os.path.join(self.root, name)
+            if not os.path.isdir(directory) or ("." not in name and self.exists(name)):
+                continue
+            if now - _last_modified(directory) > self.orphan_grace:
+                shutil.rmtree(directory, ignore_errors=True)
+
+
+def _last_modified(directory):
+    """Čas poslední změny adresáře nebo kteréhokoli souboru v něm (0, pokud mezitím zmizel)."""
+    try:
+        times = [os.path.getmtime(directory)]
+        times += [entry.stat().st_mtime for entry in os.scandir(directory)]
+    except FileNotFoundError:
+        return 0.0
+    return max(times)
@@ -0,0 +1,76 @@
+import numpy as np
+
+# --- RIZIKOVÉ METRIKY ---
+# Rizikové ukazatele nad poli Monte Carlo (cesty v řádcích), vše vektorizovaně
+# přes cesty: VaR a CVaR zisku (koncového bohatství nad vloženým kapitálem),
+# nejhorší propad kumulovaného cashflow (potřebná rezerva), pravděpodobnost
+# záporného vlastního kapitálu (LTV nad 100 %) a pravděpodobnost, že součet
+# dotací (záporných cashflow) překročí rozpočet na likviditu.
+
+# Výchozí hladina spolehlivosti VaR / CVaR
+DEFAULT_CONFIDENCE = 0.95
+
+
+def value_at_risk(profits, confidence=DEFAULT_CONFIDENCE):
+    """VaR: ztráta, kterou s pravděpodobností confidence nepřekročíme (kladné číslo = ztráta)."""
+    profits = np.asarray(profits, dtype=float)
+    return float(-np.nanquantile(profits, 1 - confidence))
+
+
+def conditional_value_at_risk(profits, confidence=DEFAULT_CONFIDENCE):
+    """CVaR (expected shortfall): průměrná ztráta v nejhorších (1 - confidence) scénářích."""
+    profits = np.asarray(profits, dtype=float)
+    profits = profits[np.isfinite(profits)]
+    if not profits.size:
+        return np.nan
+    n_tail = max(1, int(np.ceil(round(profits.size * (1 - confidence), 9))))
+    tail = np.sort(profits)[:n_tail]
+    return float(-tail.mean())
+
+
+def cashflow_drawdown(cumulative_cashflow):
+    """
+    Nejhorší propad kumulovaného cashflow každé cesty (N,) v Kč.
+
+    Propad = pokles od dosavadního maxima (včetně startu v nule), tedy kolik
+    peněz musí investor v nejhorší fázi doplatit ze svého.
+    """
+    cumulative = np.asarray(cumulative_cashflow, dtype=float)
+    peaks = np.maximum.accumulate(np.maximum(cumulative, 0.0), axis=1)
+    return (peaks - cumulative).max(axis=1)
+
+
+def total_subsidies(cumulative_cashflow):
+    """Součet záporných ročních cashflow (dotací) každé cesty (N,) v Kč."""
+    cumulative = np.asarray(cumulative_cashflow, dtype=float)
+    cashflows = np.diff(cumulative, axis=1, prepend=0.0)
+    return np.maximum(-cashflows, 0.0).sum(axis=1)
+
+
+def negative_equity(equity):
+    """Cesty, kde vlastní kapitál v některém roce klesne pod nulu (LTV > 100 %)."""
+    return (np.asarray(equity, dtype=float) < 0).any(axis=1)
+
+
+def risk_metrics(total_profit, equity, cumulative_cashflow, confidence=DEFAULT_CONFIDENCE, liquidity_budget=None):
+    """
+    Přesné rizikové metriky z polí cest.
+
+    total_profit (N,), equity a cumulative_cashflow (N, years) - např. sloupce
+    uloženého běhu. Pravděpodobnosti v %, částky v Kč; bez rozpočtu na likviditu
+    je 'prob_subsidies_over_budget' NaN.
+    """
+    drawdown = cashflow_drawdown(cumulative_cashflow)
+    subsidies = total_subsidies(cumulative_cashflow)
+    return {
+        "confidence": confidence,
+        "var": value_at_risk(total_profit, confidence),
+        "cvar": conditional_value_at_risk(total_profit, confidence),
+        "drawdown": float(np.quantile(drawdown, confidence)),
+        "max_drawdown": float(drawdown.max()),
+        "prob_negative_equity": float(negative_equity(equity).mean() * 100),
+        "prob_subsidies_over_budget": (
+            np.nan if liquidity_budget is None else float((subsidies > liquidity_budget).mean() * 100)
+        ),
+        "liquidity_budget": liquidity_budget
+    }
@@ -0,0 +1,174 @@
+import warnings
+import numpy as np
+
+# --- GENERÁTOR KORELOVANÝCH ŠOKŮ ---
+# Roční sazby všech rizikových faktorů pro N cest najednou jako tenzor
+# (N, years, factors). Korelace přes Choleského rozklad, volitelně tlusté chvosty
+# (Studentovo t se společným mixovacím faktorem) a AR(1) setrvačnost po faktorech.
+
+# Pořadí faktorů v tenzoru a v korelační matici
+FACTORS = ("appreciation", "rent", "etf", "fx", "rate")
+
+# Způsoby generování náhodných čísel (redukce rozptylu)
+SAMPLING_METHODS = ("pseudo", "antithetic", "sobol")
+
+# Modely krátkodobé sazby pro cesty úrokových sazeb
+RATE_MODELS = ("vasicek", "cir")
+
+
+def draw_standard_normals(rng, n_paths, n_factors, holding_years, sampling="pseudo"):
+    """
+    Standardní normální šoky tvaru (N, factors, years).
+
+    - pseudo: obyčejná pseudonáhodná čísla
+    - antithetic: sousední cesty tvoří zrcadlové páry (z, -z) -> nulový průměr šoků
+    - sobol: scrambled Sobolova sekvence (quasi-Monte Carlo) převedená inverzní CDF
+
+    Čísla se generují po cestách, takže prvních n cest je stejných pro libovolné
+    N >= n (na tom stojí navyšování počtu simulací bez přepočtu).
+    """
+    if sampling == "pseudo":
+        return rng.standard_normal((n_paths, n_factors, holding_years))
+    if sampling == "antithetic":
+        half = rng.standard_normal(((n_paths + 1) // 2, n_factors, holding_years))
+        return np.stack([half, -half], axis=1).reshape(-1, n_factors, holding_years)[:n_paths]
+    if sampling == "sobol":
+        from scipy.stats import qmc
+        from scipy.special import ndtri
+        sampler = qmc.Sobol(d=n_factors * holding_years, scramble=True, rng=rng)
+        with warnings.catch_warnings():
+            # Sobol preferuje počty 2^m; pro libovolné N jen varuje
+            warnings.simplefilter("ignore", UserWarning)
+            uniform = sampler.random(n_paths)
+        uniform = np.clip(uniform, 1e-12, 1 - 1e-12)
+        return ndtri(uniform).reshape(n_paths, n_factors, holding_years)
+    raise ValueError(f"Neznámý způsob vzorkování: {sampling}")
+
+
+def correlation_matrix(pairs=None, factors=FACTORS):
+    """
+    Korelační matice z párů {("appreciation", "rent"): 0.5, ...}.
+    Nezadané páry mají nulovou korelaci.
+    """
+    index = {name: i for i, name in enumerate(factors)}
+    matrix = np.eye(len(factors))
+    for (a, b), rho in (pairs or {}).items():
+        if a not in index or b not in index:
+            raise ValueError(f"Neznámý faktor v korelaci: {a}, {b}")
+        matrix[index[a], index[b]] = matrix[index[b], index[a]] = rho
+    return matrix
+
+
+def per_factor(value, factors, default):
+    """Skalár, mapování {faktor: hodnota} nebo sekvence v pořadí factors -> pole (F,)."""
+    if value is None:
+        return np.full(len(factors), default, dtype=float)
+    if isinstance(value, dict):
+        return np.array([value.get(name, default) for name in factors], dtype=float)
+    arr = np.asarray(value, dtype=float)
+    if arr.ndim == 0:
+        return np.full(len(factors), float(arr))
+    return arr
+
+
+def _cholesky(correlation):
+    correlation = np.asarray(correlation, dtype=float)
+    if not np.allclose(correlation, correlation.T) or not np.allclose(np.diag(correlation), 1.0):
+        raise ValueError("Korelační matice musí být symetrická s jedničkami na diagonále.")
+    try:
+        return np.linalg.cholesky(correlation)
+    except np.linalg.LinAlgError:
+        raise ValueError("Korelační matice není pozitivně definitní.") from None
+
+
+def generate_factor_paths(
+    rng, n_paths, holding_years, means, stds,
+    correlation=None, tail_df=None, persistence=None, sampling="pseudo", tail_rng=None
+):
+    """
+    Roční sazby faktorů (v % p.a.) jako tenzor (N, years, F).
+
+    means, stds: pole (F,) středních hodnot a směrodatných odchylek.
+    correlation: korelační matice (F, F) šoků; None = nezávislé faktory.
+    tail_df: stupně volnosti Studentova t (> 2) pro tlusté chvosty; šoky jsou
+        škálované na jednotkový rozptyl a mixovací faktor je společný pro všechny
+        faktory v daném roce (krize zasáhne trhy zároveň). None = normální šoky.
+    persistence: AR(1) koeficient phi v [0, 1) (skalár nebo (F,)); odchylka od
+        průměru x_t = phi x_{t-1} + sqrt(1 - phi^2) s eps_t má stacionární rozptyl s^2,
+        takže setrvačnost nemění volatilitu jednotlivého roku.
+    tail_rng: samostatný generátor pro mixovací faktor t (výchozí = rng); s ním
+        zůstává prvních n cest stejných pro libovolné N >= n.
+    """
+    means = np.asarray(means, dtype=float)
+    stds = np.asarray(stds, dtype=float)
+    n_factors = means.size
+
+    shocks = draw_standard_normals(rng, n_paths, n_factors, holding_years, sampling)
+    shocks = shocks.transpose(0, 2, 1)
+
+    if correlation is not None:
+        shocks = shocks @ _cholesky(correlation).T
+
+    if tail_df is not None:
+        if tail_df <= 2:
+            raise ValueError("Stupně volnosti Studentova t musí být větší než 2.")
+        tail_rng = rng if tail_rng is None else tail_rng
+        n_draws = (n_paths + 1) // 2 if sampling == "antithetic" else n_paths
+        chi2 = tail_rng.chisquare(tail_df, size=(n_draws, holding_years))
+        if sampling == "antithetic":
+            # Zrcadlový pár sdílí mixovací faktor
+            chi2 = np.repeat(chi2, 2, axis=0)[:n_paths]
+        shocks = shocks * np.sqrt((tail_df - 2) / chi2)[:, :, None]
+
+    phi = np.broadcast_to(np.asarray(0.0 if persistence is None else persistence, dtype=float), (n_factors,))
+    if np.any((phi < 0) | (phi >= 1)):
+        raise ValueError("Koeficient setrvačnosti AR(1) musí být v intervalu [0, 1).")
+    if np.any(phi > 0):
+        innovation_scale = np.sqrt(1 - phi ** 2)
+        for year in range(1, holding_years):
+            shocks[:, year] = phi * shocks[:, year - 1] + innovation_scale * shocks[:, year]
+
+    return means + stds * shocks
+
+
+def expected_short_rates(r0, long_term_mean, mean_reversion, holding_years):
+    """Střední hodnota sazby v letech 0..years-1 (stejná pro Vasicek i CIR), v %."""
+    t = np.arange(int(holding_years))
+    return long_term_mean + (r0 - long_term_mean) * np.exp(-mean_reversion * t)
+
+
+def short_rate_paths(shocks, r0, long_term_mean, mean_reversion, volatility, model="vasicek"):
+    """
+    Roční cesty sazby (N, years) v % z normovaných šoků (N, years).
+
+    Sloupec 0 je výchozí sazba r0, přechod do roku t řídí shocks[:, t].
+    Obě varianty používají přesné podmíněné momenty ročního kroku:
+      - vasicek: r_t = theta + (r_{t-1} - theta) e^-k + sigma sqrt((1 - e^-2k) / 2k) Z (přesné)
+      - cir: rozptyl úměrný úrovni sazby, normální aproximace useknutá v nule
+    volatility je okamžitá volatilita sigma v p.b. za rok; u CIR platí na úrovni
+    dlouhodobého průměru (sigma_CIR^2 = volatility^2 / theta).
+    Šoky mohou být korelované i s tlustými chvosty (generate_factor_paths).
+    """
+    if model not in RATE_MODELS:
+        raise ValueError(f"Neznámý model úrokových sazeb: {model}")
+    if mean_reversion <= 0:
+        raise ValueError("Rychlost návratu k průměru musí být kladná.")
+    shocks = np.asarray(shocks, dtype=float)
+    decay = np.exp(-mean_reversion)
+    spread = (1 - decay ** 2) / (2 * mean_reversion)
+
+    rates = np.empty_like(shocks)
+    rates[:, 0] = r0
+    for year in range(1, shocks.shape[1]):
+        previous = rates[:, year - 1]
+        mean = long_term_mean + (previous - long_term_mean) * decay
+        if model == "vasicek":
+            std = volatility * np.sqrt(spread)
+            rates[:, year] = mean + std * shocks[:, year]
+        else:
+            # CIR: sigma^2 r dt s sigma kalibrovanou tak, aby při r = theta odpovídala volatility
+            sigma2 = volatility ** 2 / max(long_term_mean, 1e-9)
+            variance = (previous * sigma2 * decay * (1 - decay) / mean_reversion
+                        + long_term_mean * sigma2 * (1 - decay) ** 2 / (2 * mean_reversion))
+            rates[:, year] = np.maximum(0.0, mean + np.sqrt(np.maximum(variance, 0.0)) * shocks[:, year])
+    return rates
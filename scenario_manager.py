@@ -1,6 +1,7 @@
 import json
 import os
 import streamlit as st
+from streamlit.runtime.state import get_session_state
 
 # Functionality for local file operations (might not be persistent in cloud)
 SCENARIO_FILE = "scenarios.json"
@@ -36,15 +37,47 @@ def delete_scenario(name):
 
 # Functionality for State Management (Cloud/File Independent)
 
+# Klíče, které explicitně nechceme ukládat (např. výsledky importu, nahrané soubory,
+# stav běžící simulace, tlačítka a navigace mezi záložkami)
+EXCLUDED_KEYS = {
+    "uploaded_scenario_json", "import_status", "opt_active", "opt_result", "opt_grid", "FormSubmitter",
+    "mc_history_uploaded", "mc_history_upload", "mc_last", "mc_job", "mc_cancel",
+    "clear_compute_cache", "active_tab"
+}
+
+# Typy hodnot widgetů, které Streamlit nedovolí nastavit přes session_state
+# (tlačítka, nahrávání souborů); zápis by při dalším renderu vyhodil
+# StreamlitValueAssignmentNotAllowedError
+_TRIGGER_VALUE_TYPES = {
+    "trigger_value", "string_trigger_value", "json_trigger_value", "chat_input_value",
+    "file_uploader_state_value"
+}
+
+
+def _is_transient_widget(key):
+    """Patří klíč tlačítku, nahrávání souboru nebo widgetu uvnitř fragmentu?"""
+    try:
+        state = get_session_state()._state
+        widget_id = state._key_id_mapper.get_id_from_key(key)
+        metadata = state._new_widget_state.widget_metadata.get(widget_id) if widget_id else None
+    except AttributeError:
+        # Jiná verze Streamlitu (interní API): platí jen EXCLUDED_KEYS
+        return False
+    if metadata is None:
+        return False
+    return metadata.value_type in _TRIGGER_VALUE_TYPES or metadata.fragment_id is not None
+
+
+def _is_restorable(key):
+    return key not in EXCLUDED_KEYS and not _is_transient_widget(key)
+
+
 def get_current_inputs():
     """Vrátí slovník všech JSON-serializovatelných vstupů ze session state."""
     data = {}
-    
-    # Klíče, které explicitně nechceme ukládat (např. výsledky importu, nahrané soubory)
-    excluded_keys = {"uploaded_scenario_json", "import_status", "opt_result", "FormSubmitter"}
 
     for key, value in st.session_state.items():
-        if key in excluded_keys:
+        if not _is_restorable(key):
             continue
             
         # Ukládáme jen základní datové typy
@@ -54,11 +87,14 @@ def get_current_inputs():
     return data
 
 def apply_scenario(scenario_data):
-    """Aplikuje data scénáře do session state."""
+    """Aplikuje data scénáře do session state (klíče tlačítek apod. ze starších exportů přeskočí)."""
     if not scenario_data:
         return
         
     for key, value in scenario_data.items():
+        if not _is_restorable(key):
+            continue
+
         # U range slideru musíme zajistit, že hodnota je tuple (v JSON se ukládá jako list)
         if key == "opt_ltv_range" and isinstance(value, list):
             value = tuple(value)
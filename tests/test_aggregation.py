@@ -0,0 +1,84 @@
+import unittest
+import sys
+import os
+import numpy as np
+
+# Add parent directory to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logic.aggregation import ControlVariate, FixedHistogram, OnlineMoments, PercentileBands, QuantileSketch
+
+
+class TestStreamingAggregates(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        self.values = np.concatenate([rng.normal(5, 3, 60_000), rng.standard_t(3, 40_000) * 4 - 2])
+        self.chunks = np.array_split(self.values, 13)
+
+    def test_online_moments_match_numpy(self):
+        merged = OnlineMoments()
+        for chunk in self.chunks:
+            merged.merge(OnlineMoments().update(chunk))
+        self.assertEqual(merged.count, self.values.size)
+        self.assertAlmostEqual(merged.mean, self.values.mean(), places=10)
+        self.assertAlmostEqual(merged.variance, self.values.var(ddof=1), places=8)
+
+    def test_quantile_sketch_accuracy(self):
+        """Sloučený sketch dávek odhadne kvantily s malou chybou v pořadí (rank error)."""
+        merged = QuantileSketch()
+        for chunk in self.chunks:
+            merged.merge(QuantileSketch().update(chunk))
+        self.assertLess(merged.means.size, 1_000)
+
+        sorted_values = np.sort(self.values)
+        for q in (0.001, 0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99, 0.999):
+            estimate = merged.quantile(q)
+            rank = np.searchsorted(sorted_values, estimate) / self.values.size
+            self.assertAlmostEqual(rank, q, delta=0.005, msg=f"q={q}")
+        self.assertEqual(merged.quantile(0.0), self.values.min())
+        self.assertEqual(merged.quantile(1.0), self.values.max())
+
+    def test_histogram_merge(self):
+        edges = np.linspace(-10, 10, 41)
+        merged = FixedHistogram(edges)
+        for chunk in self.chunks:
+            merged.merge(FixedHistogram(edges).update(chunk))
+        np.testing.assert_array_equal(merged.counts, np.histogram(self.values, bins=edges)[0])
+        self.assertEqual(merged.counts.sum() + merged.underflow + merged.overflow, self.values.size)
+
+    def test_percentile_bands_for_all_years_at_once(self):
+        """Pásma ze sloučených dávek ~ np.percentile(axis=0) celé matice (rank error < 1 %)."""
+        rng = np.random.default_rng(3)
+        years = 12
+        paths = np.cumsum(rng.standard_t(4, (50_000, years)), axis=1) * 1e5 + np.arange(years) * 3e5
+        merged = PercentileBands(years)
+        for chunk in np.array_split(paths, 17):
+            merged.merge(PercentileBands(years).update(chunk))
+        self.assertAlmostEqual(merged.count, paths.shape[0])
+        self.assertLessEqual(merged.weights.size, 2 * merged.levels)
+
+        bands = merged.bands((1, 5, 25, 50, 75, 95, 99))
+        sorted_paths = np.sort(paths, axis=0)
+        for p, band in bands.items():
+            self.assertEqual(band.shape, (years,))
+            ranks = [np.searchsorted(sorted_paths[:, y], band[y]) / paths.shape[0] for y in range(years)]
+            np.testing.assert_allclose(ranks, p / 100, atol=0.01, err_msg=f"P{p}")
+        np.testing.assert_array_equal(merged.bands((0, 100))[0], paths.min(axis=0))
+
+    def test_control_variate_merge_matches_regression(self):
+        """Sloučené dávky dají stejné beta i upravený průměr jako celý vzorek."""
+        rng = np.random.default_rng(2)
+        c = rng.normal(1.0, 2.0, self.values.size)
+        y = self.values + 3 * c
+        merged = ControlVariate(expected=1.0)
+        for y_chunk, c_chunk in zip(np.array_split(y, 13), np.array_split(c, 13)):
+            merged.merge(ControlVariate(expected=1.0).update(y_chunk, c_chunk))
+
+        beta = np.cov(y, c)[0, 1] / c.var(ddof=1)
+        self.assertAlmostEqual(merged.beta, beta, places=8)
+        self.assertAlmostEqual(merged.mean, y.mean() - beta * (c.mean() - 1.0), places=8)
+
+
+if __name__ == '__main__':
+    unittest.main()
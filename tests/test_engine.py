@@ -0,0 +1,136 @@
+import unittest
+import sys
+import os
+import numpy as np
+
+# Add parent directory to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import calculations
+
+BASE_PARAMS = dict(
+    purchase_price=5_450_000,
+    down_payment=545_000,
+    one_off_costs=150_000,
+    interest_rate=5.4,
+    loan_term_years=30,
+    monthly_rent=18_000,
+    monthly_expenses=3_500,
+    vacancy_months=1.0,
+    tax_rate=15.0,
+    appreciation_rate=3.0,
+    rent_growth_rate=2.0,
+    holding_period=12,
+    etf_comparison=True,
+    etf_return=8.0,
+    initial_fx_rate=25.0,
+    fx_appreciation=0.5,
+    time_test_vars={"enabled": True, "years": 10},
+    sale_fee_percent=3.0
+)
+
+SCALAR_KEYS = [
+    "irr", "total_profit", "real_total_profit", "etf_irr", "monthly_cashflow_y1",
+    "real_monthly_cashflow_y1", "tax_paid_y1", "capital_gains_tax",
+    "initial_investment", "initial_mortgage"
+]
+
+
+class TestBatchEngine(unittest.TestCase):
+
+    def assert_matches_scalar(self, batch, row, scalar):
+        for key in SCALAR_KEYS:
+            self.assertAlmostEqual(batch[key][row], scalar[key], delta=1e-6 * max(1, abs(scalar[key])), msg=key)
+        for key, values in scalar['series'].items():
+            np.testing.assert_allclose(batch['series'][key][row], values, rtol=1e-9, atol=1e-6, err_msg=key)
+
+    def test_scalar_inputs_match_calculate_metrics(self):
+        """Dávka s jedním scénářem musí dát stejná čísla jako skalární výpočet."""
+        for etf in (True, False):
+            for holding in (1, 5, 12, 35):
+                params = dict(BASE_PARAMS, etf_comparison=etf, holding_period=holding)
+                scalar = calculations.calculate_metrics(**params)
+                batch = calculations.calculate_metrics_batch(**params)
+                self.assert_matches_scalar(batch, 0, scalar)
+
+    def test_per_scenario_paths_match_calculate_metrics(self):
+        """(N, years) cesty sazeb odpovídají N voláním calculate_metrics (Monte Carlo)."""
+        rng = np.random.default_rng(42)
+        n, years = 20, BASE_PARAMS['holding_period']
+        app = rng.normal(3.0, 2.0, size=(n, years))
+        rent = rng.normal(2.0, 1.5, size=(n, years))
+        etf = rng.normal(8.0, 15.0, size=(n, years))
+        ltv = rng.uniform(0, 100, size=n)
+        down = BASE_PARAMS['purchase_price'] * (1 - ltv / 100)
+
+        params = dict(BASE_PARAMS, appreciation_rate=app, rent_growth_rate=rent,
+                      etf_return=etf, down_payment=down)
+        batch = calculations.calculate_metrics_batch(**params)
+
+        for i in range(n):
+            scalar = calculations.calculate_metrics(**dict(
+                params, appreciation_rate=app[i], rent_growth_rate=rent[i],
+                etf_return=etf[i], down_payment=down[i]
+            ))
+            self.assert_matches_scalar(batch, i, scalar)
+
+    def test_output_shapes(self):
+        n, years = 7, BASE_PARAMS['holding_period']
+        batch = calculations.calculate_metrics_batch(**dict(BASE_PARAMS, tax_rate=np.full(n, 15.0)))
+        self.assertEqual(batch['irr'].shape, (n,))
+        self.assertEqual(batch['series']['property_values'].shape, (n, years))
+        self.assertEqual(batch['series']['cashflows'].shape, (n, years + 1))
+        self.assertEqual(batch['series']['etf_values'].shape, (n, years))
+
+    def test_nominal_only_batch_skips_real_values(self):
+        nominal = calculations.calculate_metrics_batch(**BASE_PARAMS, real_values=False)
+        full = calculations.calculate_metrics_batch(**BASE_PARAMS)
+        self.assertNotIn('real_total_profit', nominal)
+        self.assertFalse(any(key.startswith('real_') for key in nominal['series']))
+        np.testing.assert_array_equal(nominal['irr'], full['irr'])
+
+
+class TestHoldingPeriodCurve(unittest.TestCase):
+
+    def test_matches_calculate_metrics_for_every_exit_year(self):
+        """Jedna simulace horizontu = calculate_metrics pro každý rok exitu zvlášť."""
+        params = {k: v for k, v in BASE_PARAMS.items()
+                  if k not in ("holding_period", "etf_comparison", "etf_return", "initial_fx_rate", "fx_appreciation")}
+        curve = calculations.calculate_holding_period_curve(max_holding_period=30, **params)
+        self.assertEqual(curve['irr'].shape, (1, 30))
+
+        for holding in range(1, 31):
+            scalar = calculations.calculate_metrics(
+                holding_period=holding, etf_comparison=False, etf_return=0,
+                initial_fx_rate=25, fx_appreciation=0, **params
+            )
+            col = holding - 1
+            self.assertAlmostEqual(curve['irr'][0, col], scalar['irr'], places=6)
+            self.assertAlmostEqual(curve['total_profit'][0, col], scalar['total_profit'], delta=1e-3)
+            self.assertAlmostEqual(curve['capital_gains_tax'][0, col], scalar['capital_gains_tax'], delta=1e-3)
+
+
+class TestLtvHoldingGrid(unittest.TestCase):
+
+    def test_grid_rows_match_single_ltv_curves(self):
+        params = {k: v for k, v in BASE_PARAMS.items()
+                  if k not in ("down_payment", "holding_period", "etf_comparison", "etf_return",
+                               "initial_fx_rate", "fx_appreciation")}
+        grid = calculations.evaluate_ltv_holding_grid(ltv_min=0, ltv_max=100, ltv_step=10, max_holding_period=40, **params)
+        self.assertEqual(grid['irr'].shape, (11, 40))
+        np.testing.assert_allclose(grid['ltv'], np.arange(0, 101, 10))
+
+        for row, ltv in enumerate(grid['ltv']):
+            curve = calculations.calculate_holding_period_curve(
+                down_payment=params['purchase_price'] * (1 - ltv / 100), max_holding_period=40, **params
+            )
+            np.testing.assert_allclose(grid['irr'][row], curve['irr'][0], rtol=1e-9)
+
+        best = grid['best']
+        self.assertAlmostEqual(best['irr'], np.nanmax(grid['irr']))
+        row = list(grid['ltv']).index(best['ltv'])
+        self.assertAlmostEqual(grid['irr'][row, best['years'] - 1], best['irr'])
+
+
+if __name__ == '__main__':
+    unittest.main()
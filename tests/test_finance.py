@@ -0,0 +1,178 @@
+import unittest
+import sys
+import os
+import numpy as np
+import numpy_financial as npf
+
+# Add parent directory to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logic.finance import (
+    build_amortization_schedule, build_variable_rate_schedule, calculate_mortgage_payment, irr_batch,
+    update_remaining_balance
+)
+
+
+class TestIrrBatch(unittest.TestCase):
+
+    def test_matches_numpy_financial(self):
+        """Dávkové IRR musí odpovídat npf.irr řádek po řádku."""
+        rng = np.random.default_rng(0)
+        n, years = 200, 15
+        cashflows = np.concatenate([
+            -rng.uniform(0.5e6, 2e6, size=(n, 1)),
+            rng.normal(20_000, 60_000, size=(n, years - 1)),
+            rng.uniform(1e6, 8e6, size=(n, 1))
+        ], axis=1)
+
+        rates = irr_batch(cashflows)
+        expected = np.array([npf.irr(row) for row in cashflows])
+        np.testing.assert_allclose(rates, expected, rtol=1e-8, atol=1e-10)
+
+    def test_documented_examples(self):
+        cashflows = [
+            [-100, 39, 59, 55, 20],
+            [-100, 0, 0, 74],
+            [-100, 100, 0, -7],
+            [-100, 100, 0, 7],
+        ]
+        for row in cashflows:
+            self.assertAlmostEqual(irr_batch([row])[0], npf.irr(row), places=8)
+
+    def test_no_root_is_nan(self):
+        """Cashflow bez změny znaménka nemá IRR -> NaN místo tiché nuly."""
+        rates = irr_batch([[-100, -10, -10], [0, 0, 0], [-100, 50, 60]])
+        self.assertTrue(np.isnan(rates[0]))
+        self.assertTrue(np.isnan(rates[1]))
+        self.assertAlmostEqual(rates[2], npf.irr([-100, 50, 60]), places=8)
+
+    def test_bad_guess_falls_back_to_bisection(self):
+        """I se špatným startem (mimo oblast konvergence) najde správný kořen."""
+        row = [-1_000_000, 0, 0, 0, 0, 0, 0, 0, 0, 0, 30_000_000]
+        rates = irr_batch([row], guess=50.0)
+        self.assertAlmostEqual(rates[0], npf.irr(row), places=8)
+
+    def test_multiple_sign_changes_pick_npf_root(self):
+        """Při více kořenech vybere stejně jako npf.irr ten s nejmenší |r|."""
+        cashflows = [
+            [-100, 230, -132],                 # kořeny 10 % a 20 %
+            [-1, 6, -11, 6],                   # kořeny 0 %, 100 %, 200 %
+            [0, -100, 100, 0, -7, 0],          # nuly na začátku i na konci
+            [-100, 500, -800, 410],            # jediný reálný kořen
+        ]
+        for row in cashflows:
+            # Start u vzdálenějšího kořene nesmí výběr změnit
+            for guess in (0.05, 0.19, 1.5):
+                self.assertAlmostEqual(irr_batch([row], guess=guess)[0], npf.irr(row), places=8)
+
+        rng = np.random.default_rng(1)
+        cashflows = rng.normal(0, 1, size=(500, 12))
+        cashflows[:, 0] = -np.abs(cashflows[:, 0]) - 0.5
+        cashflows[rng.random(cashflows.shape) < 0.1] = 0
+        expected = np.array([npf.irr(row) for row in cashflows])
+        np.testing.assert_allclose(irr_batch(cashflows), expected, rtol=1e-8, atol=1e-10)
+
+
+class TestAmortizationSchedule(unittest.TestCase):
+
+    def test_matches_iterated_fv_and_ipmt(self):
+        """Zůstatky = opakované npf.fv po roce, úroky = součet npf.ipmt za 12 měsíců."""
+        loans = np.array([4_000_000, 2_500_000, 0])
+        rates = np.array([5.4, 0.0, 4.0])
+        terms = np.array([30, 20, 30])
+        horizon = 35
+        schedule = build_amortization_schedule(loans, rates, terms, horizon)
+        self.assertEqual(schedule['balances'].shape, (3, horizon))
+
+        for i in range(len(loans)):
+            payment, monthly_rate = calculate_mortgage_payment(loans[i], rates[i], terms[i])
+            balance = loans[i]
+            for y in range(horizon):
+                balance = update_remaining_balance(balance, monthly_rate, payment)
+                self.assertAlmostEqual(schedule['balances'][i, y], balance, delta=1e-4)
+
+                if y < terms[i] and loans[i] > 0:
+                    months = np.arange(12 * y + 1, 12 * y + 13)
+                    interest = np.sum(npf.ipmt(monthly_rate, months, terms[i] * 12, -loans[i])) if monthly_rate > 0 else 0
+                else:
+                    interest = 0
+                self.assertAlmostEqual(schedule['interest'][i, y], interest, delta=1e-4)
+
+    def test_monthly_schedule(self):
+        schedule = build_amortization_schedule(4_000_000, 5.4, 30, 30, monthly=True)
+        monthly = schedule['monthly_balances']
+        self.assertEqual(monthly.shape, (30 * 12 + 1,))
+        self.assertAlmostEqual(monthly[0], 4_000_000)
+        self.assertAlmostEqual(monthly[-1], 0)
+        np.testing.assert_allclose(monthly[12::12], schedule['balances'])
+        # Jistina + úrok = splátky
+        np.testing.assert_allclose(schedule['principal'] + schedule['interest'], schedule['payments'])
+
+    def test_monthly_interest_and_principal(self):
+        """Měsíční úrok a jistina = npf.ipmt a npf.ppmt, součty za rok = roční řady."""
+        loans = np.array([4_000_000, 0])
+        schedule = build_amortization_schedule(loans, [5.4, 4.0], [20, 30], 25, monthly=True)
+        interest, principal = schedule['monthly_interest'], schedule['monthly_principal']
+        self.assertEqual(interest.shape, (2, 25 * 12))
+
+        months = np.arange(1, 20 * 12 + 1)
+        rate = 5.4 / 1200
+        np.testing.assert_allclose(interest[0, :240], -npf.ipmt(rate, months, 240, loans[0]), rtol=1e-9)
+        np.testing.assert_allclose(principal[0, :240], -npf.ppmt(rate, months, 240, loans[0]), rtol=1e-9)
+        np.testing.assert_allclose(interest[:, 240:], 0, atol=1e-6)
+        np.testing.assert_allclose(interest[1], 0)
+
+        np.testing.assert_allclose(interest.reshape(2, 25, 12).sum(axis=-1), schedule['interest'], atol=1e-4)
+        np.testing.assert_allclose(principal.reshape(2, 25, 12).sum(axis=-1), schedule['principal'], atol=1e-4)
+
+
+class TestVariableRateSchedule(unittest.TestCase):
+
+    def test_constant_path_matches_fixed_schedule(self):
+        loans = np.array([4_000_000, 2_500_000, 0])
+        rates = np.array([5.4, 0.0, 4.0])
+        terms = np.array([30, 20, 30])
+        fixed = build_amortization_schedule(loans, rates, terms, 35)
+        variable = build_variable_rate_schedule(loans, np.repeat(rates[:, None], 35, axis=1), terms, 35)
+        for key in ("balances", "interest", "principal", "payments"):
+            np.testing.assert_allclose(variable[key], fixed[key], atol=1e-6, err_msg=key)
+
+    def test_payment_is_repriced_every_year(self):
+        """Každý rok nová anuita ze zbývající jistiny a splatnosti (calculate_mortgage_payment)."""
+        path = np.array([[5.0, 6.5, 3.0, 4.0]])
+        schedule = build_variable_rate_schedule(3_000_000, path, 25, 4)
+        balance = 3_000_000
+        for year, rate in enumerate(path[0]):
+            payment, monthly_rate = calculate_mortgage_payment(balance, rate, 25 - year)
+            self.assertAlmostEqual(schedule['monthly_payment'][0, year], payment, places=6)
+            balance = update_remaining_balance(balance, monthly_rate, payment)
+            self.assertAlmostEqual(schedule['balances'][0, year], balance, delta=1e-4)
+
+    def test_rate_and_payment_fixed_until_refixation(self):
+        """Při 3leté fixaci se sazba i splátka mění jen v letech 0, 3, 6."""
+        path = np.array([[5.0, 9.0, 9.0, 3.0, 8.0, 8.0, 6.0]])
+        schedule = build_variable_rate_schedule(3_000_000, path, 25, 7, fixation_years=3)
+        payments = schedule['monthly_payment'][0]
+        np.testing.assert_allclose(schedule['monthly_rate'][0] * 1200, [5, 5, 5, 3, 3, 3, 6])
+        self.assertEqual(len(np.unique(payments[:3])), 1)
+        self.assertEqual(len(np.unique(payments[3:6])), 1)
+
+        balance = 3_000_000
+        for year in range(7):
+            if year % 3 == 0:
+                payment, monthly_rate = calculate_mortgage_payment(balance, path[0, year], 25 - year)
+                self.assertAlmostEqual(payments[year], payment, places=6)
+            balance = update_remaining_balance(balance, monthly_rate, payment)
+            self.assertAlmostEqual(schedule['balances'][0, year], balance, delta=1e-4)
+
+    def test_vectorized_mortgage_payment(self):
+        loans = np.array([3_000_000, 0, 1_000_000])
+        payments, rates = calculate_mortgage_payment(loans, np.array([5.0, 4.0, 0.0]), 25)
+        for i, loan in enumerate(loans):
+            expected = calculate_mortgage_payment(loan, [5.0, 4.0, 0.0][i], 25)
+            self.assertAlmostEqual(payments[i], expected[0], places=8)
+            self.assertAlmostEqual(rates[i], expected[1], places=12)
+
+
+if __name__ == '__main__':
+    unittest.main()
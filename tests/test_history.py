@@ -0,0 +1,98 @@
+import unittest
+import sys
+import os
+import tempfile
+from unittest import mock
+import numpy as np
+
+# Add parent directory to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import calculations
+from logic import history as history_module
+from logic.history import block_bootstrap_indices, bootstrap_paths, history_means, load_history, resolve_history_path
+from tests.test_monte_carlo import MC_PARAMS
+
+
+class TestHistoricalBootstrap(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.converted_dir = os.path.join(self.tmp.name, "converted")
+        patcher = mock.patch.object(history_module, "CONVERTED_DIR", self.converted_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        rng = np.random.default_rng(0)
+        self.n_years = 40
+        self.data = {
+            "year": np.arange(1985, 1985 + self.n_years),
+            "property": rng.normal(4, 5, self.n_years).round(3),
+            "msci_world": rng.normal(8, 17, self.n_years).round(3),
+        }
+        self.csv = os.path.join(self.tmp.name, "history.csv")
+        with open(self.csv, "w") as f:
+            f.write("year,property,msci_world\n")
+            for row in zip(*self.data.values()):
+                f.write(",".join(str(v) for v in row) + "\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_csv_is_memory_mapped(self):
+        history = load_history(self.csv)
+        self.assertIsInstance(history, np.memmap)
+        # Převod CSV jde do vlastní cache, ne vedle zdrojového souboru
+        self.assertFalse(os.path.exists(self.csv + ".npy"))
+        self.assertEqual(len(os.listdir(self.converted_dir)), 1)
+        np.testing.assert_allclose(history["property"], self.data["property"])
+
+    def test_paths_are_restricted_to_history_dir(self):
+        root = os.path.join(self.tmp.name, "data")
+        os.makedirs(root)
+        inside = os.path.join(root, "history.csv")
+        self.assertEqual(resolve_history_path(inside, root), os.path.realpath(inside))
+        for outside in (self.csv, os.path.join(root, "..", "history.csv"), "/etc/passwd", root):
+            with self.assertRaises(ValueError):
+                resolve_history_path(outside, root)
+        # Symbolický odkaz z adresáře ven se vyřeší a odmítne
+        link = os.path.join(root, "link.csv")
+        os.symlink(self.csv, link)
+        with self.assertRaises(ValueError):
+            resolve_history_path(link, root)
+
+    def test_blocks_are_contiguous_and_circular(self):
+        rng = np.random.default_rng(1)
+        idx = block_bootstrap_indices(rng, 1_000, 12, self.n_years, block_size=4)
+        self.assertEqual(idx.shape, (1_000, 12))
+        steps = np.diff(idx, axis=1) % self.n_years
+        # Uvnitř bloku jdou roky po sobě (i přes konec historie)
+        np.testing.assert_array_equal(steps[:, [0, 1, 2, 4, 5, 6, 8, 9, 10]], 1)
+        # Kruhový bootstrap vybírá každý rok stejně často
+        counts = np.bincount(block_bootstrap_indices(rng, 50_000, 12, self.n_years, 4).ravel(), minlength=self.n_years)
+        self.assertLess(counts.std() / counts.mean(), 0.02)
+
+    def test_columns_share_historical_years(self):
+        rng = np.random.default_rng(2)
+        paths = bootstrap_paths(rng, 500, 10, self.csv, ["property", "msci_world"], block_size=3)
+        lookup = {p: m for p, m in zip(self.data["property"], self.data["msci_world"])}
+        for p, m in zip(paths[:, :, 0].ravel(), paths[:, :, 1].ravel()):
+            self.assertEqual(lookup[p], m)
+        with self.assertRaises(ValueError):
+            bootstrap_paths(rng, 5, 10, self.csv, ["cz_rent"])
+
+    def test_monte_carlo_with_history(self):
+        history = {"path": self.csv, "columns": {"appreciation": "property", "etf": "msci_world"}, "block_size": 5}
+        paths = calculations.run_monte_carlo(n_simulations=2_000, seed=3, history=history, **MC_PARAMS)
+        growth = paths['series']['property_values'][:, 1:] / paths['series']['property_values'][:, :-1] - 1
+        self.assertTrue(np.all(np.isin(np.round(growth * 100, 3), self.data["property"])))
+
+        agg = calculations.run_monte_carlo(
+            n_simulations=5_000, seed=3, streaming=True, control_variate=True, history=history, **MC_PARAMS
+        )
+        self.assertEqual(agg.n_paths, 5_000)
+        self.assertGreater(agg.irr_control.correlation, 0.9)
+        np.testing.assert_allclose(history_means(self.csv, ["property"]), self.data["property"].mean())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+import sys
+import os
+import tempfile
+import threading
+import numpy as np
+
+# Add parent directory to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import calculations
+from logic.jobs import CANCELLED, DONE, FAILED, JobManager
+from logic.result_store import ResultStore
+from tests.test_monte_carlo import MC_PARAMS
+
+
+class TestJobManager(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = ResultStore(self.tmp.name)
+        self.jobs = JobManager()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_job_reports_progress_and_result(self):
+        job = self.jobs.submit(
+            calculations.run_monte_carlo_stored, self.store, 3_000, seed=1, chunk_size=1_000, **MC_PARAMS
+        )
+        job._future.result()
+        self.assertEqual(job.status, DONE)
+        self.assertEqual(job.progress, 1.0)
+        self.assertEqual(job.result.n_paths, 3_000)
+        self.assertEqual(job.partial().n_paths, 3_000)
+        self.assertIs(self.jobs.get(job.id), job)
+
+    def test_cancel_stops_after_current_chunk_with_partial_results(self):
+        first_chunk = threading.Event()
+        release = threading.Event()
+
+        def slow(*args, progress, **kwargs):
+            def report(aggregator, fraction):
+                progress(aggregator, fraction)
+                first_chunk.set()
+                release.wait(5)
+            return calculations.run_monte_carlo_stored(*args, progress=report, **kwargs)
+
+        job = self.jobs.submit(slow, self.store, 5_000, seed=1, chunk_size=1_000, **MC_PARAMS)
+        self.assertTrue(first_chunk.wait(30))
+        job.cancel()
+        release.set()
+        job._future.result()
+        self.assertEqual(job.status, CANCELLED)
+        # Dávka rozpracovaná při zrušení se ještě započte, další už se nespustí
+        self.assertEqual(job.partial().n_paths, 2_000)
+        self.assertAlmostEqual(job.progress, 0.4)
+        # Zrušený běh se do úložiště nedostane
+        self.assertEqual(self.store.list_runs(), [])
+
+    def test_parallel_job_matches_serial_run(self):
+        """Procesy spuštěné z vlákna úlohy dávají stejné cesty jako sériový běh."""
+        params = dict(
+            MC_PARAMS, seed=8, chunk_size=300, control_variate=True,
+            operations={"turnover_rate": 40, "lease_indexation": 2.0, "repair_rate": 0.5, "repair_cost": 25_000}
+        )
+        job = self.jobs.submit(calculations.run_monte_carlo_stored, self.store, 900, n_workers=2, **params)
+        job._future.result()
+        self.assertEqual(job.status, DONE)
+        serial = calculations.run_monte_carlo(n_simulations=900, **params)
+        np.testing.assert_array_equal(job.result['irr'], serial['irr'])
+
+    def test_errors_are_kept_on_the_job(self):
+        job = self.jobs.submit(
+            calculations.run_monte_carlo_until_converged, seed=1, **dict(MC_PARAMS, sampling="lhs")
+        )
+        job._future.result()
+        self.assertEqual(job.status, FAILED)
+        self.assertIsInstance(job.error, ValueError)
+
+
+if __name__ == '__main__':
+    unittest.main()
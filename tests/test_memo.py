@@ -0,0 +1,129 @@
+import unittest
+import sys
+import os
+import tempfile
+import numpy as np
+
+# Add parent directory to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import calculations
+from logic.memo import LRUCache, canonical_key, estimate_size, memoize
+
+METRICS_PARAMS = dict(
+    purchase_price=5_000_000, down_payment=1_000_000, one_off_costs=100_000,
+    interest_rate=5.0, loan_term_years=30,
+    monthly_rent=20_000, monthly_expenses=4_000, vacancy_months=1, tax_rate=15,
+    appreciation_rate=3.0, rent_growth_rate=2.0, holding_period=10,
+    etf_comparison=True, etf_return=7.0, initial_fx_rate=25.0, fx_appreciation=0.0,
+    time_test_vars={"enabled": True, "years": 10}
+)
+
+
+class TestCanonicalKey(unittest.TestCase):
+
+    def test_equivalent_inputs_share_key(self):
+        self.assertEqual(canonical_key(5), canonical_key(5.0))
+        self.assertEqual(canonical_key(np.float64(2.5)), canonical_key(2.5))
+        self.assertEqual(canonical_key({"a": 1, "b": [1, 2]}), canonical_key({"b": (1.0, 2.0), "a": 1.0}))
+        self.assertEqual(canonical_key(np.arange(3.0)), canonical_key(np.arange(3.0)))
+
+    def test_different_inputs_differ(self):
+        self.assertNotEqual(canonical_key(True), canonical_key(1.0))
+        self.assertNotEqual(canonical_key(np.arange(3.0)), canonical_key(np.arange(1.0, 4.0)))
+        self.assertNotEqual(canonical_key(np.zeros(4)), canonical_key(np.zeros((2, 2))))
+
+
+class TestMemoize(unittest.TestCase):
+
+    def test_lru_eviction_and_counters(self):
+        cache = LRUCache(maxsize=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        self.assertEqual(cache.get("a"), 1)   # "b" je teď nejstarší
+        cache.put("c", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+        self.assertEqual(len(cache), 2)
+
+    def test_memory_budget_and_namespace_limit(self):
+        cache = LRUCache(maxsize=100, max_bytes=3 * 8_200)
+        for i in range(3):
+            cache.put(i, np.zeros(1_000), namespace="pole")
+        cache.put("x", np.zeros(1_000), namespace="jine")
+        # Rozpočet stačí na tři pole: vypadlo nejstarší
+        self.assertEqual(len(cache), 3)
+        self.assertIsNone(cache.get(0, namespace="pole"))
+        self.assertLessEqual(cache.nbytes, cache.max_bytes)
+        self.assertEqual(cache.stats("pole")["evictions"], 1)
+        # Záznam větší než celý rozpočet se neuloží
+        cache.put("velke", np.zeros(10_000), namespace="jine")
+        self.assertIsNone(cache.get("velke", namespace="jine"))
+        # Limit prostoru vyhazuje jen jeho záznamy
+        cache.put(3, 1.0, namespace="pole", limit=1)
+        self.assertEqual(cache.stats("pole")["size"], 1)
+        self.assertIsNotNone(cache.get("x", namespace="jine"))
+
+    def test_ttl_expires_entries(self):
+        now = [0.0]
+        cache = LRUCache(ttl=10, clock=lambda: now[0])
+        cache.put("a", 1)
+        now[0] = 5.0
+        self.assertEqual(cache.get("a"), 1)
+        now[0] = 16.0
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats()["expired"], 1)
+        self.assertEqual(len(cache), 0)
+
+    def test_estimate_size_counts_array_data(self):
+        self.assertGreater(estimate_size({"a": np.zeros(10_000)}), 80_000)
+        self.assertGreater(estimate_size([np.zeros(1_000)] * 5), 8_000)
+        self.assertLess(estimate_size([np.zeros(1_000)] * 5), 2 * 8_000)
+
+    def test_estimate_size_counts_views_by_their_owner(self):
+        # Pohled (reshape, řez) drží celé dočasné pole, které jinde nikdo nedrží
+        self.assertGreater(estimate_size(np.zeros(10_000).reshape(100, 100)), 80_000)
+        self.assertGreater(estimate_size(np.zeros(10_000)[:10]), 80_000)
+        owner = np.zeros(10_000)
+        self.assertLess(estimate_size([owner[:5_000], owner[5_000:], owner]), 2 * 80_000)
+        # Data namapovaná ze souboru nejsou v paměti
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "a.npy")
+            np.save(path, np.zeros(10_000))
+            mapped = np.load(path, mmap_mode="r")
+            self.assertLess(estimate_size(mapped), 1_000)
+            self.assertLess(estimate_size(mapped[:5_000].reshape(50, 100)), 1_000)
+            del mapped
+
+    def test_arguments_are_bound_to_signature(self):
+        calls = []
+
+        @memoize(maxsize=8)
+        def add(a, b=1):
+            calls.append((a, b))
+            return {"sum": [a + b]}
+
+        self.assertEqual(add(1), {"sum": [2]})
+        self.assertEqual(add(a=1.0, b=1), {"sum": [2]})
+        add(2)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(add.cache_info()["hits"], 1)
+        self.assertEqual(add.cache_info()["size"], 2)
+
+    def test_calculate_metrics_cached_result_is_read_only(self):
+        calculations.calculate_metrics.cache_clear()
+        first = calculations.calculate_metrics(**METRICS_PARAMS)
+        second = calculations.calculate_metrics(**dict(METRICS_PARAMS, vacancy_months=1.0))
+        info = calculations.calculate_metrics.cache_info()
+        self.assertEqual((info["hits"], info["misses"]), (1, 1))
+        # Výsledek se z cache sdílí bez kopie, proto ho nejde změnit
+        self.assertIs(first, second)
+        with self.assertRaises(ValueError):
+            first["series"]["cashflows"][0] = 0.0
+        with self.assertRaises(AttributeError):
+            first.irr = -1.0
+
+
+if __name__ == '__main__':
+    unittest.main()
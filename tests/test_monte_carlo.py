@@ -0,0 +1,260 @@
+import unittest
+import sys
+import os
+from concurrent.futures import ProcessPoolExecutor
+from unittest import mock
+import numpy as np
+
+# Add parent directory to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import calculations
+from logic.monte_carlo import chunk_generators
+from logic.scenarios import draw_standard_normals
+
+MC_PARAMS = dict(
+    purchase_price=5_000_000,
+    down_payment=1_000_000,
+    one_off_costs=150_000,
+    interest_rate=5.4,
+    loan_term_years=30,
+    monthly_rent=18_000,
+    monthly_expenses=3_500,
+    vacancy_months=1.0,
+    tax_rate=15.0,
+    holding_period=10,
+    initial_fx_rate=25.0,
+    fx_appreciation=0.0,
+    appreciation_rate_mean=3.0,
+    rent_growth_rate_mean=2.0,
+    etf_comparison=True,
+    etf_return_mean=8.0,
+    appreciation_rate_std=2.0,
+    rent_growth_rate_std=1.5,
+    etf_return_std=15.0,
+    time_test_enabled=True,
+    time_test_years=10,
+    sale_fee_percent=3.0
+)
+
+
+class TestMonteCarloKernel(unittest.TestCase):
+
+    def test_paths_match_scalar_calculation(self):
+        """Každá cesta vektorizovaného jádra = calculate_metrics se stejnými sazbami."""
+        n = 50
+        years = MC_PARAMS['holding_period']
+        mc = calculations.run_monte_carlo(n_simulations=n, seed=7, **MC_PARAMS)
+
+        # Stejné náhodné šoky jako run_monte_carlo (jedna dávka, faktory app, rent, etf)
+        normal_rng = chunk_generators(np.random.SeedSequence(7).spawn(1)[0])[0]
+        z = normal_rng.standard_normal((n, 3, years))
+        app = 3.0 + 2.0 * z[:, 0]
+        rent = 2.0 + 1.5 * z[:, 1]
+        etf = 8.0 + 15.0 * z[:, 2]
+
+        self.assertEqual(mc['irr'].shape, (n,))
+        self.assertEqual(mc['series']['property_values'].shape, (n, years))
+
+        for i in range(n):
+            scalar = calculations.calculate_metrics(
+                purchase_price=5_000_000, down_payment=1_000_000, one_off_costs=150_000,
+                interest_rate=5.4, loan_term_years=30, monthly_rent=18_000, monthly_expenses=3_500,
+                vacancy_months=1.0, tax_rate=15.0, appreciation_rate=app[i], rent_growth_rate=rent[i],
+                holding_period=years, etf_comparison=True, etf_return=etf[i], initial_fx_rate=25.0,
+                fx_appreciation=0.0, time_test_vars={"enabled": True, "years": 10}, sale_fee_percent=3.0
+            )
+            self.assertAlmostEqual(mc['irr'][i], scalar['irr'], places=6)
+            self.assertAlmostEqual(mc['etf_irr'][i], scalar['etf_irr'], places=6)
+            self.assertAlmostEqual(mc['total_profit'][i], scalar['total_profit'], delta=1e-3)
+
+    def test_reproducible_regardless_of_worker_count(self):
+        """Stejný seed -> stejné cesty při sériovém i paralelním běhu."""
+        serial = calculations.run_monte_carlo(n_simulations=1_000, seed=123, chunk_size=250, n_workers=1, **MC_PARAMS)
+        parallel = calculations.run_monte_carlo(n_simulations=1_000, seed=123, chunk_size=250, n_workers=2, **MC_PARAMS)
+        np.testing.assert_array_equal(serial['irr'], parallel['irr'])
+        np.testing.assert_array_equal(serial['series']['cashflows'], parallel['series']['cashflows'])
+
+        other = calculations.run_monte_carlo(n_simulations=1_000, seed=124, chunk_size=250, **MC_PARAMS)
+        self.assertFalse(np.array_equal(serial['irr'], other['irr']))
+
+    def test_worker_processes_are_spawned(self):
+        """Fork vícevláknového serveru může uváznout: pool musí procesy spouštět (spawn)."""
+        with mock.patch("logic.monte_carlo.ProcessPoolExecutor", wraps=ProcessPoolExecutor) as pool:
+            calculations.run_monte_carlo(n_simulations=400, seed=1, chunk_size=200, n_workers=2, **MC_PARAMS)
+        self.assertEqual(pool.call_args.kwargs['mp_context'].get_start_method(), "spawn")
+
+    def test_streaming_summary_matches_path_arrays(self):
+        paths = calculations.run_monte_carlo(n_simulations=3_000, seed=5, chunk_size=700, **MC_PARAMS)
+        agg = calculations.run_monte_carlo(n_simulations=3_000, seed=5, chunk_size=700, streaming=True, **MC_PARAMS)
+        summary = agg.summary()
+
+        self.assertEqual(summary['n_paths'], 3_000)
+        self.assertAlmostEqual(summary['mean_irr'], np.nanmean(paths['irr']), places=8)
+        self.assertAlmostEqual(summary['prob_loss'], (paths['total_profit'] < 0).mean() * 100, places=8)
+        self.assertAlmostEqual(summary['median_irr'], np.nanmedian(paths['irr']), delta=0.05)
+
+        equity = paths['series']['property_values'] - paths['series']['mortgage_balances']
+        fans = agg.fan_bands()
+        np.testing.assert_allclose(fans['equity'][50], np.median(equity, axis=0), rtol=5e-3)
+        cumulative = np.cumsum(paths['series']['operating_cashflows'], axis=1)
+        scale = np.abs(cumulative).max()
+        for p in (5, 50, 95):
+            np.testing.assert_allclose(fans['cumulative_cashflow'][p], np.percentile(cumulative, p, axis=0), atol=0.01 * scale)
+            np.testing.assert_allclose(fans['etf_values'][p], np.percentile(paths['series']['etf_values'], p, axis=0), rtol=0.02)
+
+
+class TestConvergenceMode(unittest.TestCase):
+
+    def test_stops_when_tolerance_reached(self):
+        agg, report = calculations.run_monte_carlo_until_converged(
+            tolerance_irr=0.1, tolerance_prob_loss=1.0, batch_size=2_000,
+            max_paths=200_000, max_seconds=60, seed=3, **MC_PARAMS
+        )
+        self.assertTrue(report['converged'])
+        self.assertEqual(report['n_paths'], agg.n_paths)
+        self.assertLess(report['n_paths'], 200_000)
+        self.assertLessEqual(report['half_widths']['mean_irr'], 0.1)
+        self.assertLessEqual(report['half_widths']['median_irr'], 0.1)
+
+        # Tvrdší tolerance -> více cest
+        _, strict = calculations.run_monte_carlo_until_converged(
+            tolerance_irr=0.05, tolerance_prob_loss=1.0, batch_size=2_000,
+            max_paths=200_000, max_seconds=60, seed=3, **MC_PARAMS
+        )
+        self.assertGreater(strict['n_paths'], report['n_paths'])
+
+    def test_path_budget(self):
+        _, report = calculations.run_monte_carlo_until_converged(
+            tolerance_irr=1e-6, batch_size=1_000, max_paths=3_000, seed=3, **MC_PARAMS
+        )
+        self.assertFalse(report['converged'])
+        self.assertEqual(report['reason'], "max_paths")
+        self.assertEqual(report['n_paths'], 3_000)
+
+
+class TestVarianceReduction(unittest.TestCase):
+
+    def spread_of_mean_irr(self, **options):
+        """Rozptyl odhadu průměrného IRR přes nezávislé seedy."""
+        means = [
+            calculations.run_monte_carlo(n_simulations=256, seed=seed, streaming=True, **options, **MC_PARAMS)
+            .summary()['mean_irr']
+            for seed in range(12)
+        ]
+        return np.std(means)
+
+    def test_methods_reduce_spread_of_mean_irr(self):
+        baseline = self.spread_of_mean_irr(sampling="pseudo")
+        self.assertLess(self.spread_of_mean_irr(sampling="antithetic"), baseline / 3)
+        self.assertLess(self.spread_of_mean_irr(sampling="sobol"), baseline / 3)
+        self.assertLess(self.spread_of_mean_irr(sampling="pseudo", control_variate=True), baseline / 3)
+
+    def test_antithetic_paths_mirror_shocks(self):
+        rng = np.random.default_rng(0)
+        z = draw_standard_normals(rng, 7, 3, 5, "antithetic")
+        self.assertEqual(z.shape, (7, 3, 5))
+        np.testing.assert_allclose(z[1::2], -z[0:6:2])
+
+    def test_control_variate_is_unbiased(self):
+        """Kontrolní proměnná mění jen rozptyl, ne střední hodnotu odhadu."""
+        plain = calculations.run_monte_carlo(n_simulations=40_000, seed=5, streaming=True, **MC_PARAMS)
+        controlled = calculations.run_monte_carlo(
+            n_simulations=2_000, seed=6, streaming=True, control_variate=True, **MC_PARAMS
+        )
+        self.assertLess(controlled.standard_errors()['mean_irr'], plain.standard_errors()['mean_irr'])
+        tolerance = 4 * np.hypot(plain.standard_errors()['mean_irr'], controlled.standard_errors()['mean_irr'])
+        self.assertAlmostEqual(controlled.summary()['mean_irr'], plain.summary()['mean_irr'], delta=tolerance)
+
+    def test_unknown_sampling_raises(self):
+        with self.assertRaises(ValueError):
+            calculations.run_monte_carlo(n_simulations=10, sampling="lhs", **MC_PARAMS)
+
+
+class TestRiskFactors(unittest.TestCase):
+
+    def test_factor_tensor_feeds_batch_kernel(self):
+        """Tenzor (N, years, F) dává stejné výsledky jako dávka s odpovídajícími cestami."""
+        rng = np.random.default_rng(11)
+        n, years = 50, MC_PARAMS['holding_period']
+        tensor = rng.normal([3.0, 2.0, 8.0, 0.5, 5.0], [2.0, 1.5, 15.0, 3.0, 1.0], size=(n, years, 5))
+        base = {k: v for k, v in MC_PARAMS.items() if not k.endswith(("_mean", "_std")) and not k.startswith("time_test")}
+        base['time_test_vars'] = {"enabled": True, "years": 10}
+        paths = calculations.monte_carlo.simulate_factor_paths(
+            tensor, ("appreciation", "rent", "etf", "fx", "rate"), base
+        )
+        batch = calculations.calculate_metrics_batch(**dict(
+            base, appreciation_rate=tensor[:, :, 0], rent_growth_rate=tensor[:, :, 1], etf_return=tensor[:, :, 2],
+            fx_appreciation=tensor[:, :, 3], interest_rate=tensor[:, :, 4]
+        ))
+        np.testing.assert_allclose(paths['irr'], batch['irr'])
+        np.testing.assert_allclose(paths['etf_irr'], batch['etf_irr'])
+
+    def test_stochastic_rates_and_fat_tails_widen_distribution(self):
+        plain = calculations.run_monte_carlo(n_simulations=20_000, seed=2, streaming=True, **MC_PARAMS)
+        risky = calculations.run_monte_carlo(
+            n_simulations=20_000, seed=2, streaming=True,
+            interest_rate_std=1.0, fx_appreciation_std=3.0, tail_df=4, persistence=0.5,
+            correlation={("appreciation", "rate"): -0.4, ("etf", "fx"): 0.3}, **MC_PARAMS
+        )
+        self.assertGreater(risky.summary()['std_irr'], plain.summary()['std_irr'])
+        self.assertGreater(risky.summary()['prob_loss'], plain.summary()['prob_loss'])
+
+    def test_refixation_payment_shock(self):
+        """Šok splátky při refixaci se promítne do rozdělení IRR."""
+        params = dict(MC_PARAMS, holding_period=15)
+        paths = calculations.run_monte_carlo(
+            n_simulations=2_000, seed=8, interest_rate_std=1.5, rate_model="vasicek",
+            rate_long_term_mean=4.0, fixation_years=5, **params
+        )
+        cashflows = paths['series']['cashflows']
+        self.assertTrue(np.all(np.isfinite(cashflows)))
+        fixed = calculations.run_monte_carlo(n_simulations=2_000, seed=8, **params)
+        # Sazby se vrací k nižšímu průměru -> v průměru nižší splátky a vyšší IRR
+        self.assertGreater(np.nanmean(paths['irr']), np.nanmean(fixed['irr']))
+        self.assertGreater(np.nanstd(paths['irr']), np.nanstd(fixed['irr']))
+
+    def test_contracted_rate_holds_until_first_refixation(self):
+        """Splátka prvního fixačního období je ve všech cestách stejná (náhodná je až refixace)."""
+        params = dict(
+            MC_PARAMS, etf_comparison=False, appreciation_rate_std=0.0, rent_growth_rate_std=0.0
+        )
+        for rate_model in (None, "vasicek"):
+            paths = calculations.run_monte_carlo(
+                n_simulations=500, seed=5, interest_rate_std=1.5, rate_model=rate_model,
+                fixation_years=3, **params
+            )
+            cashflows = paths['series']['cashflows']
+            np.testing.assert_allclose(cashflows[:, 1:4], np.broadcast_to(cashflows[0, 1:4], (500, 3)))
+            self.assertGreater(cashflows[:, 4].std(), 0)
+
+    def test_control_variate_with_all_factors(self):
+        agg = calculations.run_monte_carlo(
+            n_simulations=5_000, seed=4, streaming=True, control_variate=True,
+            interest_rate_std=1.0, fx_appreciation_std=3.0, **MC_PARAMS
+        )
+        self.assertGreater(agg.irr_control.correlation, 0.9)
+        self.assertGreater(agg.etf_irr_control.correlation, 0.9)
+
+
+class TestPrefixStability(unittest.TestCase):
+    """Prvních N cest nezávisí na celkovém počtu simulací (základ navyšování běhů)."""
+
+    def test_smaller_run_is_prefix_of_larger(self):
+        variants = [
+            {},
+            {"sampling": "antithetic", "tail_df": 4},
+            {"sampling": "sobol", "persistence": 0.5},
+            {"interest_rate_std": 1.0, "rate_model": "cir", "fixation_years": 3},
+        ]
+        for extra in variants:
+            small = calculations.run_monte_carlo(n_simulations=1_000, seed=3, chunk_size=700, **MC_PARAMS, **extra)
+            large = calculations.run_monte_carlo(n_simulations=2_500, seed=3, chunk_size=700, **MC_PARAMS, **extra)
+            np.testing.assert_array_equal(small['irr'], large['irr'][:1_000], err_msg=str(extra))
+            np.testing.assert_array_equal(
+                small['series']['etf_values'], large['series']['etf_values'][:1_000], err_msg=str(extra)
+            )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+import sys
+import os
+import tempfile
+from unittest import mock
+from streamlit.testing.v1 import AppTest
+
+# Add parent directory to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logic.result_store import ResultStore
+import views.monte_carlo as monte_carlo_view
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+
+def _collect_cancelled_script():
+    """Převzetí zrušené úlohy s částečným souhrnem (jako po tlačítku 'Zrušit simulaci')."""
+    import streamlit as st
+    import calculations
+    import views.monte_carlo as monte_carlo_view
+    from logic.jobs import CANCELLED
+    from tests.test_monte_carlo import MC_PARAMS
+
+    class CancelledJob:
+        status = CANCELLED
+
+        def partial(self):
+            return calculations.run_monte_carlo(n_simulations=200, seed=1, streaming=True, **MC_PARAMS)
+
+    st.session_state['mc_job'] = {"id": "zruseno", "converge": False, "inputs_key": "klic-vstupu"}
+    monte_carlo_view._collect_job(CancelledJob(), st.session_state['mc_job'])
+
+
+class TestMonteCarloView(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        patcher = mock.patch.object(monte_carlo_view, "RESULT_STORE", ResultStore(self.tmp.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.at = AppTest.from_file(APP_PATH, default_timeout=120)
+        self.at.run()
+        self.at.radio(key="active_tab").set_value(self.at.radio(key="active_tab").options[4]).run()
+
+    def _finish_job(self):
+        job = monte_carlo_view.JOBS.get(self.at.session_state["mc_job"]["id"])
+        job._future.result(timeout=120)
+        self.at.run()
+        self.assertFalse(self.at.exception)
+
+    def _shows_results(self):
+        return any(m.label == "Průměrné IRR" for m in self.at.metric)
+
+    def _shows_stale_notice(self):
+        return any("zastaralé" in i.value for i in self.at.info)
+
+    def test_results_hidden_after_inputs_change(self):
+        next(b for b in self.at.button if "Spustit Monte Carlo" in b.label).click().run()
+        self._finish_job()
+        self.assertTrue(self._shows_results())
+
+        rate = self.at.number_input(key="interest_rate").value
+        self.at.number_input(key="interest_rate").set_value(rate + 1.0).run()
+        self.assertFalse(self._shows_results())
+        self.assertTrue(self._shows_stale_notice())
+
+        # Návrat ke stejným vstupům zobrazí uložený výsledek znovu
+        self.at.number_input(key="interest_rate").set_value(rate).run()
+        self.assertTrue(self._shows_results())
+
+    def test_converged_result_hidden_after_inputs_change(self):
+        self.at.radio(key="mc_mode").set_value("Do dosažení přesnosti").run()
+        self.at.number_input(key="mc_max_seconds").set_value(1.0).run()
+        next(b for b in self.at.button if "Spustit Monte Carlo" in b.label).click().run()
+        self._finish_job()
+        self.assertTrue(self._shows_results())
+
+        self.at.number_input(key="monthly_rent").set_value(self.at.number_input(key="monthly_rent").value + 1000).run()
+        self.assertFalse(self._shows_results())
+        self.assertTrue(self._shows_stale_notice())
+
+
+class TestCollectJob(unittest.TestCase):
+
+    def test_cancelled_result_records_inputs_key(self):
+        at = AppTest.from_function(_collect_cancelled_script, default_timeout=120)
+        at.run()
+        self.assertFalse(at.exception)
+        last = at.session_state["mc_last"]
+        self.assertTrue(last["cancelled"])
+        self.assertEqual(last["inputs_key"], "klic-vstupu")
+        self.assertEqual(len(at.success), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+import sys
+import os
+import numpy as np
+
+# Add parent directory to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import calculations
+from logic.operations import simulate_occupancy, simulate_repairs
+from tests.test_monte_carlo import MC_PARAMS
+
+OPERATIONS = {
+    "turnover_rate": 30, "lease_indexation": None,
+    "repair_rate": 0.5, "repair_cost": 25_000, "repair_cost_sigma": 1.0
+}
+
+
+class TestOperationsModel(unittest.TestCase):
+
+    def test_occupancy_keeps_average_vacancy(self):
+        rented = simulate_occupancy(np.random.default_rng(0), 40_000, 8, 1.5, 40)
+        self.assertEqual(rented.shape, (40_000, 8))
+        self.assertTrue(np.all((rented >= 0) & (rented <= 12)))
+        np.testing.assert_allclose(rented.mean(axis=0), 10.5, atol=0.05)
+        # Neobsazenost je náhodná: některé roky plné, jiné s delším výpadkem
+        self.assertGreater(rented.std(), 1.0)
+        self.assertGreater((rented == 12).mean(), 0.3)
+
+    def test_occupancy_keeps_average_vacancy_at_high_turnover(self):
+        # Výpadky kratší než měsíc: průměr drží i při odchodu nájemníka každý měsíc
+        for turnover in (80, 90, 100):
+            rented = simulate_occupancy(np.random.default_rng(3), 20_000, 10, 1.0, turnover)
+            np.testing.assert_allclose(rented.mean(axis=0), 11.0, atol=0.05)
+
+    def test_zero_vacancy_is_fully_rented(self):
+        growth = np.full((5_000, 6), 4.0)
+        rented = simulate_occupancy(np.random.default_rng(4), 5_000, 6, 0.0, 60)
+        np.testing.assert_array_equal(rented, 12.0)
+        # Nájemníci se střídají bez výpadku, přecenění na trh ale platí dál
+        indexed = simulate_occupancy(np.random.default_rng(4), 5_000, 6, 0.0, 60, growth, lease_indexation=1.0)
+        self.assertLess(indexed[:, -1].mean(), 12.0)
+        self.assertGreater(indexed[:, -1].mean(), rented[:, -1].mean() * 0.95)
+
+    def test_sitting_tenant_falls_behind_market(self):
+        growth = np.full((20_000, 10), 4.0)
+        market = simulate_occupancy(np.random.default_rng(1), 20_000, 10, 1.0, 20, growth)
+        indexed = simulate_occupancy(np.random.default_rng(1), 20_000, 10, 1.0, 20, growth, lease_indexation=1.0)
+        # Stejné stavy obsazenosti, jen nájem stávajících nájemníků zaostává za trhem
+        self.assertTrue(np.all(indexed <= market + 1e-12))
+        self.assertLess(indexed[:, -1].mean(), market[:, -1].mean() * 0.97)
+        np.testing.assert_allclose(indexed[:, 0], market[:, 0])
+
+    def test_repairs_mean_cost(self):
+        costs = simulate_repairs(np.random.default_rng(2), np.random.default_rng(3), 50_000, 5, 2.0, 10_000, 0.8)
+        self.assertEqual(costs.shape, (50_000, 5))
+        self.assertAlmostEqual(costs.mean() / 20_000, 1.0, delta=0.02)
+        self.assertAlmostEqual((costs == 0).mean(), np.exp(-2.0), delta=0.01)
+
+
+class TestMonteCarloOperations(unittest.TestCase):
+
+    def test_operations_widen_distribution_and_cost_repairs(self):
+        base = calculations.run_monte_carlo(n_simulations=20_000, seed=1, streaming=True, **MC_PARAMS)
+        vacancy_only = calculations.run_monte_carlo(
+            n_simulations=20_000, seed=1, streaming=True, operations=dict(OPERATIONS, repair_rate=0.0), **MC_PARAMS
+        )
+        with_repairs = calculations.run_monte_carlo(
+            n_simulations=20_000, seed=1, streaming=True, operations=OPERATIONS, **MC_PARAMS
+        )
+        # Neobsazenost má stejný průměr jako pevná, jen přidá rozptyl
+        self.assertAlmostEqual(vacancy_only.summary()['mean_irr'], base.summary()['mean_irr'], delta=0.1)
+        self.assertGreater(vacancy_only.summary()['std_irr'], base.summary()['std_irr'])
+        self.assertLess(with_repairs.summary()['mean_irr'], vacancy_only.summary()['mean_irr'])
+
+    def test_operations_keep_prefix_stability(self):
+        small = calculations.run_monte_carlo(n_simulations=800, seed=2, chunk_size=500, operations=OPERATIONS, **MC_PARAMS)
+        large = calculations.run_monte_carlo(n_simulations=1_700, seed=2, chunk_size=500, operations=OPERATIONS, **MC_PARAMS)
+        np.testing.assert_array_equal(small['irr'], large['irr'][:800])
+
+    def test_invalid_turnover_raises(self):
+        with self.assertRaises(ValueError):
+            calculations.run_monte_carlo(n_simulations=10, operations=dict(OPERATIONS, turnover_rate=0), **MC_PARAMS)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+import sys
+import os
+import numpy as np
+
+# Add parent directory to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import calculations
+from logic import pipeline
+from logic.memo import SHARED_CACHE, LRUCache
+from tests.test_memo import METRICS_PARAMS
+
+PARAMS = dict(
+    METRICS_PARAMS, holding_period=12, vacancy_months=1.0, sale_fee_percent=3.0, general_inflation_rate=2.5
+)
+
+
+class TestPipeline(unittest.TestCase):
+
+    def recomputed(self, cache, params):
+        """Stupně, které se pro params opravdu přepočítaly (výpadek cache)."""
+        before = {name: cache.stats(stage.namespace)['misses'] for name, stage in pipeline.STAGES.items()}
+        pipeline.run_stages(params, cache=cache)
+        return {
+            name for name, stage in pipeline.STAGES.items()
+            if cache.stats(stage.namespace)['misses'] > before[name]
+        }
+
+    def test_only_affected_stages_recompute(self):
+        cache = LRUCache(maxsize=100)
+        self.assertEqual(self.recomputed(cache, PARAMS), set(pipeline.STAGES))
+        self.assertEqual(self.recomputed(cache, PARAMS), set())
+        self.assertEqual(self.recomputed(cache, dict(PARAMS, fx_appreciation=1.0)), {"etf"})
+        self.assertEqual(self.recomputed(cache, dict(PARAMS, sale_fee_percent=4.0)), {"exit"})
+        self.assertEqual(self.recomputed(cache, dict(PARAMS, tax_rate=23)), {"tax", "etf", "exit"})
+
+    def test_declared_inputs_include_dependencies(self):
+        self.assertIn("interest_rate", pipeline.STAGES["exit"].inputs)
+        self.assertNotIn("sale_fee_percent", pipeline.STAGES["etf"].inputs)
+        self.assertNotIn("fx_appreciation", pipeline.STAGES["exit"].inputs)
+
+    def test_stages_assemble_calculate_metrics(self):
+        metrics = calculations.calculate_metrics(**PARAMS)
+        stages = pipeline.run_stages(dict(PARAMS, holding_period=12))
+        self.assertEqual(metrics['irr'], stages['exit']['irr'])
+        np.testing.assert_array_equal(metrics['series']['etf_values'], stages['etf']['etf_values'])
+        self.assertEqual(len(metrics['series']['cashflows']), 13)
+
+    def test_facade_uses_both_cache_levels(self):
+        """Přesné opakování vrátí celý výsledek bez stupňů, změna vstupu přepočte jen dotčené."""
+        def lookups():
+            return {
+                name: SHARED_CACHE.stats(stage.namespace)['hits'] + SHARED_CACHE.stats(stage.namespace)['misses']
+                for name, stage in pipeline.STAGES.items()
+            }
+
+        def misses():
+            return {name: SHARED_CACHE.stats(stage.namespace)['misses'] for name, stage in pipeline.STAGES.items()}
+
+        params = dict(PARAMS, monthly_rent=PARAMS['monthly_rent'] + 137)
+        first = calculations.calculate_metrics(**params)
+        before = lookups()
+        self.assertIs(calculations.calculate_metrics(**params), first)
+        self.assertEqual(lookups(), before)
+
+        before = misses()
+        calculations.calculate_metrics(**dict(params, sale_fee_percent=4.5))
+        after = misses()
+        self.assertEqual({name for name in after if after[name] > before[name]}, {"exit"})
+
+
+if __name__ == '__main__':
+    unittest.main()
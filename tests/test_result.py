@@ -0,0 +1,98 @@
+import unittest
+import sys
+import os
+import copy
+import pickle
+import numpy as np
+
+# Add parent directory to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import calculations
+from logic.finance import deflator
+from logic.result import REAL_SERIES, SERIES, SimulationResult
+from tests.test_pipeline import PARAMS
+
+
+class TestSimulationResult(unittest.TestCase):
+
+    def setUp(self):
+        self.result = calculations.calculate_metrics(**PARAMS)
+
+    def test_dict_interface_and_arrays(self):
+        result = self.result
+        self.assertIsInstance(result, SimulationResult)
+        self.assertEqual(result['irr'], result.irr)
+        self.assertEqual(set(result['series']), set(SERIES + REAL_SERIES))
+        self.assertEqual(result.get('missing', 0), 0)
+        for name in SERIES:
+            values = result['series'][name]
+            self.assertEqual(values.dtype, np.float64)
+            self.assertTrue(values.flags.c_contiguous)
+        self.assertEqual(len(result['series']['cashflows']), PARAMS['holding_period'] + 1)
+        self.assertFalse(hasattr(result, '__dict__'))
+
+    def test_lazy_equity_and_real_values(self):
+        result = self.result
+        np.testing.assert_array_equal(result.equity_values, result.property_values - result.mortgage_balances)
+        self.assertIs(result.equity_values, result.equity_values)
+
+        inflation = PARAMS['general_inflation_rate']
+        years = np.arange(1, PARAMS['holding_period'] + 1)
+        expected = [v / (1 + inflation / 100) ** y for v, y in zip(result.property_values, years)]
+        np.testing.assert_allclose(result['series']['real_property_values'], expected, rtol=1e-12)
+        real_cashflows = result['series']['real_cashflows']
+        self.assertEqual(real_cashflows[0], result.cashflows[0])
+        self.assertAlmostEqual(result['real_total_profit'], sum(real_cashflows), delta=1e-6)
+
+    def test_deflator_table_is_shared(self):
+        table = deflator(2.5, 12)
+        self.assertIs(deflator(2.5, 12.0), table)
+        self.assertFalse(table.flags.writeable)
+        self.assertEqual(table[0], 1.0)
+        self.assertAlmostEqual(table[12], 1.025 ** 12)
+        # Výsledek reálné hodnoty dělí pohledem do stejné tabulky
+        self.assertTrue(np.shares_memory(self.result.deflator, table))
+
+    def test_real_values_are_lazy(self):
+        result = calculations.calculate_metrics(**dict(PARAMS, general_inflation_rate=3.1))
+        self.assertNotIn('real_property_values', result._derived)
+        result['series']['real_property_values']
+        self.assertIn('real_property_values', result._derived)
+        self.assertNotIn('real_cashflows', result._derived)
+
+    def test_dataframe_and_arrow_share_memory(self):
+        result = self.result
+        frame = result.to_dataframe(real=True)
+        self.assertEqual(list(frame.index), list(range(1, PARAMS['holding_period'] + 1)))
+        self.assertTrue(np.shares_memory(frame['property_values'].to_numpy(), result.property_values))
+        self.assertTrue(np.shares_memory(frame['real_etf_values'].to_numpy(), result.real_etf_values))
+        table = result.to_arrow()
+        self.assertEqual(table.num_rows, PARAMS['holding_period'])
+        self.assertTrue(np.shares_memory(table.column('equity_values').chunk(0).to_numpy(), result.equity_values))
+
+    def test_pickle_and_copy_round_trip(self):
+        result = self.result
+        result.real_cashflows  # líně spočtená řada se nepřenáší, jen dopočítá
+        for clone in (pickle.loads(pickle.dumps(result)), copy.copy(result), copy.deepcopy(result)):
+            self.assertIsInstance(clone, SimulationResult)
+            self.assertEqual(clone.irr, result.irr)
+            self.assertEqual(clone.inflation_rate, result.inflation_rate)
+            for name in SERIES + REAL_SERIES:
+                np.testing.assert_array_equal(clone['series'][name], result['series'][name])
+            # Kopie je stejně jen pro čtení
+            with self.assertRaises(ValueError):
+                clone.cashflows[0] = 0.0
+            with self.assertRaises(AttributeError):
+                clone.irr = 0.0
+        self.assertIsNot(copy.deepcopy(result).cashflows, result.cashflows)
+
+    def test_without_etf(self):
+        result = calculations.calculate_metrics(**dict(PARAMS, etf_comparison=False))
+        self.assertEqual(len(result['series']['etf_values']), 0)
+        np.testing.assert_array_equal(result.real_etf_values, np.zeros(PARAMS['holding_period']))
+        self.assertNotIn('etf_values', result.to_dataframe().columns)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+import unittest
+import sys
+import os
+import tempfile
+import time
+import numpy as np
+
+# Add parent directory to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import calculations
+from logic.jobs import JobCancelled
+from logic.result_store import ResultStore, run_key
+from tests.test_monte_carlo import MC_PARAMS
+
+
+class TestResultStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = ResultStore(self.tmp.name, max_runs=3)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_key_is_canonical(self):
+        a = dict(MC_PARAMS, correlation={("appreciation", "rent"): 0.5}, seed=1)
+        b = dict(reversed(list(a.items())))
+        self.assertEqual(run_key(a), run_key(b))
+        self.assertEqual(run_key(dict(a, tax_rate=np.float64(15.0))), run_key(a))
+        self.assertNotEqual(run_key(dict(a, tax_rate=15.1)), run_key(a))
+
+    def test_stored_paths_match_direct_run(self):
+        run = calculations.run_monte_carlo_stored(self.store, 3_000, seed=5, chunk_size=1_000, **MC_PARAMS)
+        self.assertFalse(run.from_cache)
+        direct = calculations.run_monte_carlo(n_simulations=3_000, seed=5, chunk_size=1_000, **MC_PARAMS)
+        np.testing.assert_array_equal(run['irr'], direct['irr'])
+        equity = direct['series']['property_values'] - direct['series']['mortgage_balances']
+        np.testing.assert_array_equal(run['equity'], equity)
+        self.assertIsInstance(run['irr'], np.memmap)
+
+    def test_reload_maps_instead_of_recomputing(self):
+        first = calculations.run_monte_carlo_stored(self.store, 2_000, seed=5, control_variate=True, **MC_PARAMS)
+        summary = calculations.stored_aggregator(first).summary()
+
+        # Nové úložiště nad stejným adresářem = nový proces / znovu otevřená záložka
+        reopened = calculations.run_monte_carlo_stored(
+            ResultStore(self.tmp.name), 2_000, seed=5, control_variate=True, **MC_PARAMS
+        )
+        self.assertTrue(reopened.from_cache)
+        self.assertEqual(reopened.key, first.key)
+        rebuilt = calculations.stored_aggregator(reopened).summary()
+        for key, value in summary.items():
+            self.assertAlmostEqual(rebuilt[key], value, places=6, msg=key)
+        np.testing.assert_allclose(reopened.percentiles('irr', 50), np.nanmedian(first['irr']))
+
+    def test_unseeded_runs_get_fresh_entropy_and_old_runs_are_pruned(self):
+        keys = {calculations.run_monte_carlo_stored(self.store, 200, **MC_PARAMS).key for _ in range(5)}
+        self.assertEqual(len(keys), 5)
+        self.assertEqual(len(self.store.list_runs()), 3)
+
+    def assertSummaryClose(self, aggregator, expected):
+        """Momenty se slučují přesně, kvantily z t-digestu jen přibližně (závisí na pořadí slučování)."""
+        actual = aggregator.summary()
+        for key, value in expected.summary().items():
+            self.assertAlmostEqual(actual[key], value, delta=0.02 if "median" in key else 1e-6, msg=key)
+
+    def test_more_simulations_extend_stored_run(self):
+        params = dict(MC_PARAMS, control_variate=True, chunk_size=700)
+        first = calculations.run_monte_carlo_stored(self.store, 1_000, seed=9, **params)
+        first_aggregator = calculations.stored_aggregator(first)
+
+        extended = calculations.run_monte_carlo_stored(self.store, 2_500, seed=9, **params)
+        self.assertEqual(extended.key, first.key)
+        self.assertEqual(extended.manifest['extended_from'], 1_000)
+        fresh = calculations.run_monte_carlo_stored(ResultStore(os.path.join(self.tmp.name, "fresh")), 2_500, seed=9, **params)
+        np.testing.assert_array_equal(extended['irr'], fresh['irr'])
+        np.testing.assert_array_equal(extended['equity'], fresh['equity'])
+        self.assertSummaryClose(calculations.stored_aggregator(extended), calculations.stored_aggregator(fresh))
+
+        # Menší počet simulací = prvních N uložených cest bez výpočtu
+        prefix = calculations.run_monte_carlo_stored(self.store, 1_000, seed=9, **params)
+        self.assertTrue(prefix.from_cache)
+        self.assertEqual(prefix.n_paths, 1_000)
+        np.testing.assert_array_equal(prefix['irr'], fresh['irr'][:1_000])
+        self.assertSummaryClose(calculations.stored_aggregator(prefix), first_aggregator)
+        self.assertEqual([m['key'] for m in self.store.list_runs()], [first.key])
+
+    def test_incomplete_run_is_ignored(self):
+        writer = self.store.writer("abc", 10, {})
+        writer.write({"irr": np.zeros(4)})
+        self.assertIsNone(self.store.load("abc"))
+        with self.assertRaises(ValueError):
+            writer.close()
+
+    def test_concurrent_writers_of_same_key_do_not_clobber(self):
+        first = self.store.writer("abc", 4, {})
+        second = self.store.writer("abc", 4, {})
+        first.write({"irr": np.full(4, 1.0)})
+        second.write({"irr": np.full(4, 2.0)})
+        np.testing.assert_array_equal(first.close()['irr'], 1.0)
+        # Druhý hotový běh nahradí první celý, bez rozepsaných adresářů
+        np.testing.assert_array_equal(second.close()['irr'], 2.0)
+        np.testing.assert_array_equal(ResultStore(self.tmp.name).load("abc")['irr'], 2.0)
+        self.assertEqual(os.listdir(self.tmp.name), ["abc"])
+
+    def test_cancelled_run_leaves_no_files(self):
+        calculations.run_monte_carlo_stored(self.store, 500, seed=3, chunk_size=250, **MC_PARAMS)
+
+        def cancel(aggregator, fraction):
+            raise JobCancelled()
+
+        # Zrušené navýšení i zrušený nový běh: uložený kratší běh zůstává, nic dalšího
+        for seed in (3, 4):
+            with self.assertRaises(JobCancelled):
+                calculations.run_monte_carlo_stored(self.store, 1_000, seed=seed, chunk_size=250, progress=cancel, **MC_PARAMS)
+        self.assertEqual(len(os.listdir(self.tmp.name)), 1)
+        self.assertEqual(self.store.load(self.store.list_runs()[0]['key']).n_paths, 500)
+
+    def test_prune_removes_abandoned_directories(self):
+        old, fresh = (os.path.join(self.tmp.name, name) for name in ("old", "fresh.1234.partial"))
+        for directory in (old, fresh):
+            os.makedirs(directory)
+            np.save(os.path.join(directory, "irr.npy"), np.zeros(3))
+        stale = time.time() - 2 * self.store.orphan_grace
+        for path in (old, os.path.join(old, "irr.npy")):
+            os.utime(path, (stale, stale))
+        self.store.prune()
+        # Opuštěný adresář bez manifestu zmizí, právě rozepsaný zůstává
+        self.assertFalse(os.path.exists(old))
+        self.assertTrue(os.path.exists(fresh))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+import sys
+import os
+import tempfile
+import numpy as np
+
+# Add parent directory to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import calculations
+from logic.result_store import ResultStore
+from logic.risk import (
+    cashflow_drawdown, conditional_value_at_risk, negative_equity, total_subsidies, value_at_risk
+)
+from tests.test_monte_carlo import MC_PARAMS
+
+
+class TestRiskFunctions(unittest.TestCase):
+
+    def test_var_and_cvar(self):
+        profits = np.arange(-100.0, 100.0)  # 200 hodnot, nejhorších 5 % = -100..-91
+        self.assertAlmostEqual(value_at_risk(profits, 0.95), -np.quantile(profits, 0.05))
+        self.assertAlmostEqual(conditional_value_at_risk(profits, 0.95), 95.5)
+        self.assertGreaterEqual(conditional_value_at_risk(profits, 0.95), value_at_risk(profits, 0.95))
+
+    def test_drawdown_subsidies_and_negative_equity(self):
+        cashflows = np.array([
+            [100.0, -50.0, -80.0, 200.0],   # vrchol 100, dno -30 -> propad 130, dotace 130
+            [-40.0, -40.0, 10.0, 10.0],     # od nuly na -80 -> propad 80, dotace 80
+            [10.0, 10.0, 10.0, 10.0]
+        ])
+        cumulative = np.cumsum(cashflows, axis=1)
+        np.testing.assert_allclose(cashflow_drawdown(cumulative), [130.0, 80.0, 0.0])
+        np.testing.assert_allclose(total_subsidies(cumulative), [130.0, 80.0, 0.0])
+        equity = np.array([[10.0, -1.0], [5.0, 6.0], [0.0, 1.0]])
+        np.testing.assert_array_equal(negative_equity(equity), [True, False, False])
+
+
+class TestMonteCarloRisk(unittest.TestCase):
+
+    def test_streaming_risk_matches_stored_paths(self):
+        params = dict(MC_PARAMS, interest_rate_std=1.5, appreciation_rate_std=6.0)
+        with tempfile.TemporaryDirectory() as tmp:
+            run = calculations.run_monte_carlo_stored(ResultStore(tmp), 20_000, seed=4, chunk_size=3_000, **params)
+            exact = calculations.stored_risk_metrics(run, 0.95, 300_000)
+            approx = calculations.stored_aggregator(run).risk_summary(0.95, 300_000)
+
+        self.assertGreater(exact['prob_negative_equity'], 0)
+        self.assertGreater(exact['cvar'], exact['var'])
+        scale = abs(exact['var']) + 1e5
+        self.assertAlmostEqual(approx['var'], exact['var'], delta=0.02 * scale)
+        self.assertAlmostEqual(approx['cvar'], exact['cvar'], delta=0.02 * scale)
+        self.assertAlmostEqual(approx['drawdown'], exact['drawdown'], delta=0.02 * exact['drawdown'] + 1.0)
+        self.assertEqual(approx['max_drawdown'], exact['max_drawdown'])
+        self.assertAlmostEqual(approx['prob_negative_equity'], exact['prob_negative_equity'], places=8)
+        self.assertAlmostEqual(approx['prob_subsidies_over_budget'], exact['prob_subsidies_over_budget'], delta=1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
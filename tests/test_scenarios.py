@@ -0,0 +1,91 @@
+import unittest
+import sys
+import os
+import numpy as np
+
+# Add parent directory to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logic.scenarios import (
+    FACTORS, correlation_matrix, expected_short_rates, generate_factor_paths, short_rate_paths
+)
+
+MEANS = [3.0, 2.0, 8.0, 0.0, 5.0]
+STDS = [2.0, 1.5, 15.0, 3.0, 1.0]
+
+
+class TestFactorGenerator(unittest.TestCase):
+
+    def test_shape_and_marginals(self):
+        rng = np.random.default_rng(0)
+        paths = generate_factor_paths(rng, 100_000, 8, MEANS, STDS)
+        self.assertEqual(paths.shape, (100_000, 8, len(FACTORS)))
+        np.testing.assert_allclose(paths.mean(axis=(0, 1)), MEANS, atol=0.1)
+        np.testing.assert_allclose(paths.std(axis=(0, 1)), STDS, rtol=0.01)
+
+    def test_correlation_is_reproduced(self):
+        target = correlation_matrix({("appreciation", "rent"): 0.6, ("appreciation", "rate"): -0.4, ("etf", "fx"): 0.3})
+        rng = np.random.default_rng(1)
+        paths = generate_factor_paths(rng, 200_000, 3, MEANS, STDS, correlation=target)
+        np.testing.assert_allclose(np.corrcoef(paths[:, 1].T), target, atol=0.01)
+
+    def test_student_t_keeps_variance_and_fattens_tails(self):
+        rng = np.random.default_rng(2)
+        normal = generate_factor_paths(rng, 200_000, 2, MEANS, STDS)[:, :, 0]
+        fat = generate_factor_paths(rng, 200_000, 2, MEANS, STDS, tail_df=5)[:, :, 0]
+        self.assertAlmostEqual(fat.std(), STDS[0], delta=0.05)
+        # 4-sigma události jsou u t(5) mnohem častější
+        extreme = lambda x: np.mean(np.abs(x - MEANS[0]) > 4 * STDS[0])
+        self.assertGreater(extreme(fat), 10 * extreme(normal))
+
+    def test_ar1_persistence(self):
+        rng = np.random.default_rng(3)
+        phi = [0.0, 0.8, 0.0, 0.0, 0.5]
+        paths = generate_factor_paths(rng, 100_000, 6, MEANS, STDS, persistence=phi)
+        for factor in (0, 1, 4):
+            lag1 = np.corrcoef(paths[:, 3, factor], paths[:, 4, factor])[0, 1]
+            self.assertAlmostEqual(lag1, phi[factor], delta=0.01)
+            # Stacionární rozptyl: volatilita každého roku zůstává stejná
+            self.assertAlmostEqual(paths[:, 5, factor].std(), STDS[factor], delta=0.03 * STDS[factor])
+
+    def test_invalid_inputs_raise(self):
+        rng = np.random.default_rng(4)
+        not_pd = correlation_matrix({("appreciation", "rent"): 0.9, ("appreciation", "rate"): 0.9, ("rent", "rate"): -0.9})
+        with self.assertRaises(ValueError):
+            generate_factor_paths(rng, 10, 3, MEANS, STDS, correlation=not_pd)
+        with self.assertRaises(ValueError):
+            generate_factor_paths(rng, 10, 3, MEANS, STDS, tail_df=2)
+        with self.assertRaises(ValueError):
+            generate_factor_paths(rng, 10, 3, MEANS, STDS, persistence=1.0)
+        with self.assertRaises(ValueError):
+            correlation_matrix({("appreciation", "inflation"): 0.5})
+
+
+class TestShortRateModels(unittest.TestCase):
+
+    def test_vasicek_matches_analytic_moments(self):
+        r0, theta, kappa, sigma = 6.0, 4.0, 0.3, 1.0
+        shocks = np.random.default_rng(5).standard_normal((200_000, 15))
+        rates = short_rate_paths(shocks, r0, theta, kappa, sigma, model="vasicek")
+        self.assertTrue(np.all(rates[:, 0] == r0))
+        t = np.arange(15)
+        np.testing.assert_allclose(rates.mean(axis=0), expected_short_rates(r0, theta, kappa, 15), atol=0.01)
+        analytic_std = sigma * np.sqrt((1 - np.exp(-2 * kappa * t)) / (2 * kappa))
+        np.testing.assert_allclose(rates.std(axis=0), analytic_std, atol=0.01)
+
+    def test_cir_stays_non_negative_with_level_dependent_volatility(self):
+        shocks = np.random.default_rng(6).standard_normal((100_000, 20))
+        rates = short_rate_paths(shocks, 1.0, 1.0, 0.2, 1.0, model="cir")
+        self.assertTrue(np.all(rates >= 0))
+        # Rozptyl roste s úrovní sazby: z vyšší sazby je rozptyl další změny větší
+        high = short_rate_paths(shocks[:, :2], 4.0, 1.0, 0.2, 1.0, model="cir")[:, 1].std()
+        low = short_rate_paths(shocks[:, :2], 0.5, 1.0, 0.2, 1.0, model="cir")[:, 1].std()
+        self.assertGreater(high, 2 * low)
+
+    def test_invalid_model_raises(self):
+        with self.assertRaises(ValueError):
+            short_rate_paths(np.zeros((2, 3)), 5.0, 4.0, 0.2, 1.0, model="hull-white")
+
+
+if __name__ == '__main__':
+    unittest.main()
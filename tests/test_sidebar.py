@@ -0,0 +1,34 @@
+import unittest
+import sys
+import os
+from streamlit.testing.v1 import AppTest
+
+# Add parent directory to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+
+class TestOptimizer(unittest.TestCase):
+
+    def test_optimum_follows_current_inputs(self):
+        at = AppTest.from_file(APP_PATH, default_timeout=120)
+        at.run()
+        next(b for b in at.button if "optimální" in b.label).click().run()
+
+        def optimum():
+            return [i.value for i in at.info if "optimum" in i.value]
+
+        original = optimum()
+        self.assertEqual(len(original), 1)
+        rate = at.number_input(key="interest_rate").value
+        # Po změně vstupu se mřížka přepočítá, staré optimum nezůstává
+        at.number_input(key="interest_rate").set_value(1.0).run()
+        self.assertFalse(at.exception)
+        self.assertNotEqual(optimum(), original)
+        at.number_input(key="interest_rate").set_value(rate).run()
+        self.assertEqual(optimum(), original)
+
+
+if __name__ == '__main__':
+    unittest.main()
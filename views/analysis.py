@@ -18,11 +18,11 @@ def render_analysis_tab(inputs, metrics, derived_metrics):
         property_values = metrics['series']['real_property_values']
         mortgage_balances = metrics['series']['real_mortgage_balances']
         etf_values_czk = metrics['series']['real_etf_values']
-        equity_values = [p - m for p, m in zip(property_values, mortgage_balances)]
+        equity_values = metrics.real_equity_values
         
-        # Use simple approximate discounting for Single Scalar Values displayed in text if series not available
+        # Souhrnné hodnoty v textu se diskontují deflátorem posledního roku
         inf_rate = inputs.get('general_inflation_rate', 2.0)
-        discount_factor = (1 + inf_rate / 100) ** holding_period
+        discount_factor = metrics.deflator[-1]
         
         # Use strictly calculated real series
         sale_proceeds_net = derived_metrics['sale_proceeds_net'] / discount_factor
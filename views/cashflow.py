@@ -11,16 +11,9 @@ def render_cashflow_tab(inputs, metrics, derived_metrics):
         mortgage_balances = metrics['series']['real_mortgage_balances']
         etf_values_czk = metrics['series']['real_etf_values']
         
-        # Use pre-calculated real cashflows series from calculations.py
-        yearly_cashflows_arr = metrics['series'].get('real_cashflows')
-        
-        # Fallback if logic mismatch (e.g. key missing in old state)
-        if not yearly_cashflows_arr:
-            inf_rate = inputs.get('general_inflation_rate', 2.0)
-            nominal_cfs = metrics['series']['cashflows']
-            yearly_cashflows_arr = [nominal_cfs[0]] + [nominal_cfs[i] / ((1 + inf_rate/100)**i) for i in range(1, len(nominal_cfs))]
-
-        equity_values = [p - m for p, m in zip(property_values, mortgage_balances)]
+        # Reálné řady spočte výsledek líně ze sdíleného deflátoru
+        yearly_cashflows_arr = metrics['series']['real_cashflows']
+        equity_values = metrics.real_equity_values
         
         st.info(f"ℹ️ Zobrazeno v **REÁLNÝCH CENÁCH** (očištěno o inflaci {inputs.get('general_inflation_rate', 2.0)}% p.a.).")
     else:
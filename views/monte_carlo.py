@@ -1,8 +1,46 @@
+import os
+import numpy as np
 import streamlit as st
-import pandas as pd
-import plotly.express as px
 import plotly.graph_objects as go
 import calculations
+from logic.history import HISTORY_DIR, resolve_history_path
+from logic.jobs import CANCELLED, FAILED, JobManager
+from logic.result_store import ResultStore, run_key
+
+# Úložiště výsledků Monte Carlo (cesty jako .npy na disku, klíč = hash vstupů)
+RESULT_STORE = ResultStore()
+
+# Úlohy na pozadí společné pro všechny relace (Monte Carlo neblokuje skript)
+JOBS = JobManager()
+# Jak často se překresluje průběh běžící úlohy (s)
+JOB_REFRESH_SECONDS = 0.5
+
+
+def _box_trace(stats, name, color):
+    """Box plot z předpočítaných kvartilů (bez surových dat)."""
+    return go.Box(
+        name=name, marker_color=color,
+        q1=[stats['q1']], median=[stats['median']], q3=[stats['q3']],
+        lowerfence=[stats['lowerfence']], upperfence=[stats['upperfence']]
+    )
+
+def _add_fan(fig, bands, name, rgb):
+    """Fan chart z pásem po letech: P5-P95, P25-P75 (vyplněné) a medián."""
+    years = np.arange(1, len(bands[50]) + 1)
+    for low, high, alpha in ((5, 95, 0.15), (25, 75, 0.3)):
+        fig.add_trace(go.Scatter(
+            x=years, y=bands[high], mode='lines', line=dict(width=0),
+            legendgroup=name, showlegend=False, hoverinfo='skip'
+        ))
+        fig.add_trace(go.Scatter(
+            x=years, y=bands[low], mode='lines', line=dict(width=0),
+            fill='tonexty', fillcolor=f"rgba({rgb}, {alpha})",
+            name=f"{name} P{low}-P{high}", legendgroup=name
+        ))
+    fig.add_trace(go.Scatter(
+        x=years, y=bands[50], mode='lines', line=dict(color=f"rgb({rgb})", width=3),
+        name=f"{name} medián", legendgroup=name
+    ))
 
 def render_monte_carlo_tab(inputs, metrics=None, derived_metrics=None):
     etf_comparison = inputs['etf_comparison']
@@ -29,9 +67,20 @@ def render_monte_carlo_tab(inputs, metrics=None, derived_metrics=None):
     st.subheader("🎲 Monte Carlo Simulace")
     st.markdown("Vyhodnocení rizik pomocí simulace tisíců možných scénářů vývoje trhu.")
     
+    mc_mode = st.radio(
+        "Režim simulace", ["Pevný počet simulací", "Do dosažení přesnosti"], horizontal=True, key="mc_mode",
+        help="Do dosažení přesnosti = simuluje po dávkách, dokud intervaly spolehlivosti neklesnou pod zvolenou toleranci."
+    )
+    converge = mc_mode == "Do dosažení přesnosti"
+    
     col_mc1, col_mc2, col_mc3, col_mc4 = st.columns(4)
     with col_mc1:
-        sim_count = st.number_input("Počet simulací", 100, 5000, 1000, 100)
+        if converge:
+            tol_irr = st.number_input("Přesnost IRR (± p.b.)", 0.01, 1.0, 0.1, 0.01, key="mc_tol_irr", help="Polovina 95% intervalu spolehlivosti průměru i mediánu IRR.")
+            tol_loss = st.number_input("Přesnost ztráty (± p.b.)", 0.1, 10.0, 0.5, 0.1, key="mc_tol_loss")
+            max_seconds = st.number_input("Časový limit (s)", 1.0, 120.0, 10.0, 1.0, key="mc_max_seconds")
+        else:
+            sim_count = st.number_input("Počet simulací", 100, 200_000, 1000, 100)
     with col_mc2:
         vol_app = st.number_input("Volatilita cen (%)", 0.0, 10.0, 2.0, 0.1, help="Směrodatná odchylka ročního růstu ceny nemovitosti.")
     with col_mc3:
@@ -41,64 +90,438 @@ def render_monte_carlo_tab(inputs, metrics=None, derived_metrics=None):
         if etf_comparison:
             vol_etf = st.number_input("Volatilita ETF (%)", 0.0, 30.0, 15.0, 1.0, help="Směrodatná odchylka ročního výnosu ETF.")
     
+    with st.expander("⚙️ Výpočet (seed, paralelizace, redukce rozptylu)", expanded=False):
+        col_seed1, col_seed2 = st.columns(2)
+        with col_seed1:
+            fixed_seed = st.checkbox("Fixní seed (opakovatelné výsledky)", value=False, key="mc_fixed_seed")
+            mc_seed = st.number_input("Seed", 0, 2**31 - 1, 42, 1, key="mc_seed", disabled=not fixed_seed)
+        with col_seed2:
+            max_workers = os.cpu_count() or 1
+            mc_workers = 1
+            if max_workers > 1:
+                mc_workers = st.slider(
+                    "Počet procesů", 1, max_workers, 1, key="mc_workers",
+                    help="Paralelní výpočet po dávkách. Výsledek pro daný seed nezávisí na počtu procesů."
+                )
+
+        col_vr1, col_vr2 = st.columns(2)
+        with col_vr1:
+            sampling_labels = {
+                "pseudo": "Žádná (pseudonáhodná čísla)",
+                "antithetic": "Antitetické cesty",
+                "sobol": "Sobolova sekvence (QMC)"
+            }
+            mc_sampling = st.selectbox(
+                "Redukce rozptylu", list(sampling_labels), format_func=sampling_labels.get, key="mc_sampling",
+                help="Antitetické cesty a Sobolova sekvence dávají přesnější průměry při stejném počtu simulací."
+            )
+        with col_vr2:
+            mc_control_variate = st.checkbox(
+                "Kontrolní proměnná pro průměrné IRR", value=False, key="mc_control_variate",
+                help="Zpřesní průměrné IRR pomocí linearizace deterministického IRR se známou střední hodnotou."
+            )
+
+    with st.expander("📉 Rizikové faktory (korelace, tlusté chvosty, setrvačnost)", expanded=False):
+        col_rf1, col_rf2, col_rf3 = st.columns(3)
+        with col_rf1:
+            vol_rate = st.number_input(
+                "Volatilita úrokové sazby (p.b.)", 0.0, 5.0, 0.0, 0.1, key="mc_vol_rate",
+                help="Nenulová hodnota = sazba hypotéky se při každé refixaci přecení podle náhodné cesty."
+            )
+            rate_model_labels = {None: "Nezávislé roky", "vasicek": "Vasicek", "cir": "CIR"}
+            rate_model = st.selectbox(
+                "Model sazeb", list(rate_model_labels), format_func=rate_model_labels.get, key="mc_rate_model",
+                disabled=vol_rate == 0,
+                help="Vasicek/CIR: sazba se vrací k dlouhodobému průměru, CIR nepustí sazbu pod nulu."
+            )
+            fixation_years = st.select_slider(
+                "Fixace (roky)", options=[1, 2, 3, 5, 7, 10], value=5, key="mc_fixation_years", disabled=vol_rate == 0,
+                help="Po skončení fixace se splátka přepočte podle aktuální sazby."
+            )
+            rate_long_term_mean = interest_rate
+            rate_mean_reversion = 0.2
+            if rate_model is not None and vol_rate > 0:
+                rate_long_term_mean = st.number_input("Dlouhodobá sazba (%)", 0.0, 15.0, float(interest_rate), 0.1, key="mc_rate_ltm")
+                rate_mean_reversion = st.number_input(
+                    "Rychlost návratu k průměru", 0.01, 2.0, 0.2, 0.01, key="mc_rate_kappa",
+                    help="Podíl odchylky od dlouhodobé sazby, který zmizí zhruba za rok."
+                )
+            vol_fx = 0.0
+            if etf_comparison:
+                vol_fx = st.number_input("Volatilita kurzu (%)", 0.0, 20.0, 0.0, 0.5, key="mc_vol_fx", help="Směrodatná odchylka roční změny kurzu EUR/CZK.")
+        with col_rf2:
+            corr_app_rent = st.slider("Korelace ceny × nájem", -0.9, 0.9, 0.0, 0.1, key="mc_corr_app_rent")
+            corr_app_rate = st.slider("Korelace ceny × sazba", -0.9, 0.9, 0.0, 0.1, key="mc_corr_app_rate")
+            corr_etf_fx = st.slider("Korelace ETF × kurz", -0.9, 0.9, 0.0, 0.1, key="mc_corr_etf_fx")
+        with col_rf3:
+            tail_labels = {0: "Normální", 10: "Studentovo t (10 st. v.)", 5: "Studentovo t (5 st. v.)", 3: "Studentovo t (3 st. v.)"}
+            tail_choice = st.selectbox(
+                "Rozdělení šoků", list(tail_labels), format_func=tail_labels.get, key="mc_tail_df",
+                help="Méně stupňů volnosti = tlustší chvosty (častější extrémní roky) při stejné volatilitě."
+            )
+            persistence = st.slider(
+                "Setrvačnost šoků AR(1)", 0.0, 0.95, 0.0, 0.05, key="mc_persistence",
+                help="Jak moc se odchylka od průměru přenáší do dalšího roku (0 = nezávislé roky)."
+            )
+
+    operations = None
+    with st.expander("🏚️ Provozní rizika (nájemníci, opravy)", expanded=False):
+        ops_enabled = st.checkbox(
+            "Náhodná neobsazenost a opravy", value=False, key="mc_ops_enabled",
+            help="Místo pevné neobsazenosti se po měsících simuluje střídání nájemníků a náhodné opravy."
+        )
+        col_op1, col_op2 = st.columns(2)
+        with col_op1:
+            turnover_rate = st.slider(
+                "Odchod nájemníka za rok (%)", 5, 100, 30, 5, key="mc_ops_turnover", disabled=not ops_enabled,
+                help="Pravděpodobnost, že nájemník během roku odejde. Průměrná neobsazenost zůstává podle zadání v sidebaru."
+            )
+            reprice = st.checkbox(
+                "Přecenění nájmu při změně nájemníka", value=True, key="mc_ops_reprice", disabled=not ops_enabled,
+                help="Stávající nájemník platí valorizovaný nájem, nový nájemník tržní."
+            )
+            lease_indexation = st.number_input(
+                "Valorizace stávajícího nájmu (% p.a.)", 0.0, 10.0, 2.0, 0.5, key="mc_ops_indexation",
+                disabled=not (ops_enabled and reprice)
+            )
+        with col_op2:
+            repair_rate = st.number_input(
+                "Počet oprav za rok", 0.0, 12.0, 0.5, 0.1, key="mc_ops_repair_rate", disabled=not ops_enabled
+            )
+            repair_cost = st.number_input(
+                "Průměrná cena opravy (Kč)", 0, 2_000_000, 25_000, 5_000, key="mc_ops_repair_cost", disabled=not ops_enabled
+            )
+            repair_cost_sigma = st.slider(
+                "Rozptyl ceny oprav (σ logaritmu)", 0.1, 2.0, 1.0, 0.1, key="mc_ops_repair_sigma", disabled=not ops_enabled,
+                help="Vyšší hodnota = vzácné, ale velmi drahé opravy."
+            )
+        if ops_enabled:
+            operations = {
+                "turnover_rate": turnover_rate,
+                "lease_indexation": lease_indexation if reprice else None,
+                "repair_rate": repair_rate,
+                "repair_cost": repair_cost,
+                "repair_cost_sigma": repair_cost_sigma
+            }
+
+    history = None
+    with st.expander("📜 Historická data (blokový bootstrap)", expanded=False):
+        st.caption(
+            "CSV s hlavičkou (např. year,property,msci_world,czk_eur) nebo NPY se strukturovaným polem, "
+            "hodnoty jsou roční výnosy v % p.a. Vybrané faktory se místo normálního rozdělení "
+            "převzorkují po souvislých blocích historických let."
+        )
+        uploaded = st.file_uploader("Nahrát CSV/NPY", type=["csv", "npy"], key="mc_history_upload")
+        st.session_state.setdefault('mc_history_path', os.path.join(HISTORY_DIR, "history.csv"))
+        if uploaded is not None and st.session_state.get('mc_history_uploaded') != uploaded.file_id:
+            os.makedirs(HISTORY_DIR, exist_ok=True)
+            upload_path = os.path.join(HISTORY_DIR, os.path.basename(uploaded.name))
+            with open(upload_path, "wb") as f:
+                f.write(uploaded.getbuffer())
+            st.session_state['mc_history_uploaded'] = uploaded.file_id
+            st.session_state['mc_history_path'] = upload_path
+        history_path = st.text_input(
+            "Cesta k souboru", key="mc_history_path", help=f"Soubor musí být v adresáři {HISTORY_DIR}/."
+        )
+        try:
+            history_path = resolve_history_path(history_path)
+        except ValueError as e:
+            st.error(str(e))
+            history_path = None
+
+        if history_path is not None and os.path.exists(history_path):
+            try:
+                columns = calculations.history_columns(history_path)
+            except ValueError as e:
+                st.error(str(e))
+                columns = []
+            if columns:
+                factor_labels = {"appreciation": "Růst cen nemovitostí", "rent": "Růst nájmů"}
+                if etf_comparison:
+                    factor_labels.update({"etf": "Výnos ETF", "fx": "Změna kurzu"})
+                options = [None] + columns
+                col_h1, col_h2 = st.columns(2)
+                mapping = {}
+                with col_h1:
+                    for factor, label in factor_labels.items():
+                        column = st.selectbox(
+                            label, options, format_func=lambda c: "— parametricky —" if c is None else c,
+                            key=f"mc_history_{factor}"
+                        )
+                        if column is not None:
+                            mapping[factor] = column
+                with col_h2:
+                    block_size = st.slider(
+                        "Délka bloku (roky)", 1, 10, 5, key="mc_history_block",
+                        help="Delší bloky lépe zachovají shlukování špatných let, kratší dají pestřejší scénáře."
+                    )
+                if mapping:
+                    history = {"path": history_path, "columns": mapping, "block_size": block_size}
+        elif history_path is not None:
+            st.info("Soubor zatím neexistuje - nahrajte data nebo zadejte cestu.")
+
+    # Klíč vstupů se počítá při každém překreslení: výsledek pro jiné vstupy se nezobrazí
+    mc_params = dict(
+        # Base params
+        purchase_price=purchase_price,
+        down_payment=down_payment,
+        one_off_costs=one_off_costs,
+        interest_rate=interest_rate,
+        loan_term_years=loan_term_years,
+        monthly_rent=monthly_rent,
+        monthly_expenses=monthly_expenses,
+        vacancy_months=vacancy_months,
+        tax_rate=tax_rate,
+        holding_period=holding_period,
+        initial_fx_rate=initial_fx_rate,
+        fx_appreciation=fx_appreciation,
+        # Means
+        appreciation_rate_mean=appreciation_rate,
+        rent_growth_rate_mean=rent_growth_rate,
+        etf_comparison=etf_comparison,
+        etf_return_mean=etf_return,
+        # Volatilities
+        appreciation_rate_std=vol_app,
+        rent_growth_rate_std=vol_rent,
+        etf_return_std=vol_etf,
+        time_test_enabled=time_test_enabled,
+        time_test_years=time_test_years,
+        sale_fee_percent=sale_fee_percent,
+        sampling=mc_sampling,
+        control_variate=mc_control_variate,
+        # Risk factors
+        fx_appreciation_std=vol_fx,
+        interest_rate_std=vol_rate,
+        correlation={
+            ("appreciation", "rent"): corr_app_rent,
+            ("appreciation", "rate"): corr_app_rate,
+            ("etf", "fx"): corr_etf_fx
+        },
+        tail_df=tail_choice or None,
+        persistence=persistence,
+        rate_model=rate_model,
+        rate_long_term_mean=rate_long_term_mean,
+        rate_mean_reversion=rate_mean_reversion,
+        fixation_years=fixation_years,
+        history=history,
+        operations=operations
+    )
+    inputs_key = run_key(mc_params)
+
     if st.button("🔴 Spustit Monte Carlo Simulaci", type="primary"):
-        with st.spinner(f"Probíhá výpočet {sim_count} scénářů..."):
-            mc_results = calculations.run_monte_carlo(
+        seed = int(mc_seed) if fixed_seed else None
+        previous = st.session_state.get('mc_last') or {}
+        if (seed is None and not converge and previous.get('inputs_key') == inputs_key
+                and previous.get('n_paths') not in (None, sim_count)):
+            # Jiný počet simulací při stejných vstupech -> stejný vzorek, dopočtou se jen nové cesty
+            seed = previous['seed']
+        
+        # Výpočet běží na pozadí; relace si drží jen id úlohy a průběh se překresluje
+        previous_job = JOBS.get((st.session_state.get('mc_job') or {}).get('id'))
+        if previous_job is not None:
+            previous_job.cancel()
+        if converge:
+            job = JOBS.submit(
+                calculations.run_monte_carlo_until_converged,
+                tolerance_irr=tol_irr,
+                tolerance_prob_loss=tol_loss,
+                max_seconds=max_seconds,
+                seed=seed,
+                label="Výpočet do dosažení přesnosti",
+                **mc_params
+            )
+        else:
+            # Cesty se ukládají na disk -> výsledek přežije přepnutí záložky i nové překreslení
+            job = JOBS.submit(
+                calculations.run_monte_carlo_stored,
+                RESULT_STORE,
                 n_simulations=sim_count,
-                # Base params
-                purchase_price=purchase_price,
-                down_payment=down_payment,
-                one_off_costs=one_off_costs,
-                interest_rate=interest_rate,
-                loan_term_years=loan_term_years,
-                monthly_rent=monthly_rent,
-                monthly_expenses=monthly_expenses,
-                vacancy_months=vacancy_months,
-                tax_rate=tax_rate, 
-                holding_period=holding_period,
-                initial_fx_rate=initial_fx_rate,
-                fx_appreciation=fx_appreciation,
-                # Means
-                appreciation_rate_mean=appreciation_rate,
-                rent_growth_rate_mean=rent_growth_rate,
-                etf_comparison=etf_comparison,
-                etf_return_mean=etf_return,
-                # Volatilities
-                appreciation_rate_std=vol_app,
-                rent_growth_rate_std=vol_rent,
-                etf_return_std=vol_etf,
-                time_test_enabled=time_test_enabled,
-                time_test_years=time_test_years,
-                sale_fee_percent=sale_fee_percent
+                seed=seed,
+                n_workers=mc_workers,
+                label=f"Výpočet {sim_count:,} scénářů",
+                **mc_params
             )
-            
-            # Parsing results
-            df_mc = pd.DataFrame(mc_results)
-            
-            # --- Results Presentation ---
-            st.success("Simulace dokončena!")
-            
-            # Metrics
-            avg_irr = df_mc['irr'].mean()
-            median_irr = df_mc['irr'].median()
-            prob_loss = (df_mc['total_profit'] < 0).mean() * 100
-            
-            mc_col1, mc_col2, mc_col3 = st.columns(3)
-            mc_col1.metric("Průměrné IRR", f"{avg_irr:.2f} %")
-            mc_col2.metric("Medián IRR", f"{median_irr:.2f} %")
-            mc_col3.metric("Pravděpodobnost ztráty", f"{prob_loss:.1f} %", delta_color="inverse")
-
-            # Histogram IRR
-            fig_hist = px.histogram(df_mc, x="irr", nbins=50, title="Rozložení dosahovaného IRR", labels={'irr': 'IRR (%)'}, color_discrete_sequence=['#4CAF50'])
-            fig_hist.add_vline(x=0, line_width=3, line_dash="dash", line_color="red", annotation_text="Break-even")
-            # Pokud máte proměnnou irr ze základního výpočtu, můžete ji zde použít:
-            # fig_hist.add_vline(x=irr, line_width=3, line_color="blue", annotation_text="Základní scénář")
-            st.plotly_chart(fig_hist, use_container_width=True)
-            
-            if etf_comparison:
-                st.subheader("Porovnání rizik s ETF")
-                fig_comp = go.Figure()
-                fig_comp.add_trace(go.Box(y=df_mc['irr'], name='Nemovitost IRR', marker_color='#4CAF50'))
-                fig_comp.add_trace(go.Box(y=df_mc['etf_irr'], name='ETF IRR', marker_color='#2196F3'))
-                fig_comp.update_layout(title="Rozptyl výnosů: Nemovitost vs. ETF")
-                st.plotly_chart(fig_comp, use_container_width=True)
+        st.session_state['mc_job'] = {"id": job.id, "converge": converge, "inputs_key": inputs_key}
+
+    job_info = st.session_state.get('mc_job')
+    if job_info is not None:
+        job = JOBS.get(job_info['id'])
+        if job is None or job.done:
+            _collect_job(job, job_info)
+        else:
+            _render_job_progress(job_info['id'])
+            return
+
+    last = st.session_state.get('mc_last')
+    if last is None:
+        return
+    if last.get('inputs_key') != inputs_key:
+        st.info("Vstupy se od poslední simulace změnily - zobrazené výsledky by byly zastaralé. Spusťte simulaci znovu.")
+        return
+
+    run = None
+    convergence_report = last.get('report')
+    if 'run_key' in last:
+        run = RESULT_STORE.load(last['run_key'], last['n_paths'])
+        if run is None:
+            st.info("Uložený výsledek už není k dispozici - spusťte simulaci znovu.")
+            return
+        mc_results = calculations.stored_aggregator(run)
+    else:
+        mc_results = last['aggregator']
+    if last.get('cancelled'):
+        st.warning(f"Simulace byla zrušena - zobrazeny částečné výsledky z {mc_results.n_paths:,} simulací.")
+    if last.get('extended_from'):
+        st.caption(
+            f"➕ Navýšeno z {last['extended_from']:,} na {run.n_paths:,} simulací - "
+            f"spočteno jen {run.n_paths - last['extended_from']:,} nových cest."
+        )
+    _render_results(mc_results, convergence_report, run, from_disk=last.get('from_disk', False))
+
+
+def _collect_job(job, job_info):
+    """Převezme výsledek dokončené úlohy do mc_last (jednou, pak se úloha zapomene)."""
+    del st.session_state['mc_job']
+    if job is None:
+        return
+    if job.status == FAILED:
+        if isinstance(job.error, ValueError):
+            st.error(f"Neplatné nastavení simulace: {job.error}")
+        else:
+            st.error(f"Simulace selhala: {job.error}")
+        return
+    if job.status == CANCELLED:
+        partial = job.partial()
+        if partial is not None and partial.n_paths:
+            last = {"aggregator": partial, "cancelled": True}
+        else:
+            return
+    elif job_info['converge']:
+        aggregator, convergence_report = job.result
+        last = {"aggregator": aggregator, "report": convergence_report}
+    else:
+        run = job.result
+        last = {
+            "run_key": run.key,
+            "n_paths": run.n_paths,
+            "seed": run.manifest['params']['seed'],
+            "from_disk": run.from_cache,
+            "extended_from": 0 if run.from_cache else run.manifest.get('extended_from', 0)
+        }
+    # Každý výsledek nese klíč vstupů, pro které vznikl (zastaralý se nezobrazí)
+    last['inputs_key'] = job_info['inputs_key']
+    st.session_state['mc_last'] = last
+    if job.status != CANCELLED:
+        st.success("Simulace dokončena!")
+
+
+@st.fragment(run_every=JOB_REFRESH_SECONDS)
+def _render_job_progress(job_id):
+    """Průběh běžící úlohy s částečnými výsledky; překresluje se jen tato část stránky."""
+    job = JOBS.get(job_id)
+    if job is None or job.done:
+        # Dokončení převezme celý skript (výsledky, uložení do relace)
+        st.rerun()
+    partial = job.partial()
+    done_paths = partial.n_paths if partial is not None else 0
+    st.progress(job.progress, text=f"{job.label}: {job.progress:.0%} ({done_paths:,} simulací)")
+    if st.button("⏹️ Zrušit simulaci", key="mc_cancel"):
+        job.cancel()
+    if partial is not None and partial.n_paths:
+        st.caption("Průběžné výsledky z dosud dokončených dávek:")
+        _render_results(partial)
+
+
+def _render_results(mc_results, convergence_report=None, run=None, from_disk=False):
+    """Výsledky posledního běhu (souhrn, histogram, box ploty, percentily z uložených cest)."""
+    if from_disk:
+        st.caption(f"💾 Uložený běh ({run.n_paths:,} simulací) - načteno z disku bez přepočtu.")
+
+    # Metrics (streaming souhrn, cesty se v paměti nedrží)
+    summary = mc_results.summary()
+    avg_irr = summary['mean_irr']
+    median_irr = summary['median_irr']
+    prob_loss = summary['prob_loss']
+    
+    mc_col1, mc_col2, mc_col3 = st.columns(3)
+    mc_col1.metric("Průměrné IRR", f"{avg_irr:.2f} %")
+    mc_col2.metric("Medián IRR", f"{median_irr:.2f} %")
+    mc_col3.metric("Pravděpodobnost ztráty", f"{prob_loss:.1f} %", delta_color="inverse")
+    
+    if convergence_report is not None:
+        half = convergence_report['half_widths']
+        status = "✅ Dosažena požadovaná přesnost" if convergence_report['converged'] else "⏱️ Vyčerpán rozpočet (limit simulací nebo času)"
+        st.caption(
+            f"{status} po {convergence_report['n_paths']:,} simulacích za {convergence_report['elapsed_seconds']:.1f} s. "
+            f"95% interval: průměr IRR ±{half['mean_irr']:.3f} p.b., medián IRR ±{half['median_irr']:.3f} p.b., "
+            f"ztráta ±{half['prob_loss']:.2f} p.b."
+        )
+
+    # Histogram IRR (pevné koše, zobrazujeme jen obsazený rozsah)
+    hist = mc_results.irr_hist
+    used = np.flatnonzero(hist.counts)
+    shown = slice(used[0], used[-1] + 1) if used.size else slice(0, 0)
+    fig_hist = go.Figure(go.Bar(
+        x=hist.centers[shown], y=hist.counts[shown],
+        width=np.diff(hist.edges)[shown], marker_color='#4CAF50'
+    ))
+    fig_hist.update_layout(title="Rozložení dosahovaného IRR", xaxis_title="IRR (%)", yaxis_title="count", bargap=0)
+    fig_hist.add_vline(x=0, line_width=3, line_dash="dash", line_color="red", annotation_text="Break-even")
+    # Pokud máte proměnnou irr ze základního výpočtu, můžete ji zde použít:
+    # fig_hist.add_vline(x=irr, line_width=3, line_color="blue", annotation_text="Základní scénář")
+    st.plotly_chart(fig_hist, use_container_width=True)
+
+    if run is not None:
+        # Přesné percentily přímo z uložených cest (bez nové simulace)
+        percentile = st.slider("Percentil scénáře", 1, 99, 5, key="mc_percentile")
+        p_col1, p_col2 = st.columns(2)
+        p_col1.metric(f"IRR na {percentile}. percentilu", f"{float(run.percentiles('irr', percentile)):.2f} %")
+        p_col2.metric(f"Celkový zisk na {percentile}. percentilu", f"{float(run.percentiles('total_profit', percentile)):,.0f} Kč")
+    
+    # Rizikové metriky: u uloženého běhu přesně z cest, jinak ze streamingových sketchů
+    st.subheader("⚠️ Rizikové metriky")
+    r_col1, r_col2 = st.columns(2)
+    with r_col1:
+        confidence = st.select_slider(
+            "Hladina spolehlivosti VaR / CVaR", [0.90, 0.95, 0.99], value=0.95,
+            format_func=lambda c: f"{c:.0%}", key="mc_risk_confidence"
+        )
+    with r_col2:
+        liquidity_budget = st.number_input(
+            "Rezerva na dotace (Kč)", 0, 50_000_000, 500_000, 50_000, key="mc_liquidity_budget",
+            help="Kolik je investor schopen celkem doplatit ze svého na záporné cashflow."
+        )
+    if run is not None:
+        risk = calculations.stored_risk_metrics(run, confidence, liquidity_budget)
+    else:
+        risk = mc_results.risk_summary(confidence, liquidity_budget)
+    r1, r2, r3, r4, r5 = st.columns(5)
+    r1.metric(f"VaR {confidence:.0%}", f"{risk['var']:,.0f} Kč", help="Ztráta (záporný celkový zisk), kterou s danou pravděpodobností nepřekročíte.")
+    r2.metric(f"CVaR {confidence:.0%}", f"{risk['cvar']:,.0f} Kč", help="Průměrná ztráta v nejhorších scénářích za hranicí VaR.")
+    r3.metric("Propad cashflow", f"{risk['drawdown']:,.0f} Kč", help=f"Největší pokles kumulovaného cashflow ({confidence:.0%} scénářů je lepších). Nejhorší scénář: {risk['max_drawdown']:,.0f} Kč.")
+    r4.metric("P(equity < 0)", f"{risk['prob_negative_equity']:.1f} %", help="Pravděpodobnost, že dluh v některém roce převýší hodnotu nemovitosti (LTV > 100 %).")
+    r5.metric("P(dotace > rezerva)", f"{risk['prob_subsidies_over_budget']:.1f} %", help="Pravděpodobnost, že součet dotací za celé období překročí rezervu.")
+
+    if mc_results.etf_comparison:
+        st.subheader("Porovnání rizik s ETF")
+        fig_comp = go.Figure()
+        fig_comp.add_trace(_box_trace(mc_results.box_stats(mc_results.irr_sketch), 'Nemovitost IRR', '#4CAF50'))
+        fig_comp.add_trace(_box_trace(mc_results.box_stats(mc_results.etf_irr_sketch), 'ETF IRR', '#2196F3'))
+        fig_comp.update_layout(title="Rozptyl výnosů: Nemovitost vs. ETF")
+        st.plotly_chart(fig_comp, use_container_width=True)
+
+    # Pásma po letech spočtená během simulace (bez dalšího průchodu přes cesty)
+    st.subheader("Vývoj v čase (percentilová pásma)")
+    fans = mc_results.fan_bands()
+    fig_worth = go.Figure()
+    _add_fan(fig_worth, fans['equity'], "Nemovitost (equity)", "46, 125, 50")
+    if 'etf_values' in fans:
+        _add_fan(fig_worth, fans['etf_values'], "ETF portfolio", "33, 150, 243")
+    fig_worth.update_layout(title="Čisté jmění: Nemovitost vs. ETF", xaxis_title="Rok", yaxis_title="Kč")
+    st.plotly_chart(fig_worth, use_container_width=True)
+
+    fig_cf = go.Figure()
+    _add_fan(fig_cf, fans['cumulative_cashflow'], "Kumulované cashflow", "255, 152, 0")
+    fig_cf.add_hline(y=0, line_width=1, line_dash="dash", line_color="red")
+    fig_cf.update_layout(title="Kumulované provozní cashflow", xaxis_title="Rok", yaxis_title="Kč")
+    st.plotly_chart(fig_cf, use_container_width=True)
@@ -4,7 +4,12 @@ import plotly.graph_objects as go
 import calculations
 import numpy_financial as npf
 
+@st.fragment
 def render_strategy_tab(inputs, metrics, derived_metrics):
+    """
+    Záložka strategie. Běží jako fragment: změna jejích vlastních vstupů
+    (benchmark, rok rozhodnutí, cena, refinancování) přepočítá jen tuto záložku.
+    """
     # --- 1. PŘÍPRAVA DAT (30 let horizont) ---
     STRATEGY_HORIZON_YEARS = 30
     inputs_long = inputs.copy()